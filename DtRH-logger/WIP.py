@@ -4,10 +4,23 @@ from rich.logging import RichHandler
 import sys
 import time
 import threading
+import asyncio
+import signal
+import collections
+import struct
+import itertools
+import mmap
 import json
 import os
+import re
+import gzip
+import bz2
+import lzma
+import shutil
+import concurrent.futures
 import yaml
 import xml.etree.ElementTree as ET
+from dtrhIndex import LogIndexWriter, appended_at, index_path
 
 # Formatter to handle multiple log formats: JSON, YAML, XML
 class MultiFormatFormatter(logging.Formatter):
@@ -64,9 +77,231 @@ class CustomHandler(logging.Handler):
         except Exception as e:
             self.handleError(record)
 
-# Base Logger class with configuration options and multiple format support
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+COMPRESSION_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+SEGMENT_TIME_FORMAT = '%Y-%m-%d_%H-%M-%S'
+# <log file>.<timestamp>[.<sequence>][.gz|.bz2|.xz]; the timestamp is SEGMENT_TIME_FORMAT or a
+# TimedRotatingFileHandler suffix, both of which sort chronologically as strings
+SEGMENT_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2}(?:_\d{2}(?:-\d{2}){0,2})?)(?:\.(\d+))?(\.gz|\.bz2|\.xz)?$')
+
+# Rotated segments of `log_file`, oldest first. Segments still waiting for compression are
+# included (uncompressed), half-written .tmp files never are.
+def segment_files(log_file):
+    directory, base = os.path.split(os.path.abspath(log_file))
+    prefix = base + '.'
+    segments = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix):
+            match = SEGMENT_PATTERN.match(name[len(prefix):])
+            if match:
+                segments.append(((match.group(1), int(match.group(2) or 0)), os.path.join(directory, name)))
+    return [path for _, path in sorted(segments)]
+
+# Opens a log file or segment for reading, decompressing by suffix
+def open_log(path, mode='rt'):
+    opener = COMPRESSION_OPENERS.get(os.path.splitext(path)[1], open)
+    return opener(path, mode) if 'b' in mode else opener(path, mode, encoding='utf-8', errors='replace')
+
+# Every line of a rotated log in order: its segments oldest first, then the live file
+def iter_log_lines(log_file):
+    paths = segment_files(log_file)
+    if os.path.exists(log_file):
+        paths.append(log_file)
+    for path in paths:
+        try:
+            with open_log(path) as f:
+                yield from f
+        except FileNotFoundError:
+            continue  # Compressed (renamed) or pruned while we were listing
+
+# Compresses closed log segments on a small pool of background threads, so rotation only
+# renames and the logging thread never waits for compression. zlib, bz2 and lzma release
+# the GIL while they work. The pool's threads are joined at interpreter exit, so queued
+# segments are finished; anything a crash leaves uncompressed is picked up by recover().
+class SegmentCompressor:
+    def __init__(self, method='gzip', level=None, workers=1):
+        if method not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown compression {method!r}; expected one of {sorted(COMPRESSION_SUFFIXES)}")
+        self.method = method
+        self.level = level
+        self.workers = workers
+        self.suffix = COMPRESSION_SUFFIXES[method]
+        self.pool = None  # Created on the first rotation
+        self.lock = threading.Lock()
+        self.pending = set()  # Segments queued or being compressed
+        self.stats = {"compressed": 0, "failed": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def open_output(self, path):
+        if self.method == 'gzip':
+            return gzip.open(path, 'wb', compresslevel=9 if self.level is None else self.level)
+        if self.method == 'bz2':
+            return bz2.open(path, 'wb', compresslevel=9 if self.level is None else self.level)
+        return lzma.open(path, 'wb', preset=self.level)
+
+    def submit(self, path, on_done=None):
+        with self.lock:
+            if path in self.pending:
+                return None
+            self.pending.add(path)
+            if self.pool is None:
+                self.pool = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix='LogCompressor')
+        return self.pool.submit(self.compress, path, on_done)
+
+    def compress(self, path, on_done=None):
+        temp = path + self.suffix + '.tmp'
+        try:
+            with open(path, 'rb') as source, self.open_output(temp) as output:
+                shutil.copyfileobj(source, output, 1 << 20)
+            shutil.copystat(path, temp)  # Keep the segment's mtime for tools that sort by it
+            os.replace(temp, path + self.suffix)
+            size = os.path.getsize(path)
+            os.remove(path)
+            with self.lock:
+                self.stats["compressed"] += 1
+                self.stats["bytes_in"] += size
+                self.stats["bytes_out"] += os.path.getsize(path + self.suffix)
+        except OSError as e:
+            # Leave the plain segment in place; it is still readable and retried by recover()
+            with self.lock:
+                self.stats["failed"] += 1
+            sys.stderr.write(f"Could not compress {path}: {e}\n")
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+        finally:
+            with self.lock:
+                self.pending.discard(path)
+        if on_done:
+            on_done()
+
+    def wait(self):
+        # Blocks until every queued segment is compressed (tests, tools and shutdown only)
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool:
+            pool.shutdown(wait=True)
+
+# One compressor per (method, level), shared by every handler in the process
+compressors = {}
+compressors_lock = threading.Lock()
+
+def shared_compressor(method='gzip', level=None):
+    with compressors_lock:
+        compressor = compressors.get((method, level))
+        if compressor is None:
+            compressor = compressors[(method, level)] = SegmentCompressor(method, level)
+        return compressor
+
+# Rotation shared by the compressing handlers: the closed file is renamed to a unique
+# timestamped segment (a single rename on the logging thread) and queued for compression;
+# pruning down to `backup_count` segments then runs on the compressor thread too.
+# With index=True each file gets a dtrhIndex sidecar, which is renamed along with its
+# segment and stays uncompressed (X.gz keeps X.idx).
+class CompressedRotationMixin:
+    def setup_compression(self, compression, compress_level, backup_count, index=False):
+        self.compressor = shared_compressor(compression, compress_level)
+        self.keep = backup_count  # 0 keeps every segment
+        self.index = LogIndexWriter(self.baseFilename) if index else None
+        self.recover()
+
+    def emit(self, record):
+        if self.index is None:
+            return super().emit(record)
+        # BaseRotatingHandler.emit, with the record's byte range measured after any rollover
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            stream = self.stream
+            data = (self.format(record) + self.terminator).encode(stream.encoding, stream.errors)
+            stream.flush()
+            stream.buffer.write(data)
+            stream.buffer.flush()
+            self.index.add(appended_at(stream.fileno(), len(data)), len(data), record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        with self.lock:
+            if self.index is not None:
+                self.index.close()
+        super().close()
+
+    def segment_name(self, dest):
+        # Never reuse a name that exists in plain or compressed form
+        name, sequence = dest, 0
+        while os.path.exists(name) or os.path.exists(name + self.compressor.suffix):
+            sequence += 1
+            name = f"{dest}.{sequence}"
+        return name
+
+    def rotate_segment(self, source, dest):
+        if os.path.exists(source):
+            segment = self.segment_name(dest)
+            if self.index is not None:
+                self.index.close()
+            os.rename(source, segment)
+            if os.path.exists(index_path(source)):
+                os.rename(index_path(source), index_path(segment))
+            if self.index is not None:
+                self.index = LogIndexWriter(source)
+            self.compressor.submit(segment, self.prune)
+
+    def prune(self):
+        if self.keep > 0:
+            for path in segment_files(self.baseFilename)[:-self.keep]:
+                if path not in self.compressor.pending:
+                    for name in (path, index_path(path)):
+                        try:
+                            os.remove(name)
+                        except OSError:
+                            pass
+
+    def recover(self):
+        # Compress segments a previous run rotated but didn't get to, and drop half-written output
+        directory, base = os.path.split(self.baseFilename)
+        for name in os.listdir(directory or '.'):
+            if name.startswith(base + '.') and name.endswith('.tmp'):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+        for path in segment_files(self.baseFilename):
+            if os.path.splitext(path)[1] not in COMPRESSION_OPENERS:
+                self.compressor.submit(path, self.prune)
+
+# Size-based rotation with background compression. Segments are named by rotation time
+# instead of being renumbered, so a rollover is one rename however many backups exist.
+class CompressedRotatingFileHandler(CompressedRotationMixin, logging.handlers.RotatingFileHandler):
+    def __init__(self, filename, compression='gzip', compress_level=None, index=False, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.setup_compression(compression, compress_level, self.backupCount, index)
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.rotate_segment(self.baseFilename, f"{self.baseFilename}.{time.strftime(SEGMENT_TIME_FORMAT)}")
+        if not self.delay:
+            self.stream = self._open()
+
+# Time-based rotation with background compression. The standard rollover schedule and
+# suffixes are kept; only the rename (rotator) and the pruning are replaced.
+class CompressedTimedRotatingFileHandler(CompressedRotationMixin, logging.handlers.TimedRotatingFileHandler):
+    def __init__(self, filename, compression='gzip', compress_level=None, index=False, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.setup_compression(compression, compress_level, self.backupCount, index)
+        self.backupCount = 0  # The base class would list and prune the directory on the logging thread
+        self.namer = self.segment_name  # Unique names: the base class deletes an existing target first
+        self.rotator = self.rotate_segment
+
+# Base Logger class with configuration options and multiple format support.
+# compression='gzip', 'bz2' or 'xz' compresses rotated files in the background;
+# index=True also keeps dtrhIndex sidecars for them.
 class BaseLogger:
-    def __init__(self, name, log_file='app.log', log_level=logging.DEBUG, rotation='size', interval=1, when='midnight', max_bytes=10*1024*1024, backup_count=5, log_format='json'):
+    def __init__(self, name, log_file='app.log', log_level=logging.DEBUG, rotation='size', interval=1, when='midnight', max_bytes=10*1024*1024, backup_count=5, log_format='json', compression=None, compress_level=None, index=False):
         self.logger = logging.getLogger(name)
         self.logger.setLevel(log_level)
 
@@ -76,10 +311,18 @@ class BaseLogger:
         self.console_handler.setFormatter(MultiFormatFormatter(log_format=log_format))
 
         # File handler based on rotation type
-        if rotation == 'size':
+        if rotation == 'size' and compression:
+            self.file_handler = CompressedRotatingFileHandler(
+                log_file, compression=compression, compress_level=compress_level, index=index, maxBytes=max_bytes, backupCount=backup_count
+            )
+        elif rotation == 'size':
             self.file_handler = logging.handlers.RotatingFileHandler(
                 log_file, maxBytes=max_bytes, backupCount=backup_count
             )
+        elif rotation == 'time' and compression:
+            self.file_handler = CompressedTimedRotatingFileHandler(
+                log_file, compression=compression, compress_level=compress_level, index=index, when=when, interval=interval, backupCount=backup_count
+            )
         elif rotation == 'time':
             self.file_handler = logging.handlers.TimedRotatingFileHandler(
                 log_file, when=when, interval=interval, backupCount=backup_count
@@ -129,6 +372,97 @@ class DevLogger(BaseLogger):
     def info(self, message, **kwargs):
         self.log(logging.INFO, message, **kwargs)
 
+# Fixed-size log-linear histogram of nanosecond durations. Each power of two is split
+# into 2**sub_bits buckets, so percentiles are within ~6% and memory never grows.
+class LatencyHistogram:
+    sub_bits = 4
+
+    def __init__(self, max_exponent=48):
+        self.counts = [0] * ((max_exponent + 1) << self.sub_bits)
+        self.total = 0
+
+    def bucket(self, value):
+        shift = value.bit_length() - self.sub_bits - 1
+        if shift < 0:
+            return value
+        index = ((shift + 1) << self.sub_bits) + (value >> shift) - (1 << self.sub_bits)
+        return min(index, len(self.counts) - 1)
+
+    def bucket_bounds(self, index):
+        if index < (1 << self.sub_bits):
+            return index, index
+        shift = (index >> self.sub_bits) - 1
+        mantissa = (index & ((1 << self.sub_bits) - 1)) + (1 << self.sub_bits)
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        self.counts[self.bucket(value)] += 1
+        self.total += 1
+
+    def percentile(self, percent):
+        if not self.total:
+            return 0
+        target = max(1, -(-self.total * percent // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                low, high = self.bucket_bounds(index)
+                return (low + high) // 2
+        return 0
+
+# Aggregated timings for one code object
+class FunctionStats:
+    def __init__(self, code, task=None):
+        self.name = f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+        self.task = task  # asyncio task name, if the call ran inside a task
+        self.count = 0
+        self.total_ns = 0
+        self.self_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.histogram = LatencyHistogram()
+
+    def record(self, duration_ns, self_ns):
+        self.count += 1
+        self.total_ns += duration_ns
+        self.self_ns += self_ns
+        if self.min_ns is None or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.histogram.record(duration_ns)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.self_ns += other.self_ns
+        if other.min_ns is not None and (self.min_ns is None or other.min_ns < self.min_ns):
+            self.min_ns = other.min_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        self.histogram.total += other.histogram.total
+        for index, count in enumerate(other.histogram.counts):
+            if count:
+                self.histogram.counts[index] += count
+
+    def percentile(self, percent):
+        # Bucket midpoints can fall outside the observed range; clamp to it
+        return min(max(self.histogram.percentile(percent), self.min_ns or 0), self.max_ns)
+
+    def as_dict(self):
+        return {
+            "function": self.name,
+            "task": self.task,
+            "count": self.count,
+            "total_ns": self.total_ns,
+            "self_ns": self.self_ns,
+            "min_ns": self.min_ns or 0,
+            "max_ns": self.max_ns,
+            "p50_ns": self.percentile(50),
+            "p95_ns": self.percentile(95),
+            "p99_ns": self.percentile(99)
+        }
+
 # Class to store trace information for function calls
 class TraceInfo:
     def __init__(self):
@@ -136,75 +470,461 @@ class TraceInfo:
         self.last_command = None
         self.runtime = 0
         self.call_count = 0
-        self.execution_times = []
-
-# Tracer class for tracing function calls and logging them
+        self.function_stats = {}  # (code object, task name) -> FunctionStats
+
+    def function_table(self, sort_by='total_ns'):
+        rows = [stats.as_dict() for stats in self.function_stats.values()]
+        return sorted(rows, key=lambda row: row[sort_by], reverse=True)
+
+# Fixed-size binary trace events in a preallocated ring buffer. Each event is a packed
+# (timestamp_ns, thread_id, function_id, event_type) record; function names are interned
+# once and stored in a '<path>.names.json' sidecar. With a path the ring lives in a
+# memory-mapped file, otherwise in memory until save() is called.
+class TraceRingBuffer:
+    magic = b'DTRHTRC1'
+    header = struct.Struct('<8sIIIQ')  # magic, record size, capacity, pid, events written
+    record = struct.Struct('<QQIB3x')  # timestamp ns, thread id, function id, event type
+    CALL = 0
+    RETURN = 1
+
+    def __init__(self, capacity=1 << 20, path=None):
+        self.capacity = capacity
+        self.path = path
+        self.function_ids = {}
+        self.function_names = []
+        self.intern_lock = threading.Lock()
+        self.counter = itertools.count()
+        self.written = None
+        self.closed = False  # Set by finish(); appends from hooks still attached are ignored
+        size = self.header.size + capacity * self.record.size
+        if path:
+            self.file = open(path, 'w+b')
+            self.file.truncate(size)
+            self.buffer = mmap.mmap(self.file.fileno(), size)
+        else:
+            self.file = None
+            self.buffer = bytearray(size)
+
+    def intern(self, code):
+        function_id = self.function_ids.get(code)
+        if function_id is None:
+            with self.intern_lock:  # only taken the first time a function is seen
+                function_id = self.function_ids.get(code)
+                if function_id is None:
+                    function_id = len(self.function_names)
+                    self.function_names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}")
+                    self.function_ids[code] = function_id
+        return function_id
+
+    def append(self, event_type, code, timestamp=None, thread_id=None):
+        if self.closed:
+            return
+        # next() on itertools.count is atomic under the GIL, so threads never share a slot
+        slot = next(self.counter) % self.capacity
+        self.record.pack_into(
+            self.buffer, self.header.size + slot * self.record.size,
+            timestamp if timestamp is not None else time.perf_counter_ns(),
+            thread_id if thread_id is not None else threading.get_ident(),
+            self.intern(code), event_type
+        )
+
+    def finish(self):
+        # Stops further writes and records the final event count in the header
+        if self.written is None:
+            self.closed = True
+            self.written = next(self.counter)
+            self.header.pack_into(self.buffer, 0, self.magic, self.record.size, self.capacity, os.getpid(), self.written)
+        return self.written
+
+    def write_names(self, path):
+        with open(path + '.names.json', 'w') as f:
+            json.dump(self.function_names, f)
+
+    def save(self, path):
+        self.finish()
+        with open(path, 'wb') as f:
+            f.write(self.buffer)
+        self.write_names(path)
+
+    def close(self):
+        self.finish()
+        if self.file:
+            self.buffer.flush()
+            self.buffer.close()
+            self.file.close()
+            self.write_names(self.path)
+
+# Reads a TraceRingBuffer file back as chronologically ordered event tuples
+def load_trace(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    header = TraceRingBuffer.header
+    record = TraceRingBuffer.record
+    magic, record_size, capacity, pid, written = header.unpack_from(data, 0)
+    if magic != TraceRingBuffer.magic or record_size != record.size:
+        raise ValueError(f"{path} is not a DtRH trace ring buffer")
+    with open(path + '.names.json') as f:
+        names = json.load(f)
+    first = written - capacity if written > capacity else 0
+    events = [
+        record.unpack_from(data, header.size + (index % capacity) * record_size)
+        for index in range(first, written)
+    ]
+    return {"pid": pid, "written": written, "dropped": first, "names": names, "events": events}
+
+# Converts a TraceRingBuffer file to Chrome/Perfetto trace-event JSON. Returns whose
+# call was overwritten by the ring are skipped so every slice is balanced.
+def to_chrome_trace(path, output_path):
+    trace = load_trace(path)
+    names = trace["names"]
+    depth = collections.Counter()
+    trace_events = []
+    for timestamp, thread_id, function_id, event_type in trace["events"]:
+        if event_type == TraceRingBuffer.CALL:
+            depth[thread_id] += 1
+            phase = 'B'
+        elif depth[thread_id]:
+            depth[thread_id] -= 1
+            phase = 'E'
+        else:
+            continue
+        trace_events.append({
+            "name": names[function_id],
+            "ph": phase,
+            "ts": timestamp / 1000.0,
+            "pid": trace["pid"],
+            "tid": thread_id
+        })
+    with open(output_path, 'w') as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ns"}, f)
+    return len(trace_events)
+
+# Per-thread trace state. Only its owning thread writes to it, so the hot path takes
+# no locks; Tracer.get_trace_info() merges all buffers into one TraceInfo.
+class ThreadTraceBuffer:
+    def __init__(self, thread_name):
+        self.thread_name = thread_name
+        self.stack = []  # [code, start_ns, child_ns] per active call
+        self.call_count = 0
+        self.function_stats = {}
+
+# Tracer class for tracing function calls. Events are recorded into per-thread buffers
+# only; the summary is logged once, by stop_tracing(). With a TraceRingBuffer sink,
+# call/return events go straight into the ring through a profile hook (no per-line
+# callbacks) and are summarised offline with to_chrome_trace().
+# Hooks are installed on every thread: on Python 3.12+ that includes threads that are
+# already running, on older versions only the calling thread and threads started later.
+# Threads keep the hook they were started with, so every hook checks `active` and
+# detaches itself from its thread once tracing has stopped.
 class Tracer:
-    def __init__(self):
+    def __init__(self, sink=None):
         self.trace_info = TraceInfo()
         self.logger = DevLogger('Tracer', log_file='trace.log')
         self.start_time = None
-        self.lock = threading.Lock()
+        self.lock = threading.Lock()  # guards buffer registration, never taken per event
+        self.local = threading.local()
+        self.buffers = []
+        self.sink = sink
+        self.active = False
+        # The tracer's own frames (and the threading calls it makes) are never traced
+        self.own_code = {
+            code for code in (
+                Tracer.start_tracing.__code__, Tracer.stop_tracing.__code__, Tracer.install_hook.__code__,
+                getattr(threading.settrace, '__code__', None), getattr(threading.setprofile, '__code__', None),
+                getattr(getattr(threading, 'settrace_all_threads', None), '__code__', None),
+                getattr(getattr(threading, 'setprofile_all_threads', None), '__code__', None)
+            ) if code is not None
+        }
+
+    def thread_buffer(self):
+        try:
+            return self.local.buffer
+        except AttributeError:
+            buffer = self.local.buffer = ThreadTraceBuffer(threading.current_thread().name)
+            with self.lock:
+                self.buffers.append(buffer)
+            return buffer
+
+    @staticmethod
+    def task_name():
+        # Label calls made inside asyncio tasks so concurrent tasks are reported separately
+        if asyncio._get_running_loop() is None:
+            return None
+        task = asyncio.current_task()
+        return task.get_name() if task else None
 
     def trace_calls(self, frame, event, arg):
+        if not self.active:
+            sys.settrace(None)  # A thread that kept the hook after stop_tracing()
+            return None
         if event == 'call':
-            with self.lock:
-                self.trace_info.current_function = frame.f_code.co_name
-                self.trace_info.call_count += 1
-                self.start_time = time.time()
-                self.logger.debug(f"Function {frame.f_code.co_name} called.")
+            if frame.f_code in self.own_code:
+                return None
+            buffer = self.thread_buffer()
+            buffer.stack.append([frame.f_code, time.perf_counter_ns(), 0])
+            buffer.call_count += 1
+            self.trace_info.current_function = frame.f_code.co_name
         return self.trace_lines
 
     def trace_lines(self, frame, event, arg):
-        with self.lock:
-            if event == 'line':
-                self.trace_info.last_command = frame.f_lineno
-                self.trace_info.runtime = time.time() - self.start_time
-            elif event == 'return':
-                exec_time = time.time() - self.start_time
-                self.trace_info.execution_times.append(exec_time)
-                self.logger.info(f"Function {frame.f_code.co_name} returned, execution time: {exec_time:.4f} seconds.")
+        if not self.active:
+            return None
+        if event == 'line':
+            self.trace_info.last_command = frame.f_lineno
+        elif event == 'return':
+            end = time.perf_counter_ns()
+            buffer = self.thread_buffer()
+            stack = buffer.stack
+            if not stack or stack[-1][0] is not frame.f_code:
+                return self.trace_lines  # frame entered before tracing started
+            code, start, child_ns = stack.pop()
+            exec_time = end - start
+            if stack:
+                stack[-1][2] += exec_time
+            task = self.task_name()
+            stats = buffer.function_stats.get((code, task))
+            if stats is None:
+                stats = buffer.function_stats[(code, task)] = FunctionStats(code, task)
+            stats.record(exec_time, exec_time - child_ns)
         return self.trace_lines
 
-    def start_tracing(self):
-        sys.settrace(self.trace_calls)
-
-    def stop_tracing(self):
-        sys.settrace(None)
+    def profile_to_sink(self, frame, event, arg):
+        if not self.active:
+            sys.setprofile(None)
+            return
+        if frame.f_code in self.own_code:
+            return
+        if event == 'call':
+            self.sink.append(TraceRingBuffer.CALL, frame.f_code)
+        elif event == 'return':
+            self.sink.append(TraceRingBuffer.RETURN, frame.f_code)
+
+    def install_hook(self, hook, all_threads):
+        kind = 'setprofile' if self.sink else 'settrace'
+        if all_threads:
+            everywhere = getattr(threading, f'{kind}_all_threads', None)
+            if everywhere:
+                everywhere(hook)
+                return
+            getattr(threading, kind)(hook)  # threads started from now on
+        getattr(sys, kind)(hook)
+
+    def start_tracing(self, all_threads=True):
+        self.start_time = time.perf_counter_ns()
+        self.active = True
+        self.install_hook(self.profile_to_sink if self.sink else self.trace_calls, all_threads)
+
+    def stop_tracing(self, all_threads=True, summary=True):
+        # Clearing `active` first detaches the hooks of threads this call can't reach
+        self.active = False
+        try:
+            self.install_hook(None, all_threads)
+        finally:
+            if all_threads:
+                getattr(threading, 'setprofile' if self.sink else 'settrace')(None)
+        if self.start_time is not None:
+            self.trace_info.runtime = (time.perf_counter_ns() - self.start_time) / 1e9
+        if summary and not self.sink:
+            self.log_summary()
 
     def get_trace_info(self):
         with self.lock:
-            return self.trace_info
-
-    def log_summary(self):
-        with self.lock:
-            summary = {
-                "current_function": self.trace_info.current_function,
-                "last_command": self.trace_info.last_command,
-                "runtime": self.trace_info.runtime,
-                "call_count": self.trace_info.call_count,
-                "average_execution_time": sum(self.trace_info.execution_times) / len(self.trace_info.execution_times) if self.trace_info.execution_times else 0,
-                "total_execution_time": sum(self.trace_info.execution_times)
-            }
-            for key, value in summary.items():
-                self.logger.info(f"{key}: {value}")
+            buffers = list(self.buffers)
+        merged = TraceInfo()
+        merged.current_function = self.trace_info.current_function
+        merged.last_command = self.trace_info.last_command
+        merged.runtime = self.trace_info.runtime
+        for buffer in buffers:
+            merged.call_count += buffer.call_count
+            for key, stats in list(buffer.function_stats.items()):
+                total = merged.function_stats.get(key)
+                if total is None:
+                    total = merged.function_stats[key] = FunctionStats(key[0], key[1])
+                total.merge(stats)
+        return merged
+
+    def log_summary(self, sort_by='total_ns', limit=None):
+        trace_info = self.get_trace_info()
+        summary = {
+            "current_function": trace_info.current_function,
+            "last_command": trace_info.last_command,
+            "runtime": trace_info.runtime,
+            "call_count": trace_info.call_count,
+            "threads": len(self.buffers)
+        }
+        for key, value in summary.items():
+            self.logger.info(f"{key}: {value}")
+        header = f"{'calls':>8} {'total ms':>10} {'self ms':>10} {'min us':>9} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'max us':>9}  function"
+        self.logger.info(header)
+        for row in trace_info.function_table(sort_by)[:limit]:
+            task = f" [{row['task']}]" if row['task'] else ""
+            self.logger.info(
+                f"{row['count']:>8} {row['total_ns'] / 1e6:>10.3f} {row['self_ns'] / 1e6:>10.3f} "
+                f"{row['min_ns'] / 1e3:>9.1f} {row['p50_ns'] / 1e3:>9.1f} {row['p95_ns'] / 1e3:>9.1f} "
+                f"{row['p99_ns'] / 1e3:>9.1f} {row['max_ns'] / 1e3:>9.1f}  {row['function']}{task}"
+            )
 
     def reset_tracing(self):
         with self.lock:
             self.trace_info = TraceInfo()
+            self.buffers = []
+            self.local = threading.local()
+
+# Statistical profiler: periodically samples stacks instead of hooking every line.
+# 'thread' mode reads sys._current_frames() from a timer thread and can sample any
+# thread; 'signal' mode uses setitimer(ITIMER_PROF) and samples the main thread's CPU time.
+class SamplingProfiler:
+    # Sampling modes:
+    #   thread - a timer thread reads sys._current_frames() (wall clock, any thread)
+    #   signal - SIGPROF from setitimer(ITIMER_PROF) (CPU time, main thread only)
+    modes = ('thread', 'signal')
+
+    def __init__(self, rate=100, mode='thread', max_depth=128):
+        if mode not in self.modes:
+            raise ValueError(f"Unknown sampling mode: {mode}")
+        self.interval = 1.0 / rate
+        self.mode = mode
+        self.max_depth = max_depth
+        self.samples = collections.Counter()  # tuple of code objects (root first) -> hits
+        self.sample_count = 0
+        self.thread_ids = None
+        self.stop_event = threading.Event()
+        self.sampler = None
+        self.previous_handler = None
+        self.logger = None
+
+    def start(self, thread_ids=None):
+        # thread_ids limits 'thread' mode to the given threads; None samples every thread
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        if self.mode == 'signal':
+            self.previous_handler = signal.signal(signal.SIGPROF, self.sample_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self.stop_event.clear()
+            self.sampler = threading.Thread(target=self.sample_threads, name='SamplingProfiler', daemon=True)
+            self.sampler.start()
+
+    def reset(self):
+        self.samples.clear()
+        self.sample_count = 0
+
+    def stop(self):
+        if self.mode == 'signal':
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self.previous_handler or signal.SIG_DFL)
+        elif self.sampler:
+            self.stop_event.set()
+            self.sampler.join()
+            self.sampler = None
+
+    def sample_threads(self):
+        own_id = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids and thread_id not in self.thread_ids):
+                    continue
+                self.record(frame)
+
+    def sample_signal(self, signum, frame):
+        self.record(frame)
+
+    def record(self, frame):
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        stack.reverse()
+        self.samples[tuple(stack)] += 1
+        self.sample_count += 1
+
+    @staticmethod
+    def label(code):
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+    def collapsed(self):
+        # Brendan Gregg's collapsed-stack format, accepted by flamegraph.pl and speedscope
+        lines = [
+            ";".join(self.label(code) for code in stack) + f" {count}"
+            for stack, count in self.samples.items()
+        ]
+        return "\n".join(sorted(lines))
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            f.write(self.collapsed() + "\n")
+
+    def top_functions(self, n=20):
+        self_hits = collections.Counter()
+        total_hits = collections.Counter()
+        for stack, count in self.samples.items():
+            if not stack:
+                continue
+            self_hits[stack[-1]] += count
+            for code in set(stack):
+                total_hits[code] += count
+        total = self.sample_count or 1
+        return [
+            {
+                "function": self.label(code),
+                "self_samples": self_hits[code],
+                "total_samples": hits,
+                "self_percent": 100.0 * self_hits[code] / total,
+                "total_percent": 100.0 * hits / total
+            }
+            for code, hits in sorted(total_hits.items(), key=lambda item: (-self_hits[item[0]], -item[1]))[:n]
+        ]
+
+    def log_summary(self, n=20):
+        if self.logger is None:
+            self.logger = DevLogger('Sampler', log_file='trace.log')
+        self.logger.info(f"samples: {self.sample_count} at {1.0 / self.interval:.0f} Hz ({self.mode} mode)")
+        for entry in self.top_functions(n):
+            self.logger.info(
+                f"{entry['self_percent']:6.2f}% self {entry['total_percent']:6.2f}% total  {entry['function']}"
+            )
 
-# Decorator to trace a target function
-def trace_process(target_function):
-    tracer = Tracer()
-
-    def wrapper(*args, **kwargs):
-        tracer.start_tracing()
-        result = target_function(*args, **kwargs)
-        tracer.stop_tracing()
-        tracer.log_summary()
-        return result
-
-    return wrapper
+# Decorator to trace a target function. mode='exact' uses Tracer (every call and line),
+# mode='sampling' uses SamplingProfiler at `rate` Hz; `collapsed_output` optionally
+# receives a flamegraph-ready collapsed-stack file.
+def trace_process(target_function=None, mode='exact', rate=100, collapsed_output=None, sampler='thread'):
+    # sampler picks the SamplingProfiler mode for mode='sampling'. Each call is
+    # profiled on its own: the summary and collapsed_output cover that call only.
+    if mode not in ('exact', 'sampling'):
+        raise ValueError(f"Unknown trace mode: {mode}")
+    if sampler not in SamplingProfiler.modes:
+        raise ValueError(f"Unknown sampling mode: {sampler}")
+
+    def decorate(function):
+        if mode == 'sampling':
+            profiler = SamplingProfiler(rate=rate, mode=sampler)
+
+            def wrapper(*args, **kwargs):
+                profiler.reset()  # Counts from the previous call are already reported
+                profiler.start(thread_ids=[threading.get_ident()])
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    profiler.stop()
+                    profiler.log_summary()
+                    if collapsed_output:
+                        profiler.write_collapsed(collapsed_output)
+
+            return wrapper
+
+        tracer = Tracer()
+
+        def wrapper(*args, **kwargs):
+            tracer.start_tracing()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                tracer.stop_tracing()  # Logs the summary
+
+        return wrapper
+
+    if target_function is None:
+        return decorate
+    return decorate(target_function)
 
 @trace_process
 def example_function():
@@ -232,10 +952,14 @@ def main():
     max_bytes = config.get('max_bytes', 10*1024*1024)
     backup_count = config.get('backup_count', 5)
     log_format = config.get('log_format', 'json')
+    compression = config.get('compression')
+    compress_level = config.get('compress_level')
+    index = config.get('index', False)
 
     dev_logger = DevLogger(
         'Dev', log_file=log_file, log_level=log_level, rotation=rotation,
-        interval=interval, when=when, max_bytes=max_bytes, backup_count=backup_count, log_format=log_format
+        interval=interval, when=when, max_bytes=max_bytes, backup_count=backup_count, log_format=log_format,
+        compression=compression, compress_level=compress_level, index=index
     )
 
     # Example usage with additional logging capabilities
@@ -0,0 +1,138 @@
+#
+#   dtrhCache.py - Compiled config cache shared by DtRH-Menu and DtRH-Logger
+#
+#   Usage:
+#       python3 dtrhCache.py status CONFIG [CONFIG ...]
+#       python3 dtrhCache.py invalidate CONFIG [CONFIG ...]
+#
+#   A parsed (and validated) config is stored next to its source as
+#   <source>.dtrhc in marshal format, so an unchanged config loads without
+#   parsing or validation. Deleting the .dtrhc file is always safe.
+# ======================================================================================================
+
+import hashlib
+import json
+import logging
+import marshal
+import os
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = '.dtrhc'
+CACHE_MAGIC = b'DTRHC\x00\x00\x01'
+# magic, source mtime_ns, source size, sha256 of the source, sha256 of the loader key
+HEADER = struct.Struct('<8sqq32s32s')
+
+def cache_path(source):
+    return source + CACHE_SUFFIX
+
+def schema_key(schema):
+    """Stable key for a JSON schema, so editing the schema invalidates old caches."""
+    return json.dumps(schema, sort_keys=True, separators=(',', ':')).encode()
+
+class ConfigCache:
+    """Cache the compiled form of a config file.
+
+    `compile` turns the raw source bytes into plain data (dicts, lists, strings,
+    numbers) and raises if the source is invalid; only successfully compiled
+    configs are cached. `key` identifies everything else the result depends
+    on (such as the schema it was validated against). A cache hit is decided
+    on mtime and size alone, like .pyc files; if those changed but the content
+    hash did not (touch, checkout), the header is refreshed without
+    recompiling.
+    """
+
+    def __init__(self, source, compile, key=b''):
+        self.source = source
+        self.path = cache_path(source)
+        self.compile = compile
+        self.key = hashlib.sha256(key + sys.implementation.cache_tag.encode()).digest()
+        self.status = None  # 'hit', 'refreshed' or 'rebuilt' after load()
+
+    def load(self):
+        stat = os.stat(self.source)
+        header, payload = self.read_cache()
+        if header and header[1:3] == (stat.st_mtime_ns, stat.st_size):
+            self.status = 'hit'
+            return marshal.loads(payload)
+
+        with open(self.source, 'rb') as file:
+            source = file.read()
+        digest = hashlib.sha256(source).digest()
+        if header and header[3] == digest:
+            self.status = 'refreshed'
+            self.write_cache(stat, digest, payload)
+            return marshal.loads(payload)
+
+        data = self.compile(source)
+        self.status = 'rebuilt'
+        try:
+            self.write_cache(stat, digest, marshal.dumps(data))
+        except ValueError as e:
+            logger.debug("Not caching %s: %s", self.source, e)  # Holds something marshal can't store
+        return data
+
+    def rebuild(self):
+        self.invalidate()
+        return self.load()
+
+    def invalidate(self):
+        try:
+            os.remove(self.path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def read_cache(self):
+        try:
+            with open(self.path, 'rb') as file:
+                blob = file.read()
+        except OSError:
+            return None, None
+        if len(blob) < HEADER.size:
+            return None, None
+        header = HEADER.unpack_from(blob)
+        if header[0] != CACHE_MAGIC or header[4] != self.key:
+            return None, None  # Other format version, Python version or schema
+        return header, blob[HEADER.size:]
+
+    def write_cache(self, stat, digest, payload):
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(HEADER.pack(CACHE_MAGIC, stat.st_mtime_ns, stat.st_size, digest, self.key))
+                file.write(payload)
+            os.replace(temp_path, self.path)  # Readers never see a half-written cache
+        except OSError as e:
+            # Read-only config directory: just run uncached
+            logger.debug("Not caching %s: %s", self.source, e)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or invalidate compiled config caches")
+    parser.add_argument('command', choices=['status', 'invalidate'])
+    parser.add_argument('configs', nargs='+', help="Config source files (not the .dtrhc files)")
+    args = parser.parse_args()
+
+    for source in args.configs:
+        cache = ConfigCache(source, None)
+        if args.command == 'invalidate':
+            print(f"{source}: {'invalidated' if cache.invalidate() else 'no cache'}")
+            continue
+        try:
+            with open(cache.path, 'rb') as file:
+                header = HEADER.unpack(file.read(HEADER.size))
+            stat = os.stat(source)
+            fresh = header[0] == CACHE_MAGIC and header[1:3] == (stat.st_mtime_ns, stat.st_size)
+            print(f"{source}: {'fresh' if fresh else 'stale'} ({os.path.getsize(cache.path)} bytes)")
+        except (OSError, struct.error):
+            print(f"{source}: no cache")
+
+if __name__ == "__main__":
+    main()
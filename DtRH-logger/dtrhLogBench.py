@@ -0,0 +1,229 @@
+#
+#   dtrhLogBench.py - Micro-benchmarks for DtRH-Logger write paths
+#
+#   Usage:
+#       python3 dtrhLogBench.py writers [--records N] [--size BYTES] [--dir DIR]
+#       python3 dtrhLogBench.py query [--records N] [--size BYTES] [--dir DIR]
+#       python3 dtrhLogBench.py formatters [--records N] [--handlers N]
+#       python3 dtrhLogBench.py limits [--records N] [--dir DIR]
+#
+#   Each benchmark writes into a temporary directory (or --dir, to measure a
+#   particular filesystem) and removes it afterwards.
+# ======================================================================================================
+
+import argparse
+import datetime
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from dtrhIndex import IndexedFileHandler, LogIndexWriter, query_file
+from dtrhLogger import DEFAULT_LAYOUT, BatchFileHandler, CustomFormatter, MmapFileHandler, RateLimiter
+
+
+def make_record(index, message):
+    return logging.LogRecord('bench', logging.INFO, __file__, index, message, None, None)
+
+
+def time_handler(handler, records):
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    start = time.perf_counter()
+    for record in records:
+        handler.handle(record)
+    handler.close()
+    return time.perf_counter() - start
+
+
+def bench_writers(args):
+    directory = tempfile.mkdtemp(prefix='dtrhLogBench-', dir=args.dir)
+    message = "x" * args.size
+    records = [make_record(index, message) for index in range(args.records)]
+    writers = [
+        ("FileHandler", lambda path: logging.FileHandler(path)),
+        ("FileHandler, indexed", lambda path: IndexedFileHandler(path)),
+        ("mmap, durability none", lambda path: MmapFileHandler(path, durability='none')),
+        ("mmap, durability interval", lambda path: MmapFileHandler(path, durability='interval')),
+        ("mmap, durability record", lambda path: MmapFileHandler(path, durability='record')),
+        ("batch, fsync never", lambda path: BatchFileHandler(path)),
+        ("batch, indexed", lambda path: BatchFileHandler(path, index=LogIndexWriter(path))),
+        ("batch, fsync batch", lambda path: BatchFileHandler(path, fsync='batch')),
+    ]
+    try:
+        print(f"writers ({args.records} records, {args.size}-byte messages, {directory})")
+        baseline = None
+        for name, factory in writers:
+            path = os.path.join(directory, name.split(',')[0].replace(' ', '_') + f"-{len(os.listdir(directory))}.log")
+            handler = factory(path)
+            elapsed = time_handler(handler, records)
+            rate = args.records / elapsed
+            baseline = baseline or rate
+            batches = f"  {handler.stats()['batches']} writes" if hasattr(handler, 'stats') else ""
+            print(f"  {name:<26}: {rate:12,.0f} records/s  ({rate / baseline:5.2f}x)  {os.path.getsize(path):,} bytes{batches}")
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_query(args):
+    # An hour of INFO records with one ERROR per thousand, then the same questions
+    # answered by scanning the file and through its index
+    directory = tempfile.mkdtemp(prefix='dtrhLogBench-', dir=args.dir)
+    path = os.path.join(directory, 'query.log')
+    start_time = time.time() - 3600
+    handler = BatchFileHandler(path, index=LogIndexWriter(path))
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    for index in range(args.records):
+        record = make_record(index, f"request {index} " + "x" * args.size)
+        record.created = start_time + 3600 * index / args.records
+        if index % 1000 == 999:
+            record.levelno, record.levelname = logging.ERROR, 'ERROR'
+        handler.handle(record)
+    handler.close()
+    since = int((start_time + 1800) * 1000)
+    until = since + 300 * 1000
+    window = (time.strftime('%Y-%m-%d %H:%M', time.localtime(since / 1000)),
+              time.strftime('%Y-%m-%d %H:%M', time.localtime(until / 1000)))
+
+    def scan(match):
+        with open(path, 'rb') as f:
+            return sum(1 for line in f if match(line))
+
+    def timed(run):
+        start = time.perf_counter()
+        count = run()
+        return count, time.perf_counter() - start
+
+    questions = [
+        ("ERROR records", lambda: scan(lambda line: b' ERROR ' in line),
+         lambda: sum(1 for _ in query_file(path, min_level=logging.ERROR))),
+        ("5 minute window", lambda: scan(lambda line: window[0] <= line[:16].decode() < window[1]),
+         lambda: sum(1 for _ in query_file(path, since=since, until=until))),
+        ("text in window", lambda: scan(lambda line: window[0] <= line[:16].decode() < window[1] and b'request 27' in line),
+         lambda: sum(1 for _ in query_file(path, since=since, until=until, contains=b'request 27'))),
+    ]
+    try:
+        print(f"query ({args.records} records, {os.path.getsize(path):,} log bytes, "
+              f"{os.path.getsize(path + '.idx'):,} index bytes)")
+        for name, scanned, indexed in questions:
+            scan_count, scan_time = timed(scanned)
+            index_count, index_time = timed(indexed)
+            print(f"  {name:<16}: scan {scan_time * 1e3:8.1f} ms  index {index_time * 1e3:8.1f} ms  "
+                  f"({scan_time / index_time:6.1f}x)  {index_count} matches (scan: {scan_count})")
+    finally:
+        shutil.rmtree(directory)
+
+
+class LegacyFormatter(logging.Formatter):
+    # CustomFormatter before the layout was compiled: a strftime per call, and the
+    # prefix written into record.msg
+    def format(self, record):
+        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        record.msg = f"\n\n\n\n[{timestamp}] {record.msg}"
+        return super().format(record)
+
+
+def bench_formatters(args):
+    # Each record is formatted by `handlers` handlers (file + console by default), all
+    # sharing one formatter, as BasicLogger sets them up
+    layouts = [
+        ("legacy CustomFormatter", lambda: LegacyFormatter()),
+        ("logging.Formatter", lambda: logging.Formatter(DEFAULT_LAYOUT, '%Y-%m-%d %H:%M:%S')),
+        ("compiled CustomFormatter", lambda: CustomFormatter()),
+        ("compiled, 5-field layout", lambda: CustomFormatter('%(asctime)s %(levelname)-8s %(name)s:%(lineno)d %(message)s')),
+    ]
+    print(f"formatters ({args.records} records, {args.handlers} handlers each)")
+    baseline = None
+    for name, factory in layouts:
+        formatter = factory()
+        records = [logging.LogRecord('bench', logging.INFO, __file__, index, "request %d took %.1f ms", (index, 1.5), None)
+                   for index in range(args.records)]
+        start = time.perf_counter()
+        for record in records:
+            for _ in range(args.handlers):
+                formatter.format(record)
+        elapsed = time.perf_counter() - start
+        rate = args.records / elapsed
+        baseline = baseline or rate
+        print(f"  {name:<25}: {rate:12,.0f} records/s  ({rate / baseline:5.2f}x)  {formatter.format(records[-1])!r:.60}")
+
+
+def bench_limits(args):
+    # A stuck redraw loop: "Entering display"/"Exiting display" at DEBUG as fast as the
+    # loop spins, an INFO record every thousand, written through BatchFileHandler with
+    # RateLimiter.check() in front of it the way BasicLogger.log() calls it
+    directory = tempfile.mkdtemp(prefix='dtrhLogBench-', dir=args.dir)
+    debug_limit = {'DEBUG': {'rate': 20, 'burst': 100}}
+    setups = [
+        ("no limiter", None),
+        ("fold duplicates only", {'fold_duplicates': True}),
+        ("DEBUG rate limit", {'fold_duplicates': True, 'rate_limit': debug_limit}),
+        ("DEBUG rate limit, 10%", {'fold_duplicates': True, 'rate_limit': debug_limit, 'sample': {'DEBUG': 0.1}}),
+    ]
+    try:
+        print(f"limits ({args.records} records, {directory})")
+        for name, config in setups:
+            path = os.path.join(directory, f"limits-{len(os.listdir(directory))}.log")
+            handler = BatchFileHandler(path)
+            handler.setFormatter(CustomFormatter())
+            logger = logging.Logger('bench', logging.DEBUG)
+            logger.addHandler(handler)
+            limiter = RateLimiter(config) if config is not None else None
+            written = 0
+            start = time.perf_counter()
+            for index in range(args.records):
+                if index % 1000 == 999:
+                    level, msg, msg_args = logging.INFO, "request %d", (index,)
+                else:
+                    level, msg, msg_args = logging.DEBUG, "Entering display" if index % 2 else "Exiting display", ()
+                if limiter is not None:
+                    write, notes = limiter.check(level, msg, msg_args)
+                    for note_level, note in notes:
+                        logger.log(note_level, note)
+                    written += len(notes)
+                    if not write:
+                        continue
+                logger.log(level, msg, *msg_args)
+                written += 1
+            for note_level, note in limiter.pending() if limiter is not None else ():
+                logger.log(note_level, note)
+                written += 1
+            handler.close()
+            elapsed = time.perf_counter() - start
+            print(f"  {name:<23}: {args.records / elapsed:12,.0f} records/s  {written:8,} written  {os.path.getsize(path):12,} bytes")
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DtRH-Logger micro-benchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    writers = subparsers.add_parser('writers', help="Records per second: FileHandler vs MmapFileHandler and BatchFileHandler")
+    writers.add_argument('--records', type=int, default=200000)
+    writers.add_argument('--size', type=int, default=100, help="Message length in bytes")
+    writers.add_argument('--dir', help="Directory to write in (default: the system temp directory)")
+    writers.set_defaults(func=bench_writers)
+
+    query = subparsers.add_parser('query', help="Time/level/text queries: scanning the log vs its sidecar index")
+    query.add_argument('--records', type=int, default=500000)
+    query.add_argument('--size', type=int, default=100, help="Message padding in bytes")
+    query.add_argument('--dir', help="Directory to write in (default: the system temp directory)")
+    query.set_defaults(func=bench_query)
+
+    formatters = subparsers.add_parser('formatters', help="Records per second: the compiled CustomFormatter vs logging.Formatter")
+    formatters.add_argument('--records', type=int, default=200000)
+    formatters.add_argument('--handlers', type=int, default=2, help="Handlers formatting each record")
+    formatters.set_defaults(func=bench_formatters)
+
+    limits = subparsers.add_parser('limits', help="A log flood with and without duplicate folding, sampling and rate limits")
+    limits.add_argument('--records', type=int, default=200000)
+    limits.add_argument('--dir', help="Directory to write in (default: the system temp directory)")
+    limits.set_defaults(func=bench_limits)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
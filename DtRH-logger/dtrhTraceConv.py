@@ -0,0 +1,28 @@
+#
+#   dtrhTraceConv.py - Convert DtRH binary trace ring buffers to Chrome/Perfetto trace JSON
+#
+#   Usage:
+#       python3 dtrhTraceConv.py trace.bin [-o trace.json]
+#
+#   Open the result in chrome://tracing or https://ui.perfetto.dev
+# ======================================================================================================
+
+import argparse
+import os
+from WIP import load_trace, to_chrome_trace
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a DtRH trace ring buffer to Chrome trace JSON")
+    parser.add_argument('trace', help="Trace file written by TraceRingBuffer")
+    parser.add_argument('-o', '--output', help="Output JSON path (default: <trace>.json)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.trace)[0] + '.json'
+    trace = load_trace(args.trace)
+    count = to_chrome_trace(args.trace, output)
+    print(f"{count} events written to {output} ({trace['dropped']} overwritten in the ring)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import itertools
+import os
+import sys
+
+import pytest
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dtrhLogger import BasicLogger  # noqa: E402
+
+names = itertools.count()
+
+
+@pytest.fixture
+def make_logger(tmp_path, monkeypatch):
+    # BasicLogger factory working in a temporary directory: the config file is written
+    # from the given settings (quiet, message-only records) and the log
+    # directory is created there
+    monkeypatch.chdir(tmp_path)
+    loggers = []
+
+    def make(output_file='test.log', async_mode=None, **settings):
+        config = dict({'terminal_output': False, 'format': '%(message)s'}, **settings)
+        config_file = tmp_path / 'dtrhLogger.yaml'
+        config_file.write_text(yaml.safe_dump(config))
+        logger = BasicLogger(f'test{next(names)}', config_file=str(config_file), output_file=output_file,
+                             async_mode=async_mode)
+        loggers.append(logger)
+        return logger
+
+    yield make
+    for logger in loggers:
+        logger.shutdown()
+        for handler in list(logger.logger.handlers):
+            handler.close()
+            logger.logger.removeHandler(handler)
+        logger.shared_config.close()
+
+
+@pytest.fixture
+def read_log(make_logger):
+    # Lines of a log file written by a make_logger() logger
+    def read(name='test.log'):
+        with open(os.path.join('log', name)) as f:
+            return f.read().splitlines()
+    return read
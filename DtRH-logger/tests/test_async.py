@@ -0,0 +1,92 @@
+import logging
+import sys
+import threading
+import time
+
+import pytest
+
+from dtrhLogger import AsyncLogHandler
+
+
+def test_arguments_are_merged_when_logged(make_logger, read_log):
+    logger = make_logger(async_mode=True)
+    items = [1, 2, 3]
+    logger.info("items=%s", items)
+    items.append(4)
+    logger.flush()
+    assert read_log() == ["items=[1, 2, 3]"]
+
+
+def test_exception_text_survives_the_queue():
+    class Collect(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.records = []
+
+        def emit(self, record):
+            self.records.append(record)
+
+    target = Collect()
+    handler = AsyncLogHandler([target])
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord('t', logging.ERROR, __file__, 1, "failed %d", (7,), sys.exc_info())
+    handler.handle(record)
+    handler.close()
+    queued, = target.records
+    assert queued.getMessage() == "failed 7"
+    assert queued.exc_info is None and "ValueError: boom" in queued.exc_text
+
+
+class Gate(logging.Handler):
+    # Target handler that holds the writer thread until opened
+    def __init__(self):
+        super().__init__()
+        self.opened = threading.Event()
+        self.messages = []
+
+    def emit(self, record):
+        self.opened.wait(5)
+        self.messages.append(record.getMessage())
+
+
+def fill(handler, levels, start=0):
+    for index, level in enumerate(levels, start):
+        handler.handle(logging.LogRecord('t', level, __file__, 1, "record %d", (index,), None))
+
+
+@pytest.mark.parametrize('policy, kept', [
+    ('drop_oldest', ["record 0", "record 3", "record 4"]),
+    ('drop_debug', ["record 0", "record 2", "record 4"]),
+])
+def test_overflow_policies(policy, kept):
+    gate = Gate()
+    handler = AsyncLogHandler([gate], queue_size=2, overflow_policy=policy)
+    fill(handler, [logging.INFO])
+    while handler.stats()['queued']:
+        time.sleep(0.001)  # record 0 is with the writer, which waits at the gate
+    fill(handler, [logging.DEBUG, logging.INFO, logging.DEBUG, logging.INFO], start=1)
+    gate.opened.set()
+    handler.flush()
+    stats = handler.stats()
+    handler.close()
+    assert gate.messages == kept
+    assert stats['written'] == stats['enqueued'] == len(kept)
+    assert stats['enqueued'] + stats['dropped'] == 5
+
+
+def test_blocked_producer_does_not_hold_the_handler_lock():
+    gate = Gate()
+    handler = AsyncLogHandler([gate], queue_size=1)
+    fill(handler, [logging.INFO, logging.INFO])  # One with the writer, one queued
+    blocked = threading.Thread(target=fill, args=(handler, [logging.INFO], 2))
+    blocked.start()
+    time.sleep(0.05)
+    assert blocked.is_alive()  # Waiting for room
+    assert handler.lock.acquire(timeout=1)
+    handler.lock.release()
+    gate.opened.set()
+    blocked.join(5)
+    handler.close()
+    assert gate.messages == ["record 0", "record 1", "record 2"]
@@ -0,0 +1,32 @@
+import logging
+import re
+import time
+
+import pytest
+
+from dtrhLogger import DEFAULT_DATEFMT, CustomFormatter, formatter_for
+
+
+def make_record(msg="hello %s", args=("world",)):
+    return logging.LogRecord('t', logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_matches_logging_formatter():
+    layout = "[%(asctime)s] %(levelname)-8s %(name)s: %(message)s"
+    record = make_record()
+    assert CustomFormatter(layout).format(record) == logging.Formatter(layout, DEFAULT_DATEFMT).format(record)
+
+
+@pytest.mark.parametrize('datefmt', [None, ''])
+def test_missing_datefmt_falls_back_to_the_default(datefmt):
+    record = make_record()
+    expected = time.strftime(DEFAULT_DATEFMT, time.localtime(record.created))
+    assert formatter_for("%(asctime)s", datefmt).format(record) == expected
+
+
+def test_datefmt_null_in_the_config(make_logger, read_log):
+    logger = make_logger(format="%(asctime)s %(message)s", datefmt=None)
+    logger.info("started")
+    logger.flush()
+    line, = read_log()
+    assert re.fullmatch(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d started", line)
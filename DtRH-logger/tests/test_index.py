@@ -0,0 +1,55 @@
+import logging
+import os
+
+from dtrhIndex import query_file, read_index, index_path
+
+LAYOUT = "[%(asctime)s] %(levelname)s %(message)s"
+LOG = os.path.join('log', 'test.log')
+
+
+def messages(results):
+    return [record.decode().rstrip('\n').split(' ', 3)[-1] for ms, level, logger, record in results]
+
+
+def test_query_by_level_and_text(make_logger):
+    logger = make_logger(format=LAYOUT)
+    for i in range(10):
+        logger.info("step %d", i)
+        if i % 3 == 0:
+            logger.error("failed %d", i)
+    logger.flush()
+    assert messages(query_file(LOG, min_level=logging.ERROR)) == ["failed 0", "failed 3", "failed 6", "failed 9"]
+    assert messages(query_file(LOG, contains=b"step 7")) == ["step 7"]
+    stats = {}
+    assert len(list(query_file(LOG, stats=stats))) == 14
+    assert stats['scanned_bytes'] == 0 and stats['indexed_bytes'] == os.path.getsize(LOG)
+
+
+def test_writers_sharing_a_file(make_logger):
+    first = make_logger(format=LAYOUT)
+    second = make_logger(format=LAYOUT)
+    for i in range(300):
+        first.info("first %d", i)
+        second.warn("second %d", i)
+    first.flush()
+    second.flush()
+    names, blocks, _ = read_index(index_path(LOG))
+    assert set(names.values()) == {first.logger.name, second.logger.name}
+    only_second = list(query_file(LOG, loggers={second.logger.name}))
+    assert messages(only_second) == [f"second {i}" for i in range(300)]
+    assert {logger for _, _, logger, _ in only_second} == {second.logger.name}
+    assert len(list(query_file(LOG, min_level=logging.WARNING))) == 300
+
+
+def test_unindexed_lines_are_scanned(make_logger):
+    logger = make_logger(format=LAYOUT)
+    logger.info("indexed")
+    logger.flush()
+    with open(LOG, 'a') as f:
+        f.write("[2024-07-01 12:00:00] ERROR appended\n  traceback line\n[2024-07-01 12:00:01] INFO quiet\n")
+    results = list(query_file(LOG, min_level=logging.ERROR))
+    assert [record for _, _, _, record in results] == [b"[2024-07-01 12:00:00] ERROR appended", b"  traceback line"]
+    assert all(logger is None for _, _, logger, _ in results)
+    stats = {}
+    assert messages(query_file(LOG, loggers={logger.logger.name}, stats=stats)) == ["indexed"]
+    assert stats['skipped_bytes'] > 0
@@ -0,0 +1,56 @@
+from dtrhLogger import RateLimiter
+
+
+def test_identical_records_are_written_by_default(make_logger, read_log):
+    logger = make_logger()
+    for _ in range(3):
+        logger.error("disk full")
+    logger.flush()
+    assert read_log() == ["disk full"] * 3
+
+
+def test_logger_without_limits_skips_the_limiter(make_logger, read_log, monkeypatch):
+    logger = make_logger()
+    assert not logger.limiter.active
+
+    def check(*args):
+        raise AssertionError("limiter consulted")
+    monkeypatch.setattr(logger.limiter, 'check', check)
+    logger.info("written")
+    logger.flush()
+    assert read_log() == ["written"]
+
+
+def test_folding_is_opt_in(make_logger, read_log):
+    logger = make_logger(fold_duplicates=True)
+    for _ in range(3):
+        logger.error("disk full")
+    logger.flush()
+    assert read_log() == ["disk full", "last message repeated 2 times"]
+
+
+def test_limiter_defaults():
+    assert not RateLimiter({}).active
+    assert RateLimiter({'rate_limit': {'DEBUG': {'rate': 1}}}).active
+
+
+def test_rate_limit_per_template(make_logger, read_log):
+    logger = make_logger(level='DEBUG', rate_limit={'DEBUG': {'rate': 0.001, 'burst': 3}})
+    for i in range(10):
+        logger.debug("redraw %d", i)
+        logger.info("kept %d", i)
+    logger.flush()
+    lines = read_log()
+    assert [line for line in lines if line.startswith("redraw")] == ["redraw 0", "redraw 1", "redraw 2"]
+    assert len([line for line in lines if line.startswith("kept")]) == 10
+    assert lines[-1].startswith("rate limit: suppressed 7 DEBUG records")
+    assert logger.limit_stats()['suppressed'] == 7
+
+
+def test_sampling_out_a_level(make_logger, read_log):
+    logger = make_logger(level='DEBUG', sample={'DEBUG': 0.0})
+    logger.debug("sampled out")
+    logger.info("kept")
+    logger.flush()
+    assert read_log() == ["kept"]
+    assert logger.limit_stats()['sampled_out'] == 1
@@ -0,0 +1,64 @@
+import logging
+import threading
+
+import pytest
+import yaml
+
+
+def config_threads():
+    return [thread for thread in threading.enumerate() if thread.name == 'dtrhLogger-config']
+
+
+def rewrite(logger, **settings):
+    with open(logger.config_file, 'w') as f:
+        yaml.safe_dump(dict(logger.shared_config.data, **settings), f)
+
+
+def test_no_watcher_by_default(make_logger):
+    logger = make_logger()
+    assert logger.shared_config.watcher is None
+    assert not config_threads()
+
+
+def test_watcher_can_be_turned_on(make_logger):
+    logger = make_logger()
+    other = type(logger)('watched', config_file=logger.config_file, watch=True)
+    try:
+        assert logger.shared_config.watcher is not None and logger.shared_config.watcher.is_alive()
+    finally:
+        logger.shared_config.close()
+        for handler in list(other.logger.handlers):
+            other.logger.removeHandler(handler)
+            handler.close()
+
+
+def test_reload_applies_the_level(make_logger, read_log):
+    logger = make_logger()
+    rewrite(logger, level='DEBUG')
+    logger.reload_config()
+    assert logger.logger.level == logging.DEBUG
+    logger.debug("visible")
+    logger.flush()
+    assert read_log() == ["visible"]
+
+
+@pytest.mark.parametrize('settings', [
+    {'level': 'LOUD'},
+    {'level': 'LOUD', 'format': 'changed %(message)s'},
+    {'file_writer': 'batch', 'fsync': 'often'},
+    {'file_writer': 'batch', 'flush_level': 'SEVERE'},
+    {'rate_limit': {'DEBUG': {'rate': 1}}, 'fold_interval': 'soon'},
+])
+def test_invalid_reload_keeps_the_previous_config(make_logger, read_log, settings, capsys):
+    logger = make_logger()
+    config, handlers, level = dict(logger.config), list(logger.logger.handlers), logger.logger.level
+    rewrite(logger, **settings)
+    logger.reload_config()
+    assert "could not apply" in capsys.readouterr().err
+    assert logger.config == config
+    assert logger.logger.handlers == handlers
+    assert logger.logger.level == level
+    assert not logger.limiter.active
+    logger.info("still written")
+    logger.flush()
+    assert read_log() == ["still written"]
@@ -0,0 +1,219 @@
+import importlib
+import queue
+import subprocess
+import threading
+import time
+
+INLINE = 'inline'    # Runs on the UI thread: handler(menu, item, stdscr)
+THREAD = 'thread'    # Runs on a worker thread: handler(item, job)
+PROCESS = 'process'  # Runs in a worker process: handler(item); must be importable and picklable
+RUN_MODES = (INLINE, THREAD, PROCESS)
+
+class Action:
+    def __init__(self, name, handler, run=INLINE):
+        if run not in RUN_MODES:
+            raise ValueError(f"Unknown run mode {run!r} for action {name!r}; expected one of {RUN_MODES}")
+        self.name = name
+        self.run = run
+        self._handler = handler  # Callable, or a 'module:function' string resolved on first use
+
+    @property
+    def handler(self):
+        if isinstance(self._handler, str):
+            module_name, _, function_name = self._handler.partition(':')
+            self._handler = getattr(importlib.import_module(module_name), function_name)
+        return self._handler
+
+    @property
+    def background(self):
+        return self.run != INLINE
+
+class ActionRegistry:
+    """Maps action names to handlers.
+
+    Registries can be layered: a menu's own registry holds the plugins from its
+    config and falls back to the built-in actions in `parent`.
+    """
+
+    def __init__(self, parent=None):
+        self.actions = {}
+        self.parent = parent
+
+    def register(self, name, handler=None, run=INLINE):
+        # Usable directly or as a decorator, like BasicLogger.register_handler
+        def decorator(handler):
+            self.actions[name] = Action(name, handler, run)
+            return handler
+        return decorator if handler is None else decorator(handler)
+
+    def get(self, name):
+        action = self.actions.get(name)
+        if action is None and self.parent is not None:
+            return self.parent.get(name)
+        return action
+
+    def load_plugins(self, plugins):
+        """Register actions from a config mapping.
+
+        Each entry maps an action name to "module:function" or to
+        {"handler": "module:function", "run": "thread"}. Modules are imported
+        the first time the action runs. Plugins run on a worker thread unless
+        "run" says otherwise.
+        """
+        for name, spec in plugins.items():
+            if isinstance(spec, str):
+                spec = {"handler": spec}
+            self.register(name, spec['handler'], run=spec.get('run', THREAD))
+
+class Job:
+    """One background run of an action, shared between the UI and a worker."""
+
+    def __init__(self, job_id, action, item, on_change=None):
+        self.id = job_id
+        self.action = action
+        self.item = item
+        self.label = item.get('label', action.name)
+        self.state = 'queued'  # queued, running, done, failed or cancelled
+        self.started = time.monotonic()
+        self.progress = None  # Fraction 0..1 reported by the handler, None for a spinner
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.future = None  # Set for process jobs
+        self.cancel_event = threading.Event()
+        self.cancel_callbacks = []
+        self.on_change = on_change
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def report(self, progress=None, message=None):
+        """Called by thread handlers to update the progress row."""
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+        if message is not None:
+            self.message = message
+        if self.on_change is not None:
+            self.on_change()
+
+    def on_cancel(self, callback):
+        """Run `callback` (once) when the job is cancelled, e.g. to terminate a subprocess."""
+        self.cancel_callbacks.append(callback)
+        if self.cancelled:
+            callback()
+
+    def cancel(self):
+        if self.cancelled:
+            return
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()  # Only stops process jobs that haven't started yet
+        for callback in self.cancel_callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # The handler may have finished in the meantime
+
+class ActionRunner:
+    """Runs background actions and reports finished jobs through `results`.
+
+    Thread jobs go to a small pool of daemon workers (so a stuck job never
+    blocks exit); process jobs go to a ProcessPoolExecutor created on first
+    use. Handlers cancel cooperatively: thread handlers should check
+    `job.cancelled` or register `job.on_cancel()`; a running process job
+    can't be interrupted, so its result is discarded instead.
+    """
+
+    def __init__(self, workers=4):
+        self.workers = workers
+        self.results = queue.Queue()  # Finished jobs, drained by poll() on the UI thread
+        self.pending = queue.Queue()  # Thread jobs waiting for a worker
+        self.jobs = []  # Unfinished jobs, oldest first (UI thread only)
+        self.threads = []
+        self.process_pool = None
+        self.next_id = 1
+        self.notify = None  # Called from worker threads when a job reports progress or finishes
+
+    def submit(self, action, item):
+        job = Job(self.next_id, action, item, on_change=self.changed)
+        self.next_id += 1
+        self.jobs.append(job)
+        if action.run == PROCESS:
+            if self.process_pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self.process_pool = ProcessPoolExecutor(max_workers=self.workers)
+            job.state = 'running'
+            job.future = self.process_pool.submit(action.handler, item)
+            job.future.add_done_callback(lambda future: self.process_done(job, future))
+        else:
+            if len(self.threads) < self.workers:
+                thread = threading.Thread(target=self.work, name=f"ActionWorker-{len(self.threads) + 1}", daemon=True)
+                self.threads.append(thread)
+                thread.start()
+            self.pending.put(job)
+        return job
+
+    def work(self):
+        while True:
+            job = self.pending.get()
+            if not job.cancelled:
+                job.state = 'running'
+                try:
+                    job.result = job.action.handler(job.item, job)
+                except Exception as e:
+                    job.error = e
+            self.finish(job)
+
+    def process_done(self, job, future):
+        if not future.cancelled():
+            job.error = future.exception()
+            job.result = None if job.error else future.result()
+        self.finish(job)
+
+    def finish(self, job):
+        if job.cancelled:
+            job.state = 'cancelled'
+        else:
+            job.state = 'failed' if job.error is not None else 'done'
+        self.results.put(job)
+        self.changed()
+
+    def changed(self):
+        if self.notify is not None:
+            self.notify()
+
+    def poll(self):
+        """Return jobs that finished since the last call (UI thread)."""
+        finished = []
+        while True:
+            try:
+                job = self.results.get_nowait()
+            except queue.Empty:
+                return finished
+            self.jobs.remove(job)
+            finished.append(job)
+
+    def running(self):
+        return bool(self.jobs)
+
+    def shutdown(self):
+        for job in self.jobs:
+            job.cancel()
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+
+def run_shell(item, job):
+    """Built-in 'shell' action: run item['command'], showing its latest output line as progress."""
+    process = subprocess.Popen(item['command'], shell=True, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace')
+    job.on_cancel(process.terminate)
+    last_line = ''
+    for line in process.stdout:
+        if line.strip():
+            last_line = line.strip()
+            job.report(message=last_line)
+    status = process.wait()
+    if status and not job.cancelled:
+        raise RuntimeError(f"exit status {status}: {last_line}" if last_line else f"exit status {status}")
+    return last_line
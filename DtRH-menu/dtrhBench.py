@@ -0,0 +1,358 @@
+#
+#   dtrhBench.py - Micro-benchmarks for DtRH-Menu hot paths
+#
+#   Usage:
+#       python3 dtrhBench.py keypress [--items N] [--presses N]
+#       python3 dtrhBench.py scroll [--sizes N ...] [--presses N]
+#       python3 dtrhBench.py filter [--items N] [--query TEXT]
+#       python3 dtrhBench.py validate [--items N] [--submenus N]
+#       python3 dtrhBench.py importtime [--budget-ms MS] [--runs N]
+#       python3 dtrhBench.py live [--items N] [--churn PCT] [--refreshes N]
+#
+#   Benchmarks run against a headless screen so they can be used over SSH
+#   or in CI without a terminal.
+# ======================================================================================================
+
+import argparse
+import curses
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+class HeadlessScreen:
+    # Minimal stand-in for a curses window: records nothing, draws nothing
+    def __init__(self, height=50, width=200):
+        self.height = height
+        self.width = width
+        self.writes = 0
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def addstr(self, *args):
+        self.writes += 1
+
+    def clear(self):
+        pass
+
+    def erase(self):
+        pass
+
+    def move(self, y, x):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+    def refresh(self):
+        pass
+
+    def noutrefresh(self):
+        pass
+
+    def attron(self, attr):
+        pass
+
+    def attroff(self, attr):
+        pass
+
+
+class HeadlessTheme:
+    def get_color(self, color_name):
+        return curses.A_REVERSE
+
+
+class EagerLogger:
+    # Reproduces the pre-deferral behaviour: every call builds its message
+    # string up front, whether or not DEBUG output is kept
+    def __init__(self, logger):
+        self.logger = logger
+
+    def is_enabled_for(self, level):
+        return True
+
+    def debug(self, msg, *args):
+        self.logger.debug(msg % args if args else msg)
+
+    def info(self, msg, *args):
+        self.logger.info(msg % args if args else msg)
+
+
+def build_menu(item_count):
+    from dtrhMenu import Menu
+    config = {
+        "menu_title": "Benchmark",
+        "language": "en",
+        "menu_items": [{"id": str(i), "label": f"Item {i}", "action": "none"} for i in range(item_count)]
+    }
+    menu = Menu(config)
+    menu.theme = HeadlessTheme()
+    menu.renderer.doupdate = lambda: None
+    return menu
+
+
+def time_keypresses(menu, screen, presses):
+    keys = [curses.KEY_DOWN, curses.KEY_UP]
+    menu.display(screen)  # Initial full paint is not a keypress
+    writes = screen.writes
+    start = time.perf_counter()
+    for i in range(presses):
+        menu.handle_key(keys[i % 2], screen)
+        menu.display(screen)
+    return (time.perf_counter() - start) / presses, (screen.writes - writes) / presses
+
+
+def bench_keypress(args):
+    menu = build_menu(args.items)
+    menu.logger.set_level(logging.INFO)  # DEBUG off
+    screen = HeadlessScreen()
+
+    deferred, rows = time_keypresses(menu, screen, args.presses)
+    menu.logger = EagerLogger(menu.logger)
+    eager, _ = time_keypresses(menu, screen, args.presses)
+
+    print(f"keypress ({args.items} items, DEBUG off, {args.presses} presses)")
+    print(f"  eager formatting    : {eager * 1e6:10.1f} us/keypress")
+    print(f"  deferred + gated    : {deferred * 1e6:10.1f} us/keypress")
+    print(f"  speedup             : {eager / deferred:10.1f}x")
+    print(f"  rows written        : {rows:10.1f} per keypress")
+
+
+def bench_scroll(args):
+    # Cost of moving the selection should not depend on how many items the menu has
+    print(f"scroll (DEBUG off, {args.presses} presses, starting mid-list)")
+    for count in args.sizes:
+        menu = build_menu(count)
+        menu.logger.set_level(logging.INFO)
+        screen = HeadlessScreen()
+        menu.select(count // 2)
+        menu.display(screen)
+        results = []
+        for keys in ([curses.KEY_DOWN, curses.KEY_UP], [curses.KEY_NPAGE, curses.KEY_PPAGE]):
+            start = time.perf_counter()
+            for i in range(args.presses):
+                menu.handle_key(keys[i % 2], screen)
+                menu.display(screen)
+            results.append((time.perf_counter() - start) / args.presses)
+        print(f"  {count:>9} items : up/down {results[0] * 1e6:8.1f} us   page up/down {results[1] * 1e6:8.1f} us")
+
+
+def bench_filter(args):
+    from dtrhMenu import Menu
+    from dtrhStream import LineItems
+    items = LineItems()
+    items.feed(b"".join(b"node-%07d.%s.example.net\n" % (i, b"eu" if i % 3 else b"us") for i in range(args.items)))
+    items.finish()
+
+    start = time.perf_counter()
+    menu = Menu({"menu_title": "Benchmark", "menu_items": items})
+    menu.logger.set_level(logging.INFO)
+    menu.theme = HeadlessTheme()
+    menu.renderer.doupdate = lambda: None
+    menu.indexes['main'].builder.join()
+    print(f"filter ({args.items} items, DEBUG off)")
+    print(f"  index build         : {(time.perf_counter() - start) * 1e3:10.1f} ms")
+
+    screen = HeadlessScreen()
+    menu.display(screen)
+    menu.handle_key(ord('/'), screen)
+    menu.display(screen)
+    for char in args.query:
+        start = time.perf_counter()
+        menu.handle_key(ord(char), screen)
+        menu.display(screen)
+        elapsed = time.perf_counter() - start
+        print(f"  /{menu.filter_query:<18}: {elapsed * 1e3:10.2f} ms  ({menu.filter!r})")
+    start = time.perf_counter()
+    menu.handle_key(127, screen)
+    menu.display(screen)
+    print(f"  backspace           : {(time.perf_counter() - start) * 1e3:10.2f} ms  ({menu.filter!r})")
+
+
+def bench_validate(args):
+    import jsonschema
+    from dtrhValidate import validator_for, MenuValidator
+    from schemap import menu_schema
+    submenu_ids = [f"menu_{j}" for j in range(args.submenus)]
+    config = {
+        "menu_title": "Benchmark",
+        "language": "en",
+        "menu_items": [{"id": str(i), "label": f"Item {i}", "action": "submenu", "submenu": submenu_ids[i % args.submenus]}
+                       for i in range(args.items)],
+        "submenus": {name: {"menu_title": name, "menu_items": [
+            {"label": "Volume", "action": "radio", "options": ["Low", "High"]}, {"label": "Back", "action": "back"}]}
+            for name in submenu_ids}
+    }
+
+    def best_of(function, repeat=3):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    generic = best_of(lambda: jsonschema.validate(instance=config, schema=menu_schema))
+    compile_time = best_of(lambda: MenuValidator(menu_schema))
+    validator = validator_for(menu_schema)
+    compiled = best_of(lambda: validator.validate(config))
+    print(f"validate ({args.items} items, {args.submenus} submenus)")
+    print(f"  jsonschema.validate : {generic * 1e3:10.1f} ms  (no submenu reference checks)")
+    print(f"  compile validator   : {compile_time * 1e3:10.3f} ms  (once per schema)")
+    print(f"  compiled validator  : {compiled * 1e3:10.1f} ms")
+    print(f"  speedup             : {generic / compiled:10.1f}x")
+
+
+def bench_live(args):
+    import random
+    from dtrhMenu import Menu
+    rng = random.Random(1)
+    snapshot = [{"id": i, "label": f"pid {i:7d}  cpu {rng.randint(0, 99):3d}%", "action": "none"} for i in range(args.items)]
+    menu = Menu({"menu_title": "Benchmark", "language": "en", "menu_items": [], "source": {"command": "true"}})
+    menu.logger.set_level(logging.INFO)
+    menu.theme = HeadlessTheme()
+    menu.renderer.doupdate = lambda: None
+    items = menu.menus['main']['menu_items']
+    source = menu.sources['main']
+    screen = HeadlessScreen()
+    items.apply(snapshot)
+    menu.select(args.items // 2)
+    menu.display(screen)
+
+    churn = max(1, args.items * args.churn // 100)
+    next_id = args.items
+    diff_time = commit_time = draw_time = 0.0
+    writes = screen.writes
+    for _ in range(args.refreshes):
+        # Change, remove and insert `churn` items each, like a process list between two refreshes
+        snapshot = [dict(item) for item in snapshot]
+        for index in rng.sample(range(len(snapshot)), churn):
+            snapshot[index]["label"] = f"pid {snapshot[index]['id']:7d}  cpu {rng.randint(0, 99):3d}%"
+        for index in sorted(rng.sample(range(len(snapshot)), churn), reverse=True):
+            del snapshot[index]
+        for _ in range(churn):
+            snapshot.insert(rng.randrange(len(snapshot)), {"id": next_id, "label": f"pid {next_id:7d}  cpu   0%", "action": "none"})
+            next_id += 1
+
+        # The fetch thread diffs; the UI thread only commits and redraws
+        start = time.perf_counter()
+        change = items.diff(snapshot)
+        diff_time += time.perf_counter() - start
+        source.take = lambda: change
+        start = time.perf_counter()
+        menu.apply_sources()
+        commit_time += time.perf_counter() - start
+        start = time.perf_counter()
+        menu.display(screen)
+        draw_time += time.perf_counter() - start
+
+    print(f"live ({args.items} items, {args.churn}% changed/removed/inserted per refresh, {args.refreshes} refreshes)")
+    print(f"  diff (fetch thread) : {diff_time / args.refreshes * 1e3:10.2f} ms/refresh")
+    print(f"  commit (UI thread)  : {commit_time / args.refreshes * 1e3:10.3f} ms/refresh")
+    print(f"  redraw (UI thread)  : {draw_time / args.refreshes * 1e3:10.3f} ms/refresh")
+    print(f"  rows written        : {(screen.writes - writes) / args.refreshes:10.1f} per refresh"
+          f" (of {len(menu.renderer.rows)} on screen)")
+
+
+# Heavy modules that must only be imported once their feature is used
+LAZY_MODULES = ("yaml", "rich", "jsonschema", "xml.etree.ElementTree")
+
+
+def import_profile(module, cwd):
+    # One `python -X importtime` run: {module name: cumulative microseconds}
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def bench_importtime(args):
+    # Run from an empty directory so stray side effects (log dirs, default configs) are visible
+    with tempfile.TemporaryDirectory() as cwd:
+        import_profile(args.module, cwd)  # Warm-up: writes .pyc files, fills the OS cache
+        profiles = [import_profile(args.module, cwd) for _ in range(args.runs)]
+        created = os.listdir(cwd)
+
+    total = statistics.median(profile[args.module] for profile in profiles) / 1e3
+    slowest = sorted(profiles[-1].items(), key=lambda entry: entry[1], reverse=True)[1:args.top + 1]
+    eager = [name for name in LAZY_MODULES if name in profiles[-1]]
+    print(f"importtime (import {args.module}, median of {args.runs} runs)")
+    print(f"  total               : {total:10.1f} ms  (budget {args.budget_ms} ms)")
+    for name, cumulative in slowest:
+        print(f"    {name:<24}: {cumulative / 1e3:8.1f} ms")
+
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"import took {total:.1f} ms, over the {args.budget_ms} ms budget")
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    if created:
+        failures.append(f"import created files: {', '.join(created)}")
+    for failure in failures:
+        print(f"  FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("  OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DtRH-Menu micro-benchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    keypress = subparsers.add_parser('keypress', help="Per-keypress overhead of Menu.handle_key + Menu.display")
+    keypress.add_argument('--items', type=int, default=50)
+    keypress.add_argument('--presses', type=int, default=2000)
+    keypress.set_defaults(func=bench_keypress)
+
+    scroll = subparsers.add_parser('scroll', help="Selection movement cost for growing menu sizes")
+    scroll.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 1000000])
+    scroll.add_argument('--presses', type=int, default=2000)
+    scroll.set_defaults(func=bench_scroll)
+
+    filtering = subparsers.add_parser('filter', help="Per-keystroke cost of the '/' filter")
+    filtering.add_argument('--items', type=int, default=1000000)
+    filtering.add_argument('--query', default="node-00421")
+    filtering.set_defaults(func=bench_filter)
+
+    validating = subparsers.add_parser('validate', help="Config validation: jsonschema vs the compiled validator")
+    validating.add_argument('--items', type=int, default=100000)
+    validating.add_argument('--submenus', type=int, default=100)
+    validating.set_defaults(func=bench_validate)
+
+    importtime = subparsers.add_parser('importtime', help="Import-time budget check (exits 1 on regression)")
+    importtime.add_argument('--module', default="dtrhMenu")
+    importtime.add_argument('--budget-ms', type=float, default=120.0)
+    importtime.add_argument('--runs', type=int, default=5)
+    importtime.add_argument('--top', type=int, default=8)
+    importtime.set_defaults(func=bench_importtime)
+
+    live = subparsers.add_parser('live', help="Refresh cost of a live (source-backed) menu")
+    live.add_argument('--items', type=int, default=100000)
+    live.add_argument('--churn', type=int, default=1, help="Percent of items changed, removed and inserted per refresh")
+    live.add_argument('--refreshes', type=int, default=20)
+    live.set_defaults(func=bench_live)
+
+    args = parser.parse_args()
+    # Menus create their logger's dtrhLogger.yaml and log directory in the working directory
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='dtrhBench-') as cwd:
+        os.chdir(cwd)
+        try:
+            args.func(args)
+        finally:
+            os.chdir(previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,546 @@
+#
+#   dtrhCollector.py - Log collector daemon: one writer for log files shared by several processes
+#
+#   Usage:
+#       python3 dtrhCollector.py serve [--socket PATH] [--report SECONDS] [--no-index]
+#       python3 dtrhCollector.py stats [--socket PATH]
+#
+#   Processes that log to the same file (several dtrhMenu instances, scripts)
+#   send their records to the collector over a Unix domain socket instead of
+#   each appending to the file: the collector appends every received batch
+#   with one write and keeps the file's dtrhIndex sidecar. Clients use
+#   CollectorHandler (`file_writer: collector` in dtrhLogger.yaml), which
+#   buffers records, sends them from a background thread and appends them to
+#   the file itself while the collector can't be reached.
+#
+#   Wire format: every frame is a 4-byte little-endian length and a payload.
+#   A connection starts with a JSON hello, {"client": ..., "pid": ...}, or
+#   {"command": "stats"}, which is answered with one JSON frame. Every other
+#   frame is a batch for one file: a BATCH header and the UTF-8 path, then for
+#   each record a RECORD header, the logger name and the formatted bytes.
+#   The socket is created mode 0600: clients choose which files it writes.
+# ======================================================================================================
+
+import collections
+import json
+import logging
+import os
+import selectors
+import socket
+import struct
+import sys
+import threading
+import time
+
+FRAME = struct.Struct('<I')  # Payload length
+BATCH = struct.Struct('<HI')  # Path length, record count
+RECORD = struct.Struct('<dBHI')  # Created, level, logger name length, data length
+MAX_FRAME = 64 * 1024 * 1024
+IndexedRecord = collections.namedtuple('IndexedRecord', 'created levelno name')  # What LogIndexWriter.add() reads
+
+
+def default_socket_path():
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime and os.path.isdir(runtime):
+        return os.path.join(runtime, 'dtrhLogger.sock')
+    return os.path.join('/tmp', f'dtrhLogger-{os.getuid()}.sock')
+
+
+def encode_batch(path, records):
+    """Frame (created, level, logger name, data) records for `path`."""
+    encoded_path = path.encode('utf-8')
+    parts = [b'', BATCH.pack(len(encoded_path), len(records)), encoded_path]
+    names = {}
+    for created, level, name, data in records:
+        encoded_name = names.get(name)
+        if encoded_name is None:
+            encoded_name = names[name] = name.encode('utf-8')
+        parts += (RECORD.pack(created, min(level, 255), len(encoded_name), len(data)), encoded_name, data)
+    parts[0] = FRAME.pack(sum(map(len, parts)))
+    return b''.join(parts)
+
+
+def decode_batch(payload):
+    """Inverse of encode_batch() for one frame payload: (path, records)."""
+    path_length, count = BATCH.unpack_from(payload)
+    position = BATCH.size + path_length
+    path = payload[BATCH.size:position].decode('utf-8')
+    records = []
+    names = {}
+    for _ in range(count):
+        created, level, name_length, data_length = RECORD.unpack_from(payload, position)
+        position += RECORD.size
+        encoded_name = payload[position:position + name_length]
+        name = names.get(encoded_name)
+        if name is None:
+            name = names[encoded_name] = encoded_name.decode('utf-8', 'replace')
+        position += name_length
+        records.append((created, level, name, payload[position:position + data_length]))
+        position += data_length
+    return path, records
+
+
+def send_json(sock, message):
+    payload = json.dumps(message).encode('utf-8')
+    sock.sendall(FRAME.pack(len(payload)) + payload)
+
+
+def receive_frame(sock):
+    # Blocking read of one frame (stats client)
+    data = b''
+    while len(data) < FRAME.size or len(data) < FRAME.size + FRAME.unpack_from(data)[0]:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError("collector closed the connection")
+        data += chunk
+    return data[FRAME.size:FRAME.size + FRAME.unpack_from(data)[0]]
+
+
+def append_all(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+class CollectorHandler(logging.Handler):
+    """Sends the records for `filename` to the collector daemon.
+
+    emit() only formats the record and appends it to a local buffer. A
+    sender thread ships the buffer as one frame every `batch_interval`
+    seconds, once `batch_records` records are waiting, and right away for
+    records at `flush_level` and above; flush() and close() send what is
+    left. While the collector can't be reached (a reconnect is tried at most
+    every `retry_interval` seconds) batches are appended to the file directly,
+    outside the index. If `max_buffered` records pile up, the oldest are
+    dropped and counted.
+    """
+
+    terminator = '\n'
+
+    def __init__(self, filename, socket_path=None, batch_interval=0.2, batch_records=1000, flush_level=logging.ERROR,
+                 retry_interval=5.0, max_buffered=100000, send_timeout=2.0, client=None, encoding='utf-8'):
+        super().__init__()
+        level = logging.getLevelName(flush_level.upper()) if isinstance(flush_level, str) else flush_level
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown flush level: {flush_level}")
+        self.baseFilename = os.path.abspath(filename)
+        self.socket_path = socket_path or default_socket_path()
+        self.batch_interval = batch_interval
+        self.batch_records = batch_records
+        self.flush_level = level
+        self.retry_interval = retry_interval
+        self.send_timeout = send_timeout
+        self.client = client or f"{os.path.basename(sys.argv[0]) or 'python'}[{os.getpid()}]"
+        self.encoding = encoding
+        # The sender thread never takes the handler lock: logging.shutdown() holds it while
+        # calling close(), which waits for the sender
+        self.buffer = collections.deque(maxlen=max_buffered)
+        self.send_lock = threading.Lock()  # Keeps batches in order between the sender and flush()
+        self.sock = None
+        self.retry_at = 0.0
+        self.counters = collections.Counter()
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.sender = threading.Thread(target=self.send_periodically, name='dtrhLogger-collector', daemon=True)
+        self.sender.start()
+
+    def emit(self, record):
+        try:
+            data = (self.format(record) + self.terminator).encode(self.encoding)
+            if len(self.buffer) == self.buffer.maxlen:
+                self.counters['dropped'] += 1  # append() pushes out the oldest record
+            self.buffer.append((record.created, record.levelno, record.name, data))
+            if record.levelno >= self.flush_level or len(self.buffer) >= self.batch_records:
+                self.wakeup.set()
+        except Exception:
+            self.handleError(record)
+
+    def send_periodically(self):
+        while not self.stop_event.is_set():
+            self.wakeup.wait(self.batch_interval)
+            self.wakeup.clear()
+            try:
+                self.send_pending()
+            except OSError as e:
+                sys.stderr.write(f"dtrhLogger: could not write {self.baseFilename}: {e}\n")
+
+    def send_pending(self):
+        with self.send_lock:
+            batch = []
+            try:
+                while True:
+                    batch.append(self.buffer.popleft())
+            except IndexError:
+                pass
+            if not batch:
+                return
+            if self.send(encode_batch(self.baseFilename, batch)):
+                self.counters['sent'] += len(batch)
+                self.counters['frames'] += 1
+            else:
+                self.write_direct(batch)
+
+    def connect(self):
+        if self.sock is None and time.monotonic() >= self.retry_at:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.send_timeout)
+            try:
+                sock.connect(self.socket_path)
+                send_json(sock, {"client": self.client, "pid": os.getpid()})
+            except OSError:
+                sock.close()
+                self.retry_at = time.monotonic() + self.retry_interval
+                return None
+            self.sock = sock
+            self.counters['connects'] += 1
+        return self.sock
+
+    def send(self, frame):
+        sock = self.connect()
+        if sock is None:
+            return False
+        try:
+            sock.sendall(frame)
+        except OSError:
+            # A partly sent frame is dropped by the collector, so the whole batch goes to the file
+            sock.close()
+            self.sock = None
+            self.retry_at = time.monotonic() + self.retry_interval
+            return False
+        return True
+
+    def write_direct(self, batch):
+        fd = os.open(self.baseFilename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            append_all(fd, b''.join(record[3] for record in batch))
+        finally:
+            os.close(fd)
+        self.counters['direct'] += len(batch)
+
+    def flush(self):
+        self.send_pending()
+
+    def close(self):
+        self.stop_event.set()
+        self.wakeup.set()
+        self.sender.join()
+        try:
+            self.send_pending()
+        finally:
+            with self.send_lock:
+                if self.sock is not None:
+                    self.sock.close()
+                    self.sock = None
+            super().close()
+
+    def stats(self):
+        return {
+            "sent": self.counters['sent'],
+            "frames": self.counters['frames'],
+            "direct": self.counters['direct'],
+            "dropped": self.counters['dropped'],
+            "connects": self.counters['connects'],
+            "connected": self.sock is not None,
+            "buffered": len(self.buffer)
+        }
+
+
+class Client:
+    # One connection to the collector
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = bytearray()
+        self.name = None
+        self.pid = None
+        self.connected = time.monotonic()
+        self.records = 0
+        self.bytes = 0
+        self.frames = 0
+        self.reported = (self.connected, 0, 0)  # Time, records and bytes at the last report
+
+
+class Collector:
+    """Single writer for the log files its clients send records for.
+
+    One thread multiplexes the listening socket and every client with
+    `selectors`. Each batch frame is appended to its file with one write,
+    and (unless index=False) entered in the file's dtrhIndex sidecar, which
+    is flushed once a second. Files unused for `idle_close` seconds are
+    closed, so yesterday's dated log doesn't stay open.
+    """
+
+    def __init__(self, socket_path=None, index=True, report_interval=None, idle_close=60.0):
+        self.socket_path = socket_path or default_socket_path()
+        self.index = index
+        self.report_interval = report_interval
+        self.idle_close = idle_close
+        self.selector = selectors.DefaultSelector()
+        self.listener = None
+        self.clients = {}  # Socket -> Client
+        self.files = {}  # Path -> [fd, LogIndexWriter or None, last write (monotonic)]
+        self.totals = collections.Counter()  # Records, bytes and frames of disconnected clients
+        self.running = False
+        self.started = time.monotonic()
+
+    def listen(self):
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except OSError:
+                os.remove(self.socket_path)  # Left behind by a collector that didn't exit cleanly
+            else:
+                raise RuntimeError(f"A collector is already listening on {self.socket_path}")
+            finally:
+                probe.close()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        listener.listen(64)
+        listener.setblocking(False)
+        self.selector.register(listener, selectors.EVENT_READ)
+        self.listener = listener
+
+    def serve_forever(self):
+        if self.listener is None:
+            self.listen()
+        self.running = True
+        next_tick = time.monotonic() + 1.0
+        next_report = time.monotonic() + self.report_interval if self.report_interval else None
+        try:
+            while self.running:
+                for key, _ in self.selector.select(timeout=max(0.0, next_tick - time.monotonic())):
+                    if key.fileobj is self.listener:
+                        self.accept()
+                    else:
+                        self.read(self.clients[key.fileobj])
+                now = time.monotonic()
+                if now >= next_tick:
+                    self.tick(now)
+                    next_tick = now + 1.0
+                if next_report is not None and now >= next_report:
+                    self.report(now)
+                    next_report = now + self.report_interval
+        finally:
+            self.close()
+
+    def stop(self):
+        self.running = False  # Picked up within a second (signal handlers, other threads)
+
+    def accept(self):
+        try:
+            sock, _ = self.listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        self.clients[sock] = Client(sock)
+        self.selector.register(sock, selectors.EVENT_READ)
+
+    def read(self, client):
+        try:
+            data = client.sock.recv(262144)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self.disconnect(client)
+            return
+        buffer = client.buffer
+        buffer += data
+        position = 0
+        while len(buffer) - position >= FRAME.size:
+            length = FRAME.unpack_from(buffer, position)[0]
+            if length > MAX_FRAME:
+                self.disconnect(client)
+                return
+            end = position + FRAME.size + length
+            if end > len(buffer):
+                break
+            if not self.handle_frame(client, bytes(buffer[position + FRAME.size:end])):
+                return
+            position = end
+        del buffer[:position]
+
+    def handle_frame(self, client, payload):
+        # Returns False once the client has been disconnected
+        if client.name is None:
+            try:
+                hello = json.loads(payload)
+            except ValueError:
+                self.disconnect(client)
+                return False
+            if hello.get('command') == 'stats':
+                try:
+                    client.sock.setblocking(True)
+                    send_json(client.sock, self.stats())
+                except OSError:
+                    pass
+                self.disconnect(client, count=False)
+                return False
+            client.name = str(hello.get('client', 'unknown'))
+            client.pid = hello.get('pid')
+            return True
+        try:
+            path, records = decode_batch(payload)
+        except (struct.error, UnicodeDecodeError):
+            self.disconnect(client)
+            return False
+        try:
+            written = self.write(path, records)
+        except OSError as e:
+            sys.stderr.write(f"dtrhCollector: could not write {path}: {e}\n")
+            return True
+        client.records += len(records)
+        client.bytes += written
+        client.frames += 1
+        return True
+
+    def write(self, path, records):
+        entry = self.files.get(path)
+        if entry is None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            index = None
+            if self.index:
+                from dtrhIndex import LogIndexWriter
+                index = LogIndexWriter(path)
+            entry = self.files[path] = [fd, index, 0.0]
+        fd, index, _ = entry
+        data = b''.join(record[3] for record in records)
+        append_all(fd, data)
+        if index is not None:
+            # Where the batch landed: a client that couldn't reach us may append meanwhile
+            from dtrhIndex import appended_at
+            offset = appended_at(fd, len(data))
+            for created, level, name, record_data in records:
+                index.add(offset, len(record_data), IndexedRecord(created, level, name))
+                offset += len(record_data)
+        entry[2] = time.monotonic()
+        return len(data)
+
+    def tick(self, now):
+        for path, (fd, index, last_write) in list(self.files.items()):
+            if index is not None:
+                index.flush()
+            if now - last_write >= self.idle_close:
+                self.close_file(path)
+
+    def close_file(self, path):
+        fd, index, _ = self.files.pop(path)
+        if index is not None:
+            index.close()
+        os.close(fd)
+
+    def disconnect(self, client, count=True):
+        self.selector.unregister(client.sock)
+        client.sock.close()
+        del self.clients[client.sock]
+        if count:
+            self.totals.update(records=client.records, bytes=client.bytes, frames=client.frames)
+
+    def client_stats(self, client, now):
+        elapsed = max(now - client.connected, 1e-9)
+        return {
+            "client": client.name,
+            "pid": client.pid,
+            "connected_s": round(elapsed, 1),
+            "records": client.records,
+            "bytes": client.bytes,
+            "frames": client.frames,
+            "records_per_s": round(client.records / elapsed, 1),
+            "bytes_per_s": round(client.bytes / elapsed, 1)
+        }
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "uptime_s": round(now - self.started, 1),
+            "open_files": sorted(self.files),
+            "clients": [self.client_stats(client, now) for client in self.clients.values() if client.name is not None],
+            "disconnected": dict(self.totals)
+        }
+
+    def report(self, now):
+        # Per-client throughput since the previous report
+        for client in self.clients.values():
+            if client.name is None:
+                continue
+            since, records, written = client.reported
+            elapsed = max(now - since, 1e-9)
+            sys.stderr.write(f"dtrhCollector: {client.name}: {(client.records - records) / elapsed:,.0f} records/s, "
+                             f"{(client.bytes - written) / elapsed / 1024:,.1f} KiB/s ({client.records:,} records)\n")
+            client.reported = (now, client.records, client.bytes)
+
+    def close(self):
+        for client in list(self.clients.values()):
+            self.disconnect(client)
+        for path in list(self.files):
+            self.close_file(path)
+        if self.listener is not None:
+            self.selector.unregister(self.listener)
+            self.listener.close()
+            self.listener = None
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+        self.selector.close()
+
+
+def serve(args):
+    import signal
+    collector = Collector(args.socket, index=not args.no_index, report_interval=args.report)
+    try:
+        collector.listen()
+    except (RuntimeError, OSError) as e:
+        sys.exit(f"dtrhCollector: {e}")
+    signal.signal(signal.SIGTERM, lambda signum, frame: collector.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: collector.stop())
+    print(f"dtrhCollector: listening on {collector.socket_path}", file=sys.stderr)
+    collector.serve_forever()
+
+
+def show_stats(args):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(5.0)
+    try:
+        sock.connect(args.socket or default_socket_path())
+        send_json(sock, {"command": "stats"})
+        stats = json.loads(receive_frame(sock))
+    except OSError as e:
+        sys.exit(f"dtrhCollector: no collector on {args.socket or default_socket_path()}: {e}")
+    finally:
+        sock.close()
+    print(f"uptime {stats['uptime_s']}s, {len(stats['open_files'])} open files")
+    for client in stats['clients']:
+        print(f"  {client['client']:<30} {client['records_per_s']:>10,.0f} records/s {client['bytes_per_s'] / 1024:>10,.1f} KiB/s"
+              f"  {client['records']:>12,} records in {client['frames']:,} frames")
+    if stats['disconnected']:
+        print(f"  disconnected clients: {stats['disconnected'].get('records', 0):,} records")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Collector daemon for DtRH-Logger files shared by several processes")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Run the collector in the foreground")
+    serve_parser.add_argument('--socket', help=f"Unix socket path (default: {default_socket_path()})")
+    serve_parser.add_argument('--report', type=float, help="Print per-client throughput every N seconds")
+    serve_parser.add_argument('--no-index', action='store_true', help="Don't maintain dtrhIndex sidecars")
+    serve_parser.set_defaults(func=serve)
+
+    stats_parser = subparsers.add_parser('stats', help="Show per-client throughput of a running collector")
+    stats_parser.add_argument('--socket')
+    stats_parser.set_defaults(func=show_stats)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import curses
+import heapq
+import os
+import selectors
+import signal
+import time
+
+class EventLoop:
+    """Selector-based loop for a curses UI.
+
+    Multiplexes keyboard input, timers and wake-ups from background producers
+    (any thread may call wake()). Everything that arrives between two frames
+    is handled first and then drawn once: bursts of keys, resize events and
+    producer updates are coalesced into a single frame, and frames are capped
+    at `max_fps`.
+
+    The UI object passed to run() provides handle_key(key, stdscr),
+    handle_events(), idle() -> bool (True while it has more background work),
+    display(stdscr) and a `data_changed` flag. handle_key() may read keys
+    itself, but only for the keys in `inline_keys`.
+    """
+
+    inline_keys = (curses.KEY_ENTER, 10, 13)  # Keys whose handler may read further keys itself
+
+    def __init__(self, stdscr, max_fps=60, input_fd=0):
+        self.stdscr = stdscr
+        self.frame_interval = 1.0 / max_fps
+        self.input_fd = input_fd  # curses reads keys from fd 0 (the terminal, even when STDIN was piped)
+        self.selector = selectors.DefaultSelector()
+        self.wake_read, self.wake_write = os.pipe()
+        os.set_blocking(self.wake_read, False)
+        os.set_blocking(self.wake_write, False)
+        self.woken = False
+        self.resize_pending = False
+        self.timers = []  # Heap of (deadline, sequence, callback)
+        self.timer_sequence = 0
+        self.last_frame = 0.0
+        self.stats = {"wakes": 0, "keys": 0, "resizes": 0, "frames": 0}
+
+    def wake(self):
+        """Thread-safe: make the loop call handle_events() and redraw if needed."""
+        wake_write = self.wake_write
+        if wake_write is None:
+            return
+        try:
+            os.write(wake_write, b'\0')
+        except OSError:
+            pass  # Pipe already full (a wake-up is pending anyway) or loop closed
+
+    def call_later(self, delay, callback):
+        """Run `callback()` on the loop after `delay` seconds (loop thread only)."""
+        self.timer_sequence += 1
+        heapq.heappush(self.timers, (time.monotonic() + delay, self.timer_sequence, callback))
+
+    def on_resize(self, signum, frame):
+        self.resize_pending = True
+        self.wake()
+
+    def run(self, ui):
+        self.selector.register(self.input_fd, selectors.EVENT_READ, 'input')
+        self.selector.register(self.wake_read, selectors.EVENT_READ, 'wake')
+        installed = False
+        try:
+            # Our own SIGWINCH handler turns resizes into wake-ups, so select() notices them
+            previous_handler = signal.signal(signal.SIGWINCH, self.on_resize)
+            installed = True
+        except (ValueError, AttributeError):
+            pass  # Not on the main thread, or no SIGWINCH on this platform: rely on KEY_RESIZE
+        try:
+            self.loop(ui)
+        finally:
+            if installed:
+                # None means curses' own C handler, which can't be reinstalled from Python
+                signal.signal(signal.SIGWINCH, previous_handler if previous_handler is not None else signal.SIG_DFL)
+            self.selector.close()
+            wake_read, wake_write = self.wake_read, self.wake_write
+            self.wake_write = None  # Late wake() calls from producer threads become no-ops
+            os.close(wake_read)
+            os.close(wake_write)
+
+    def loop(self, ui):
+        idle_work = False
+        while True:
+            now = time.monotonic()
+            if idle_work:
+                timeout = 0  # Keep doing background work, but look at input first
+            else:
+                deadlines = [self.timers[0][0]] if self.timers else []
+                if ui.data_changed:
+                    deadlines.append(self.last_frame + self.frame_interval)
+                timeout = max(0.0, min(deadlines) - now) if deadlines else None
+
+            for key, _ in self.selector.select(timeout):
+                if key.data == 'wake':
+                    self.drain_wake_pipe()
+                else:
+                    self.read_keys(ui)
+
+            if self.resize_pending:
+                self.apply_resize(ui)
+            self.run_timers()
+            if self.woken:
+                self.woken = False
+                self.stats["wakes"] += 1
+                ui.handle_events()
+            idle_work = ui.idle()
+
+            if ui.data_changed and time.monotonic() - self.last_frame >= self.frame_interval:
+                ui.display(self.stdscr)
+                self.last_frame = time.monotonic()
+                self.stats["frames"] += 1
+
+    def drain_wake_pipe(self):
+        try:
+            while os.read(self.wake_read, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        self.woken = True
+
+    def read_keys(self, ui):
+        # Take everything that is buffered, then dispatch with blocking input restored,
+        # since inline handlers (input and option screens) read keys themselves. Reading
+        # stops after a key that may open one, so the keys typed after it go to that screen;
+        # the rest is picked up once it returns (curses may hold it where select() can't see it)
+        more = True
+        while more:
+            more = False
+            self.stdscr.nodelay(True)
+            keys = []
+            try:
+                while True:
+                    key = self.stdscr.getch()
+                    if key == -1:
+                        break
+                    keys.append(key)
+                    if key in self.inline_keys:
+                        more = True
+                        break
+            finally:
+                self.stdscr.nodelay(False)
+            for key in keys:
+                if key == curses.KEY_RESIZE:
+                    self.resize_pending = True  # However many arrived, handled once below
+                    continue
+                self.stats["keys"] += 1
+                ui.handle_key(key, self.stdscr)
+
+    def apply_resize(self, ui):
+        self.resize_pending = False
+        self.stats["resizes"] += 1
+        try:
+            size = os.get_terminal_size(self.input_fd)
+            if hasattr(curses, 'resizeterm') and (size.lines, size.columns) != self.stdscr.getmaxyx():
+                curses.resizeterm(size.lines, size.columns)
+        except (OSError, curses.error):
+            pass
+        ui.handle_key(curses.KEY_RESIZE, self.stdscr)
+
+    def run_timers(self):
+        now = time.monotonic()
+        while self.timers and self.timers[0][0] <= now:
+            _, _, callback = heapq.heappop(self.timers)
+            callback()
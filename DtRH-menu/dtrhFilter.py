@@ -0,0 +1,151 @@
+import re
+import threading
+import time
+from array import array
+
+NONZERO_BYTE = re.compile(rb'[^\x00]')
+BIT_TABLE = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+FLAG_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+def iter_bits(mask):
+    """Yield the positions of the set bits in `mask`, lowest first."""
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+    for match in NONZERO_BYTE.finditer(data):  # Skips empty bytes at C speed
+        index = match.start()
+        base = index * 8
+        for bit in BIT_TABLE[data[index]]:
+            yield base + bit
+
+class ItemIndex:
+    """Character index over menu item labels.
+
+    For every character seen, keeps a bitmask (a Python int) of the items whose
+    lowercased label contains it. Intersecting those masks narrows a query down
+    to candidate items without touching the items themselves. The index is
+    built in chunks and can keep up with items that are still streaming in;
+    items beyond `count` are not indexed yet and are always candidates.
+    """
+
+    chunk_size = 1 << 15
+
+    def __init__(self, items):
+        self.items = items
+        self.masks = {}  # character -> bitmask of items containing it
+        self.count = 0  # Items indexed so far
+        self.builder = None
+
+    def catch_up(self, limit=None):
+        """Index items added since the last call; returns True once every item is indexed."""
+        total = len(self.items)
+        end = total if limit is None else min(total, self.count + limit)
+        while self.count < end:
+            start = self.count
+            stop = min(end, start + self.chunk_size)
+            labels = [self.items[index]['label'].lower() for index in range(start, stop)]
+            for char in set(''.join(labels)):
+                # One byte per item, reversed so item `start` lands on the lowest bit, then parsed as base 2
+                flags = bytes([char in label for label in labels])[::-1].translate(FLAG_DIGITS)
+                self.masks[char] = self.masks.get(char, 0) | (int(flags, 2) << start)
+            self.count = stop  # Published after the masks so readers never miss an item
+        return self.count == len(self.items) and getattr(self.items, 'complete', True)
+
+    def build_in_background(self):
+        def build():
+            while not self.catch_up():
+                time.sleep(0.05)  # Waiting for streamed items
+        self.builder = threading.Thread(target=build, name='ItemIndex', daemon=True)
+        self.builder.start()
+
+    def candidates(self, query, within=None, start=0, stop=None):
+        """Bitmask of the items in [start, stop) that may match `query` (a superset of the real matches)."""
+        indexed = self.count
+        stop = len(self.items) if stop is None else stop
+        span = ((1 << stop) - 1) >> start << start
+        mask = span & ((1 << indexed) - 1)
+        for char in set(query):
+            mask &= self.masks.get(char, 0)
+        mask |= span >> indexed << indexed  # Unindexed items can't be ruled out
+        return mask if within is None else mask & within
+
+class FilteredItems:
+    """Lazy view of the items matching a filter query.
+
+    An item matches when the query is a case-insensitive subsequence of its
+    label (which includes plain substrings). Candidates come from the index,
+    or from the previous result when the query only grew, and are verified on
+    demand: a keystroke verifies just enough for the visible page and advance()
+    continues in bounded batches while the menu is idle. Items that stream in
+    after the query was typed are picked up by advance() as well. Until every
+    candidate is verified and the source is complete, `complete` is False and
+    len() is the number of matches found so far.
+    """
+
+    verify_budget = 20000  # Candidates checked per advance() call
+
+    def __init__(self, items, index, query, previous=None):
+        self.items = items
+        self.index = index
+        self.query = query.lower()
+        self.pattern = re.compile('.*?'.join(map(re.escape, self.query)))
+        self.matches = array('Q')
+        self.complete = False
+        self.covered = 0  # Items the candidates were taken from; advance() adds items streamed in later
+        self.pending = iter(())
+        refine = previous is not None and self.query.startswith(previous.query)
+        if refine and previous.complete:
+            # Refine the previous result set instead of going back to the index
+            self.mask = None
+            self.pending = iter(previous.matches.tolist())
+            self.covered = previous.covered
+        elif refine and previous.mask is not None:
+            self.mask = index.candidates(self.query, previous.mask, stop=previous.covered)
+            self.pending = iter_bits(self.mask)
+            self.covered = previous.covered
+        else:
+            self.mask = 0
+
+    def __len__(self):
+        return len(self.matches)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.matches)
+        return self.items[self.matches[index]]
+
+    def __repr__(self):
+        return f"<FilteredItems /{self.query} {len(self.matches)} matches{'' if self.complete else '+'}>"
+
+    def advance(self, wanted=None, budget=None):
+        """Verify more candidates until `wanted` matches are known or the budget is spent.
+
+        Returns True while candidates are left to check, False once the result
+        is complete or has caught up with items that are still streaming in.
+        """
+        budget = budget or self.verify_budget
+        search = self.pattern.search
+        items = self.items
+        matches = self.matches
+        while True:
+            for index in self.pending:
+                try:
+                    label = items[index]['label']
+                except IndexError:
+                    continue  # Dropped by the source when it finished (trailing blank lines)
+                if search(label.lower()):
+                    matches.append(index)
+                    if wanted is not None and len(matches) >= wanted:
+                        return True
+                budget -= 1
+                if budget <= 0:
+                    return True
+            source_complete = getattr(items, 'complete', True)  # Read before len(): once set, no more items arrive
+            total = len(items)
+            if total <= self.covered:
+                self.complete = source_complete
+                return False
+            # Items arrived since the candidates were taken
+            extension = self.index.candidates(self.query, start=self.covered, stop=total)
+            if self.mask is not None:
+                self.mask |= extension
+            self.pending = iter_bits(extension)
+            self.covered = total
@@ -0,0 +1,520 @@
+#
+#   dtrhIndex.py - Sidecar time/level index for DtRH log files, and a query command
+#
+#   Usage:
+#       python3 dtrhIndex.py query LOG_OR_DIR [...] [--since TIME] [--until TIME]
+#                                   [--level LEVEL] [--logger NAME] [--grep TEXT] [--count]
+#       python3 dtrhIndex.py status LOG [LOG ...]
+#
+#   Every indexed log file has a <log>.idx sidecar (a compressed segment
+#   X.gz keeps X.idx) holding the byte range, time, level and logger of each
+#   record, grouped into blocks. A query reads the block headers, decodes
+#   only the blocks that overlap the time range and level, and then reads
+#   just the matching records from the log. Log ranges the index doesn't
+#   cover (a crash before the last block was written, or a writer without
+#   an index) are scanned line by line instead.
+# ======================================================================================================
+
+import logging
+import os
+import re
+import struct
+import sys
+import time
+
+try:
+    import fcntl
+except ImportError:  # No flock: one writer per sidecar
+    fcntl = None
+
+INDEX_SUFFIX = '.idx'
+INDEX_MAGIC = b'DTRHIDX2'
+BLOCK_TAG = b'B'
+NAME_TAG = b'N'
+# first ms, last ms, start offset, end offset, records, level mask, payload bytes
+BLOCK = struct.Struct('<qqQQIII')
+# bytes since the previous record's end (other writers' records), record length,
+# ms after the block's first record, logger id, level
+ENTRY = struct.Struct('<IIIHB')
+pack_entry = ENTRY.pack
+NAME = struct.Struct('<HH')  # logger id, name length; followed by the UTF-8 name
+MAX_LOGGER_ID = 0xFFFF
+MAX_GAP = 0xFFFFFFFF
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz')
+# What a scan can read from an unindexed line: an asctime-style timestamp near the
+# start (optionally with ,mmm or .mmm) and a level name in the line's prefix
+LINE_TIME = re.compile(rb'(\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d)(?:[,.](\d{1,3}))?')
+LINE_LEVEL = re.compile(rb'\b(DEBUG|INFO|WARNING|WARN|ERROR|CRITICAL|FATAL)\b')
+LINE_PREFIX = 100  # Bytes of a line searched for its timestamp and level
+
+
+def index_path(log_path):
+    # A compressed segment keeps the sidecar its uncompressed file had
+    base, ext = os.path.splitext(log_path)
+    return (base if ext in COMPRESSED_SUFFIXES else log_path) + INDEX_SUFFIX
+
+
+def level_bit(levelno):
+    return 1 << min(levelno // 10, 31)
+
+
+def appended_at(fd, length):
+    # Where the last `length` bytes written through an O_APPEND descriptor landed. The
+    # descriptor's own position is the end of that write, whatever other processes
+    # appended before or since.
+    return os.lseek(fd, 0, os.SEEK_CUR) - length
+
+
+def parse_chunks(data, position, names, blocks=None):
+    # Parse the chunks in data[position:] into `names` (and `blocks`); returns where
+    # the intact part ends, so a torn chunk at the end is left out
+    valid = position
+    while position < len(data):
+        tag = data[position:position + 1]
+        position += 1
+        if tag == NAME_TAG and position + NAME.size <= len(data):
+            logger_id, length = NAME.unpack_from(data, position)
+            position += NAME.size
+            if position + length > len(data):
+                break
+            names[logger_id] = data[position:position + length].decode('utf-8', 'replace')
+            position += length
+        elif tag == BLOCK_TAG and position + BLOCK.size <= len(data):
+            header = BLOCK.unpack_from(data, position)
+            position += BLOCK.size
+            if position + header[6] > len(data):
+                break
+            if blocks is not None:
+                blocks.append((header, data[position:position + header[6]]))
+            position += header[6]
+        else:
+            break
+        valid = position
+    return valid
+
+
+def read_index(path):
+    """Parse a sidecar into ({logger id: name}, [(header, payload)], valid length).
+
+    A torn write at the end (the writer was killed mid-block) ends the parse;
+    `valid length` is where the intact part stops.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(INDEX_MAGIC):
+        raise ValueError(f"{path} is not a DtRH log index")
+    names, blocks = {}, []
+    valid = parse_chunks(data, len(INDEX_MAGIC), names, blocks)
+    return names, blocks, valid
+
+
+class LogIndexWriter:
+    """Appends index blocks for a log file as records are written.
+
+    Handlers call add(offset, length, record) with the byte range each record
+    occupies, under their own lock. Records are grouped into blocks of up to
+    `block_records` records spanning at most `block_seconds`; each block is
+    appended to the sidecar in one write when it closes, and on flush() and
+    close(). Reopening continues an existing sidecar.
+
+    Several processes may index the same log: the sidecar is opened O_APPEND and
+    every append holds an flock on it, after reading the chunks other writers
+    added since, so logger ids stay shared. A block skips over records it doesn't
+    own, which are in the other writers' blocks.
+    """
+
+    def __init__(self, log_path, block_records=256, block_seconds=60):
+        self.path = index_path(log_path)
+        self.block_records = block_records
+        self.block_ms = int(block_seconds * 1000)
+        self.names = {}  # Logger name -> id, for every writer of the sidecar
+        self.fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self.known = 0  # Sidecar bytes parsed so far
+        self.lock()
+        try:
+            data = self.read_from(0)
+            if not data.startswith(INDEX_MAGIC):
+                os.ftruncate(self.fd, 0)  # Empty, or an older format: start over
+                os.write(self.fd, INDEX_MAGIC)
+                self.known = len(INDEX_MAGIC)
+            else:
+                names = {}
+                self.known = parse_chunks(data, len(INDEX_MAGIC), names)
+                os.ftruncate(self.fd, self.known)  # Drop a torn tail so new blocks stay readable
+                self.names = {name: logger_id for logger_id, name in names.items()}
+        finally:
+            self.unlock()
+        self.entries = []
+        self.first_ms = self.last_ms = 0
+        self.start = self.end = 0
+        self.level_mask = 0
+
+    def lock(self):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def unlock(self):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def read_from(self, position):
+        chunks = []
+        while True:
+            chunk = os.pread(self.fd, 1 << 20, position)
+            if not chunk:
+                return b''.join(chunks)
+            chunks.append(chunk)
+            position += len(chunk)
+
+    def catch_up(self):
+        # With the lock held: learn the logger names other writers added
+        data = self.read_from(self.known)
+        if data:
+            names = {}
+            self.known += parse_chunks(data, 0, names)
+            for logger_id, name in names.items():
+                self.names.setdefault(name, logger_id)
+
+    def append(self, chunk):
+        self.lock()
+        try:
+            self.catch_up()
+            os.write(self.fd, chunk)
+            self.known += len(chunk)
+        finally:
+            self.unlock()
+
+    def add_name(self, name):
+        self.lock()
+        try:
+            self.catch_up()
+            logger_id = self.names.get(name)
+            if logger_id is None:  # Not registered by another writer meanwhile
+                logger_id = self.names[name] = min(len(self.names), MAX_LOGGER_ID)
+                encoded = name.encode('utf-8')
+                chunk = NAME_TAG + NAME.pack(logger_id, len(encoded)) + encoded
+                os.write(self.fd, chunk)
+                self.known += len(chunk)
+        finally:
+            self.unlock()
+        return logger_id
+
+    def add(self, offset, length, record):
+        ms = int(record.created * 1000)
+        delta = ms - self.first_ms
+        gap = offset - self.end
+        if self.entries and (not 0 <= gap <= MAX_GAP or len(self.entries) >= self.block_records
+                             or not 0 <= delta < self.block_ms):
+            self.write_block()
+        if not self.entries:
+            self.first_ms = self.last_ms = ms
+            self.start = self.end = offset
+            delta = gap = 0
+        logger_id = self.names.get(record.name)
+        if logger_id is None:
+            logger_id = self.add_name(record.name)
+        level = record.levelno if record.levelno < 255 else 255
+        self.entries.append(pack_entry(gap, length, delta, logger_id, level))
+        self.end = offset + length
+        if ms > self.last_ms:
+            self.last_ms = ms
+        self.level_mask |= 1 << (level // 10)  # level_bit(), inlined for the logging thread
+
+    def write_block(self):
+        payload = b''.join(self.entries)
+        self.append(BLOCK_TAG + BLOCK.pack(
+            self.first_ms, self.last_ms, self.start, self.end, len(self.entries), self.level_mask, len(payload)
+        ) + payload)
+        self.entries = []
+        self.level_mask = 0
+
+    def flush(self):
+        if self.entries:
+            self.write_block()
+
+    def close(self):
+        if self.fd is not None:
+            self.flush()
+            os.close(self.fd)
+            self.fd = None
+
+
+class IndexedFileHandler(logging.FileHandler):
+    # logging.FileHandler that records each record's byte range in a sidecar index
+    def __init__(self, filename, index=None, mode='a', encoding=None, delay=False):
+        super().__init__(filename, mode, encoding, delay)
+        self.index = index or LogIndexWriter(self.baseFilename)
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            stream = self.stream
+            data = (self.format(record) + self.terminator).encode(stream.encoding, stream.errors)
+            # StreamHandler.emit() would call self.flush(), closing an index block per record
+            stream.flush()
+            stream.buffer.write(data)
+            stream.buffer.flush()
+            self.index.add(appended_at(stream.fileno(), len(data)), len(data), record)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        super().flush()
+        with self.lock:
+            self.index.flush()
+
+    def close(self):
+        with self.lock:
+            self.index.close()
+        super().close()
+
+
+def open_log(path):
+    # Binary reader for a log file or compressed segment; compressed readers seek by decompressing
+    ext = os.path.splitext(path)[1]
+    if ext == '.gz':
+        import gzip
+        return gzip.open(path, 'rb')
+    if ext == '.bz2':
+        import bz2
+        return bz2.open(path, 'rb')
+    if ext == '.xz':
+        import lzma
+        return lzma.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def query_file(path, since=None, until=None, min_level=0, loggers=None, contains=None, stats=None):
+    """Yield (ms, level, logger, record bytes) for the matching records of one log file.
+
+    `since`/`until` are epoch milliseconds (until is exclusive), `loggers` a set of
+    names and `contains` bytes. Ranges the index doesn't cover are scanned line by
+    line: time and level are read from the line's text (see scan_lines()) and
+    filtered like indexed records, logger None. A logger filter can't be applied to
+    them, so they are skipped then; `stats` counts indexed, scanned and skipped bytes.
+    """
+    stats = stats if stats is not None else {}
+    for key in ('indexed_bytes', 'scanned_bytes', 'skipped_bytes'):
+        stats.setdefault(key, 0)
+    try:
+        names, blocks, _ = read_index(index_path(path))
+    except (OSError, ValueError):
+        names, blocks = {}, []
+    logger_ids = None
+    if loggers:
+        logger_ids = {logger_id for logger_id, name in names.items() if name in loggers}
+    min_bit = min(min_level // 10, 31)
+    compressed = os.path.splitext(path)[1] in COMPRESSED_SUFFIXES
+    size = None if compressed else os.path.getsize(path)
+
+    with open_log(path) as f:
+        def scan(start, end):
+            # Unindexed range: the logger isn't in the text, time and level may be
+            if loggers:
+                stats['skipped_bytes'] += (end - start) if end is not None else 0
+                return
+            f.seek(start)
+            data = f.read() if end is None else f.read(end - start)
+            stats['scanned_bytes'] += len(data)
+            for ms, level, line in scan_lines(data):
+                if since is not None or until is not None:
+                    if ms is None:
+                        stats['skipped_bytes'] += len(line)
+                        continue
+                    if (since is not None and ms < since) or (until is not None and ms >= until):
+                        continue
+                if min_level:
+                    if level is None:
+                        stats['skipped_bytes'] += len(line)
+                        continue
+                    if level < min_level:
+                        continue
+                if contains is None or contains in line:
+                    yield ms, level, None, line
+
+        def read_runs(selected):
+            # One read per run of adjacent matches, in file order
+            selected.sort()
+            first = 0
+            while first < len(selected):
+                last = first + 1
+                while last < len(selected) and selected[last][0] == selected[last - 1][0] + selected[last - 1][1]:
+                    last += 1
+                run_start = selected[first][0]
+                f.seek(run_start)
+                data = f.read(selected[last - 1][0] + selected[last - 1][1] - run_start)
+                for record_start, length, ms, level, logger_id in selected[first:last]:
+                    record = data[record_start - run_start:record_start - run_start + length]
+                    if len(record) < length:
+                        break  # The index is ahead of the file (written before a crash)
+                    if contains is None or contains in record:
+                        yield ms, level, names.get(logger_id, '?'), record
+                first = last
+
+        # Blocks of several writers interleave in the log: they are taken in offset order,
+        # and the matches of overlapping blocks are read together
+        covered = 0
+        selected = []
+        for header, payload in sorted(blocks, key=lambda block: block[0][2]):
+            first_ms, last_ms, start, end, count, mask, _ = header
+            if start >= covered:
+                yield from read_runs(selected)
+                selected = []
+                if start > covered:
+                    yield from scan(covered, start)
+            stats['indexed_bytes'] += max(0, end - max(start, covered))
+            covered = max(covered, end)
+            if (since is not None and last_ms < since) or (until is not None and first_ms >= until):
+                continue
+            if not mask >> min_bit:
+                continue  # No record at or above min_level in this block
+            offset = start
+            for gap, length, delta, logger_id, level in ENTRY.iter_unpack(payload):
+                record_start = offset + gap
+                offset = record_start + length
+                if level < min_level or (logger_ids is not None and logger_id not in logger_ids):
+                    continue
+                ms = first_ms + delta
+                if (since is not None and ms < since) or (until is not None and ms >= until):
+                    continue
+                selected.append((record_start, length, ms, level, logger_id))
+        yield from read_runs(selected)
+        if size is None or covered < size:
+            yield from scan(covered, size)  # Up to the end; compressed segments have no size
+
+
+def scan_lines(data):
+    """Yield (ms, level, line) for the non-blank lines of an unindexed log range.
+
+    A line without a timestamp (a traceback, the rest of a multi-line message)
+    belongs to the record above it and takes its time and level; lines before the
+    first timestamp get None. The level is None unless the layout writes level
+    names, e.g. %(levelname)s.
+    """
+    seconds = {}  # Timestamp text -> epoch ms; records share their second
+    ms = level = None
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        prefix = line[:LINE_PREFIX]
+        match = LINE_TIME.search(prefix)
+        if match:
+            stamp = match.group(1)
+            ms = seconds.get(stamp)
+            if ms is None:
+                try:
+                    ms = seconds[stamp] = int(time.mktime(time.strptime(
+                        stamp.decode('ascii').replace('T', ' '), '%Y-%m-%d %H:%M:%S')) * 1000)
+                except ValueError:
+                    ms = None
+            if ms is not None and match.group(2):
+                ms += int(match.group(2).ljust(3, b'0'))
+            found = LINE_LEVEL.search(prefix, match.end())
+            level = logging.getLevelName(found.group(1).decode('ascii')) if found else None
+        yield ms, level, line
+
+
+def expand_targets(targets):
+    # Directories contribute every log that has a sidecar; files are used as given
+    paths = []
+    for target in targets:
+        if os.path.isdir(target):
+            for directory, _, files in os.walk(target):
+                for name in files:
+                    path = os.path.join(directory, name)
+                    if not name.endswith((INDEX_SUFFIX, '.tmp', '.dtrhc')) and os.path.exists(index_path(path)):
+                        paths.append(path)
+        else:
+            paths.append(target)
+
+    def first_record(path):
+        # Order files by their first indexed record, so segments come before the live file
+        try:
+            _, blocks, _ = read_index(index_path(path))
+            if blocks:
+                return blocks[0][0][0]
+        except (OSError, ValueError):
+            pass
+        return os.path.getmtime(path) * 1000
+    return sorted(paths, key=first_record)
+
+
+def parse_time(text):
+    """Epoch ms for "YYYY-MM-DD HH:MM[:SS]", "YYYY-MM-DDTHH:MM", "YYYY-MM-DD", "HH:MM[:SS]" (today) or epoch seconds."""
+    import datetime
+    try:
+        return int(float(text) * 1000)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.datetime.fromisoformat(text)
+    except ValueError:
+        moment = datetime.datetime.combine(datetime.date.today(), datetime.time.fromisoformat(text))
+    return int(moment.timestamp() * 1000)
+
+
+def query(args):
+    since = parse_time(args.since) if args.since else None
+    until = parse_time(args.until) if args.until else None
+    min_level = 0
+    if args.level:
+        min_level = args.level if isinstance(args.level, int) else logging.getLevelName(args.level.upper())
+        if not isinstance(min_level, int):
+            sys.exit(f"Unknown level: {args.level}")
+    contains = args.grep.encode('utf-8') if args.grep else None
+    stats = {}
+    matches = 0
+    out = sys.stdout
+    for path in expand_targets(args.targets):
+        for ms, level, logger_name, data in query_file(path, since, until, min_level, set(args.logger or ()), contains, stats):
+            matches += 1
+            if not args.count:
+                out.write(data.decode('utf-8', 'replace').strip('\n') + '\n')
+    if args.count:
+        print(matches)
+    if stats.get('skipped_bytes'):
+        print(f"{stats['skipped_bytes']} unindexed bytes skipped (no readable time or level, or a logger filter)", file=sys.stderr)
+
+
+def status(args):
+    for path in args.targets:
+        try:
+            names, blocks, valid = read_index(index_path(path))
+        except (OSError, ValueError) as e:
+            print(f"{path}: no index ({e})")
+            continue
+        records = sum(header[4] for header, _ in blocks)
+        covered = sum(entry[1] for _, payload in blocks for entry in ENTRY.iter_unpack(payload))
+        print(f"{path}: {records} records in {len(blocks)} blocks, {os.path.getsize(index_path(path))} index bytes, "
+              f"{covered} log bytes indexed, loggers: {', '.join(sorted(names.values())) or '-'}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Query DtRH log files through their sidecar indexes")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    query_parser = subparsers.add_parser('query', help="Print records matching a time range, level, logger or text")
+    query_parser.add_argument('targets', nargs='+', help="Log files, segments or directories to search")
+    query_parser.add_argument('--since', help="Start time (inclusive)")
+    query_parser.add_argument('--until', help="End time (exclusive)")
+    query_parser.add_argument('--level', help="Minimum level, e.g. ERROR")
+    query_parser.add_argument('--logger', action='append', help="Logger name (repeatable)")
+    query_parser.add_argument('--grep', help="Only records containing this text")
+    query_parser.add_argument('--count', action='store_true', help="Print the number of matches only")
+    query_parser.set_defaults(func=query)
+
+    status_parser = subparsers.add_parser('status', help="Summarise the index of each log file")
+    status_parser.add_argument('targets', nargs='+')
+    status_parser.set_defaults(func=status)
+
+    args = parser.parse_args()
+    try:
+        args.func(args)
+    except BrokenPipeError:
+        sys.stderr.close()  # Output piped into head & co.
+
+
+if __name__ == "__main__":
+    main()
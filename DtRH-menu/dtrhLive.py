@@ -0,0 +1,178 @@
+import importlib
+import json
+import subprocess
+import threading
+import time
+
+class LiveItems:
+    """Menu items that are replaced by fresh snapshots from a LiveSource.
+
+    diff() compares a snapshot with the current items by `id`: unchanged
+    items keep their existing dicts, and inserts, removes and changes are
+    counted. It only reads the current items, so the fetch thread runs it and
+    the UI thread just commit()s the result. `positions` maps each id to its
+    index, so the menu can keep the same item selected when rows move.
+    """
+
+    def __init__(self, items=()):
+        self.items = []
+        self.positions = {}
+        self.complete = True
+        self.apply(items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __repr__(self):
+        return f"<LiveItems {len(self.items)} items>"
+
+    def apply(self, snapshot):
+        """Replace the items with `snapshot`; returns (inserted, removed, changed, moved)."""
+        return self.commit(self.diff(snapshot))
+
+    def diff(self, snapshot):
+        """Compare `snapshot` with the current items; safe to call from any thread."""
+        old_items, old_positions = self.items, self.positions
+        get_old = old_positions.get
+        items, positions = [], {}
+        append = items.append
+        inserted = changed = 0
+        for item in snapshot:
+            item_id = item['id'] if 'id' in item else item.get('label')
+            if item_id in positions:
+                continue  # Duplicate id: the first one wins
+            old_index = get_old(item_id)
+            if old_index is None:
+                inserted += 1
+            else:
+                old = old_items[old_index]
+                if old == item:
+                    item = old  # Unchanged: keep the existing dict
+                else:
+                    changed += 1
+            positions[item_id] = len(items)
+            append(item)
+        removed = len(old_items) - (len(items) - inserted)
+        moved = not (inserted or removed) and any(old_positions[item_id] != index for item_id, index in positions.items())
+        return old_items, items, positions, (inserted, removed, changed, moved)
+
+    def commit(self, change):
+        """Install a diff() result (UI thread); returns (inserted, removed, changed, moved)."""
+        base, items, positions, counts = change
+        if base is not self.items:
+            # Diffed against items that have been replaced since: compare again
+            base, items, positions, counts = self.diff(items)
+        if any(counts):
+            self.items, self.positions = items, positions
+        return counts
+
+def lines_to_items(output, id_column=None, action='none'):
+    items = []
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        item_id = line
+        if id_column is not None:
+            columns = line.split()
+            item_id = columns[id_column] if len(columns) > id_column else line
+        items.append({"id": item_id, "label": line, "action": action})
+    return items
+
+class LiveSource:
+    """Refreshes a menu's items from a command or a Python callable.
+
+    A source spec is the menu's "source" object:
+        {"command": "ps -eo pid,comm --no-headers", "id_column": 0, "interval": 1}
+        {"generator": "module:function", "interval": 5}
+    Commands produce items from their output ("format": "lines", "jsonl" or
+    "json"); generators are called with no arguments and return or yield
+    item dicts. Fetches run on a background thread while the source is
+    active, every `interval` seconds (on demand only when there is no
+    interval). Only the latest snapshot is kept until the UI takes it, so a
+    slow UI never queues up stale results.
+    """
+
+    def __init__(self, spec, items=None, notify=None):
+        self.spec = spec
+        self.items = items  # LiveItems to diff against, so the UI thread only has to commit
+        self.interval = spec.get('interval')
+        self.notify = notify  # Called from the fetch thread when a snapshot or error is ready
+        self.snapshot = None
+        self.error = None
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.active = False
+        self.thread = None
+
+    def activate(self):
+        self.active = True
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="LiveSource", daemon=True)
+            self.thread.start()
+        self.wakeup.set()  # Fetch right away when a menu is (re)entered
+
+    def deactivate(self):
+        self.active = False
+
+    def refresh(self):
+        self.wakeup.set()
+
+    def take(self):
+        """Return the newest unapplied snapshot (a LiveItems.diff() result if `items` is set), or None."""
+        with self.lock:
+            snapshot, self.snapshot = self.snapshot, None
+        return snapshot
+
+    def run(self):
+        timeout = None
+        while True:
+            self.wakeup.wait(timeout if self.active else None)
+            self.wakeup.clear()
+            if not self.active:
+                continue
+            started = time.monotonic()
+            try:
+                snapshot = self.fetch()
+                if self.items is not None:
+                    snapshot = self.items.diff(snapshot)
+                with self.lock:
+                    self.snapshot = snapshot
+                self.error = None
+            except Exception as e:
+                self.error = e
+            if self.notify is not None:
+                self.notify()
+            if self.interval:
+                # Measured start to start, so a slow command doesn't stretch the interval
+                timeout = max(0.0, self.interval - (time.monotonic() - started))
+
+    def fetch(self):
+        spec = self.spec
+        action = spec.get('action', 'none')
+        if 'generator' in spec:
+            module_name, _, function_name = spec['generator'].partition(':')
+            records = getattr(importlib.import_module(module_name), function_name)()
+        else:
+            output = subprocess.run(spec['command'], shell=True, capture_output=True, text=True,
+                                    timeout=spec.get('timeout', 30), check=True).stdout
+            format = spec.get('format', 'lines')
+            if format == 'lines':
+                return lines_to_items(output, spec.get('id_column'), action)
+            elif format == 'jsonl':
+                records = [json.loads(line) for line in output.splitlines() if line.strip()]
+            else:
+                records = json.loads(output)
+        items = []
+        for record in records:
+            item = dict(record)
+            item.setdefault('label', str(item.get('id', '')))
+            item.setdefault('id', item['label'])
+            item.setdefault('action', action)
+            items.append(item)
+        return items
@@ -17,11 +17,19 @@
 
 import logging
 import json
-import yaml
 import os
+import sys
+import time
 import datetime
-import xml.etree.ElementTree as ET
-from rich.console import Console
+import threading
+import atexit
+import collections
+import mmap
+import operator
+import re
+import select
+import weakref
+from dtrhCache import ConfigCache
 
 class BasicLogger:
     handlers_registry = {}
@@ -32,60 +40,263 @@ class BasicLogger:
         "rich_output": False,
         "enable_logger": True,
         "terminal_output": True,  # Default to true if not specified
-        "handlers": []
+        "handlers": [],
+        "async": False,  # Hand records to a background writer thread
+        "queue_size": 10000,
+        "overflow_policy": "block",  # block, drop_oldest or drop_debug
+        "file_writer": "stream",  # stream (FileHandler), mmap (MmapFileHandler), batch (BatchFileHandler) or collector
+        "durability": "none",  # mmap writer: none, interval or record
+        "sync_interval": 1.0,  # Seconds between msyncs with durability: interval
+        "mmap_segment_size": 16777216,  # Bytes the mmap writer preallocates at a time
+        "batch_bytes": 65536,  # batch writer: write once this much is buffered
+        "batch_interval": 1.0,  # ... or once the oldest buffered record is this old
+        "flush_level": "ERROR",  # ... or right away for records at this level and above
+        "fsync": "never",  # batch writer: never, error or batch
+        "index": True,  # Keep a <log>.idx sidecar for dtrhIndex.py queries
+        "collector_socket": None,  # collector writer: dtrhCollector.py socket (default: per-user path)
+        "format": "\n\n\n\n[%(asctime)s] %(message)s",  # %-style layout for file and console records
+        "datefmt": "%Y-%m-%d %H:%M:%S",
+        "watch": False,  # Apply edits to this file to running loggers
+        "watch_interval": 1.0,  # Seconds between checks when inotify isn't available
+        "rate_limit": {},  # Token bucket per message template, per level, e.g. DEBUG: {rate: 20, burst: 100}
+        "sample": {"DEBUG": 1.0},  # Fraction of records kept, per level
+        "fold_duplicates": False,  # "last message repeated N times" instead of identical records
+        "fold_interval": 10.0,  # Longest a run of duplicates goes without a summary
+        "limit_report_interval": 10.0  # Seconds between summaries of rate-limited records
     }
 
-    def __init__(self, name, config_file=None, output_file=None, rich_output=False):
+    # Settings that need a new file handler when they change
+    file_keys = ('output_file', 'file_writer', 'durability', 'sync_interval', 'mmap_segment_size', 'batch_bytes',
+                 'batch_interval', 'flush_level', 'fsync', 'index', 'collector_socket')
+    # Settings a reload applies without touching the handlers
+    live_keys = ('level', 'enable_logger', 'watch', 'watch_interval')
+    # Settings of the rate limiter, also applied without touching the handlers
+    limit_keys = ('rate_limit', 'sample', 'fold_duplicates', 'fold_interval', 'limit_report_interval')
+    # Settings that only take effect at the next start: the writer thread and its queue stay
+    restart_keys = ('async', 'queue_size', 'overflow_policy', 'rich_output')
+
+    def __init__(self, name, config_file=None, output_file=None, rich_output=False, async_mode=None, watch=None):
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG)
         self.config_file = config_file or self.default_config_file
-        self.config = self.load_config(self.config_file)
-        
-        # Override config with explicit parameters if provided
+        # Explicit parameters override the config file, including after a reload
+        self.overrides = {'rich_output': rich_output}
         if output_file:
-            self.config['output_file'] = output_file
-        self.config['rich_output'] = rich_output
+            self.overrides['output_file'] = output_file
+        if async_mode is not None:
+            self.overrides['async'] = async_mode
+        if watch is not None:
+            self.overrides['watch'] = watch
+        self.shared_config = shared_config(self.config_file, self.load_config)
+        self.config = dict(self.shared_config.data, **self.overrides)
+        self.enabled_cache = {}
+        self.set_level(self.config.get('level', 'INFO'))
+        self.limiter = RateLimiter(self.config)
 
-        self.console = Console() if self.config.get('rich_output', False) else None
+        self.console = None
+        if self.config.get('rich_output', False):
+            from rich.console import Console  # Rich is only imported when it's used
+            self.console = Console()
+        self.async_handler = None
+        self.file_handler = None
+        self.handler_roles = {}  # Role ('file', 'console', 'handler:<name>') -> (settings, handler)
+        self.reload_lock = threading.Lock()
         if self.config.get('enable_logger', True):
             self.setup_handlers()
+        atexit.register(self.flush_limits)  # Runs before shutdown(): summaries still reach the queue
+        self.shared_config.subscribe(self)
 
     def load_config(self, config_file):
         if not os.path.exists(config_file):
             self.create_default_config(config_file)
-        with open(config_file, 'r') as file:
-            return yaml.safe_load(file)
+        # Parsed YAML is cached next to the config file; unchanged configs skip the parse
+        return ConfigCache(config_file, parse_yaml, key=b'yaml').load()
 
     def create_default_config(self, config_file):
+        import yaml
         with open(config_file, 'w') as file:
             yaml.dump(self.default_config, file)
         print(f"Default configuration file created at {config_file}")
 
     def setup_handlers(self):
+        self.handler_roles = self.build_handlers()
+        handlers = [handler for _, handler in self.handler_roles.values()]
+        if self.config.get('async', False):
+            # The caller only enqueues; the writer thread drives the real handlers
+            self.async_handler = AsyncLogHandler(
+                handlers,
+                queue_size=self.config.get('queue_size', 10000),
+                overflow_policy=self.config.get('overflow_policy', 'block')
+            )
+            self.logger.addHandler(self.async_handler)
+            atexit.register(self.shutdown)
+        else:
+            for handler in handlers:
+                self.logger.addHandler(handler)
+
+    def build_handlers(self, previous=None):
+        # Handlers for the current config as {role: (settings, handler)}. A handler in
+        # `previous` whose settings are unchanged is reused instead of reopened.
+        previous = previous or {}
+        roles = {}
+        # One shared formatter: a record going to several handlers is rendered once
+        formatter = formatter_for(self.config.get('format', DEFAULT_LAYOUT), self.config.get('datefmt', DEFAULT_DATEFMT))
         if self.config.get('output_file'):
-            log_directory = self.create_log_directory()
-            output_file = self.config['output_file']
-            if not os.path.isabs(output_file):
-                output_file = os.path.join(log_directory, output_file)
-            self.ensure_log_file(output_file)
-            file_handler = logging.FileHandler(output_file, mode='a')
-            file_handler.setFormatter(CustomFormatter())
-            self.logger.addHandler(file_handler)
+            settings = tuple(self.config.get(key) for key in self.file_keys)
+            entry = previous.get('file')
+            file_handler = entry[1] if entry and entry[0] == settings else self.create_file_handler()
+            file_handler.setFormatter(formatter)
+            roles['file'] = (settings, file_handler)
+        self.file_handler = roles['file'][1] if 'file' in roles else None
 
         if self.config.get('terminal_output', True):
-            if self.console:
+            entry = previous.get('console')
+            if entry:
+                console_handler = entry[1]
+            elif self.console:
                 from rich.logging import RichHandler
-                rich_handler = RichHandler(console=self.console)
-                self.logger.addHandler(rich_handler)
+                console_handler = RichHandler(console=self.console)
             else:
                 console_handler = logging.StreamHandler()
-                console_handler.setFormatter(CustomFormatter())
-                self.logger.addHandler(console_handler)
+            if not self.console:
+                console_handler.setFormatter(formatter)
+            roles['console'] = ((), console_handler)
 
         for handler_class in self.config.get('handlers', []):
+            entry = previous.get('handler:' + handler_class)
             handler = self.handlers_registry.get(handler_class)
-            if handler:
-                self.logger.addHandler(handler())
+            if entry:
+                roles['handler:' + handler_class] = entry
+            elif handler:
+                roles['handler:' + handler_class] = ((), handler())
+        return roles
+
+    def stale_roles(self, roles):
+        # Roles in `roles` that build_handlers() would not reuse under the current config
+        stale = []
+        file_settings = tuple(self.config.get(key) for key in self.file_keys)
+        for role, (settings, _) in roles.items():
+            if role == 'file':
+                keep = self.config.get('output_file') and settings == file_settings
+            elif role == 'console':
+                keep = self.config.get('terminal_output', True)
+            else:
+                keep = role[len('handler:'):] in self.config.get('handlers', [])
+            if not keep:
+                stale.append(role)
+        return stale
+
+    def create_file_handler(self):
+        log_directory = self.create_log_directory()
+        output_file = self.config['output_file']
+        if not os.path.isabs(output_file):
+            output_file = os.path.join(log_directory, output_file)
+        self.ensure_log_file(output_file)
+        file_writer = self.config.get('file_writer', 'stream')
+        index = None
+        if self.config.get('index', True) and file_writer != 'collector':  # The collector keeps its own
+            from dtrhIndex import LogIndexWriter, IndexedFileHandler
+            index = LogIndexWriter(output_file)
+        if file_writer == 'mmap':
+            file_handler = MmapFileHandler(
+                output_file,
+                segment_size=self.config.get('mmap_segment_size', MmapFileHandler.default_segment_size),
+                durability=self.config.get('durability', 'none'),
+                sync_interval=self.config.get('sync_interval', 1.0),
+                index=index
+            )
+        elif file_writer == 'batch':
+            file_handler = BatchFileHandler(
+                output_file,
+                batch_bytes=self.config.get('batch_bytes', 65536),
+                batch_interval=self.config.get('batch_interval', 1.0),
+                flush_level=self.config.get('flush_level', 'ERROR'),
+                fsync=self.config.get('fsync', 'never'),
+                index=index
+            )
+        elif file_writer == 'collector':
+            from dtrhCollector import CollectorHandler
+            file_handler = CollectorHandler(
+                output_file,
+                socket_path=self.config.get('collector_socket'),
+                flush_level=self.config.get('flush_level', 'ERROR')
+            )
+        elif index is not None:
+            file_handler = IndexedFileHandler(output_file, index=index)
+        else:
+            file_handler = logging.FileHandler(output_file, mode='a')
+        return file_handler
+
+    def reload_config(self):
+        # Re-read the config file now instead of waiting for the watcher
+        self.shared_config.reload()
+
+    def apply_config(self, data):
+        # Called by the shared config when the file changes (on its watcher thread).
+        # Level and enable changes only reset the is_enabled_for cache; handlers are
+        # rebuilt only if their settings changed, and then swapped in one step.
+        config = dict(data, **self.overrides)
+        with self.reload_lock:
+            old = self.config
+            for key in self.restart_keys:
+                config[key] = old.get(key)
+            self.check_config(config)  # A bad value raises here, while the old config is still in place
+            changed = {key for key in old.keys() | config.keys() if old.get(key) != config.get(key)}
+            if changed.intersection(self.limit_keys):
+                self.flush_limits()  # Summaries under the old limits come first
+                self.limiter.configure(config)
+            self.config = config
+            if config.get('enable_logger', True) and (changed - set(self.live_keys) - set(self.limit_keys) or not self.handler_roles):
+                self.rebuild_handlers()
+            self.set_level(config.get('level', 'INFO'))
+
+    def check_config(self, config):
+        # Raises ValueError for the values the handlers and the level would reject, so
+        # apply_config() can refuse a config before switching anything over to it
+        RateLimiter.level_number(config.get('level', 'INFO'))
+        if not config.get('output_file'):
+            return
+        file_writer = config.get('file_writer', 'stream')
+        if file_writer == 'mmap' and config.get('durability', 'none') not in MmapFileHandler.durability_modes:
+            raise ValueError(f"Unknown durability: {config.get('durability')}")
+        if file_writer == 'batch' and config.get('fsync', 'never') not in BatchFileHandler.fsync_policies:
+            raise ValueError(f"Unknown fsync policy: {config.get('fsync')}")
+        if file_writer in ('batch', 'collector'):
+            RateLimiter.level_number(config.get('flush_level', 'ERROR'))
+
+    def rebuild_handlers(self):
+        previous = self.handler_roles
+        if not previous and self.async_handler is None:
+            self.setup_handlers()  # Enabled for the first time
+            return
+
+        def replace():
+            # Retire the handlers that change before opening their replacements, so an
+            # old and a new writer never share a file (or its index) at the same time
+            reusable = dict(previous)
+            for role in self.stale_roles(previous):
+                _, handler = reusable.pop(role)
+                handler.flush()  # Buffered records are written before the handler goes
+                handler.close()
+            self.handler_roles = self.build_handlers(reusable)
+            return [handler for _, handler in self.handler_roles.values()]
+
+        if self.async_handler:
+            # Between two queue batches; records logged meanwhile wait in the queue
+            self.async_handler.replace_handlers(replace)
+            return
+        import logging.handlers
+        retired = {id(handler) for _, handler in previous.values()}
+        kept = [handler for handler in self.logger.handlers if id(handler) not in retired]
+        waiting = logging.handlers.BufferingHandler(sys.maxsize)
+        self.logger.handlers = kept + [waiting]  # One assignment: a concurrent log() sees old or new
+        handlers = replace()
+        self.logger.handlers = kept + handlers
+        with waiting.lock:
+            for record in waiting.buffer:
+                for handler in handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            waiting.buffer.clear()
 
     def create_log_directory(self):
         sub_directory = 'log'
@@ -109,56 +320,979 @@ class BasicLogger:
             return handler
         return wrapper
 
-    def log(self, level, msg):
-        if not self.config.get('enable_logger', True):
+    def set_level(self, level):
+        if isinstance(level, str):
+            level = level.upper()
+        self.logger.setLevel(RateLimiter.level_number(level))  # Raises before the config records it
+        self.config['level'] = level
+        self.enabled_cache.clear()
+
+    def set_enabled(self, enabled):
+        self.config['enable_logger'] = enabled
+        self.enabled_cache.clear()
+
+    def is_enabled_for(self, level):
+        # Cached so hot paths can skip building log arguments altogether
+        try:
+            return self.enabled_cache[level]
+        except KeyError:
+            enabled = self.config.get('enable_logger', True) and self.logger.isEnabledFor(level)
+            self.enabled_cache[level] = enabled
+            return enabled
+
+    @staticmethod
+    def render(msg, args):
+        # msg may be a %-style template or a callable producing the message
+        if callable(msg):
+            msg = msg()
+        return msg % args if args else msg
+
+    def log(self, level, msg, *args):
+        if not self.is_enabled_for(level):
             return
-        if self.console and self.config.get('terminal_output', True):
-            self.console.log(f"[{logging.getLevelName(level)}] {msg}")
+        if self.limiter.active:
+            write, notes = self.limiter.check(level, msg, args)
+            for note_level, note in notes:
+                self.write(note_level, note)
+            if not write:
+                return
+        self.write(level, msg, args)
+
+    def write(self, level, msg, args=()):
+        # Hands a record that passed the level check and the rate limiter to the handlers
+        if self.console and self.config.get('terminal_output', True) and not self.async_handler:
+            self.console.log(f"[{logging.getLevelName(level)}] {self.render(msg, args)}")
         else:
-            self.logger.log(level, msg)
+            if callable(msg):
+                msg = msg()
+            # Arguments travel with the record and are only merged when a handler formats it
+            self.logger.log(level, msg, *args)
+
+    def flush_limits(self):
+        # Writes the summaries the rate limiter still owes (duplicate runs, suppressed counts)
+        for note_level, note in self.limiter.pending():
+            self.write(note_level, note)
+
+    def flush(self):
+        self.flush_limits()
+        if self.async_handler:
+            self.async_handler.flush()  # Also flushes the handlers behind it
+        elif self.file_handler:
+            self.file_handler.flush()  # Writes out a buffered batch
+
+    def shutdown(self):
+        # Drain anything still queued and stop the writer thread
+        self.flush_limits()
+        if self.async_handler:
+            self.async_handler.close()
+            self.logger.removeHandler(self.async_handler)
+
+    def queue_stats(self):
+        return self.async_handler.stats() if self.async_handler else {}
+
+    def write_stats(self):
+        # Batch statistics of the output file writer, if it keeps any
+        return self.file_handler.stats() if hasattr(self.file_handler, 'stats') else {}
+
+    def limit_stats(self):
+        # Records folded, sampled out and rate limited so far
+        return self.limiter.stats()
+
+    def debug(self, msg, *args):
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(logging.INFO, msg, *args)
+
+    def warn(self, msg, *args):
+        self.log(logging.WARNING, msg, *args)
+
+    def error(self, msg, *args):
+        self.log(logging.ERROR, msg, *args)
+
+    def critical(self, msg, *args):
+        self.log(logging.CRITICAL, msg, *args)
+
+
+def parse_yaml(source):
+    import yaml  # Only needed when the config cache is missing or stale
+    return yaml.safe_load(source)
+
+
+def inotify_fd(directory):
+    # Non-blocking inotify descriptor reporting changes in `directory`, or None where
+    # inotify isn't available (not Linux, no libc, watch limit reached)
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    # IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE: in-place edits and
+    # the write-and-rename editors do
+    if libc.inotify_add_watch(fd, os.fsencode(directory or '.'), 0x2 | 0x8 | 0x80 | 0x100 | 0x200) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class SharedConfig:
+    # One parsed config file per process, shared by every BasicLogger that uses it.
+    # Once a logger with `watch` enabled subscribes, a daemon thread watches the file (inotify on its directory
+    # where available, otherwise a stat every `watch_interval` seconds) and hands each
+    # successfully parsed new version to the subscribed loggers' apply_config(). A
+    # file that fails to parse is reported and the previous config stays in effect.
+    debounce = 0.05  # Editors write in several steps; wait for them to finish
+
+    def __init__(self, path, loader):
+        self.path = os.path.abspath(path)
+        self.loader = loader
+        self.loaded = self.signature()  # Taken before reading, so an edit during the load is seen
+        self.data = self.load()  # Replaced as a whole on reload, never modified
+        self.version = 1
+        self.subscribers = weakref.WeakSet()
+        self.lock = threading.Lock()
+        self.reload_lock = threading.Lock()  # The watcher and refresh() may race
+        self.watcher = None
+        self.stop_event = threading.Event()
+        self.watching = None  # 'inotify' or 'poll' once the watcher runs
+
+    def load(self):
+        data = self.loader(self.path)
+        if not isinstance(data, dict):
+            raise ValueError(f"{self.path} does not contain a mapping")
+        return data
+
+    def signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def subscribe(self, logger):
+        with self.lock:
+            self.subscribers.add(logger)
+            if self.watcher is None and logger.config.get('watch', False):
+                self.watcher = threading.Thread(target=self.watch, name='dtrhLogger-config', daemon=True)
+                self.watcher.start()
+
+    def watch(self):
+        fd = inotify_fd(os.path.dirname(self.path))
+        self.watching = 'poll' if fd is None else 'inotify'
+        try:
+            while not self.stop_event.is_set():
+                if fd is None:
+                    self.stop_event.wait(self.data.get('watch_interval', 1.0))
+                else:
+                    # The timeout also catches changes inotify can't see (e.g. network filesystems)
+                    if select.select([fd], [], [], 1.0)[0]:
+                        time.sleep(self.debounce)
+                        while True:
+                            try:
+                                if not os.read(fd, 65536):
+                                    break
+                            except BlockingIOError:
+                                break
+                self.refresh()
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def refresh(self):
+        # Reload if the file changed since it was last read (one stat otherwise)
+        signature = self.signature()
+        if signature is not None and signature != self.loaded:
+            return self.reload()
+        return False
+
+    def reload(self):
+        with self.reload_lock:
+            self.loaded = self.signature()
+            try:
+                data = self.load()
+            except Exception as e:
+                sys.stderr.write(f"dtrhLogger: keeping the previous configuration, {self.path} is invalid: {e}\n")
+                return False
+            with self.lock:
+                if data == self.data:
+                    return False
+                self.data = data
+                self.version += 1
+                subscribers = list(self.subscribers)
+            for logger in subscribers:
+                try:
+                    logger.apply_config(data)
+                except Exception as e:
+                    sys.stderr.write(f"dtrhLogger: could not apply {self.path} to {logger.logger.name}: {e}\n")
+        return True
+
+    def close(self):
+        self.stop_event.set()
+        if self.watcher is not None:
+            self.watcher.join()
+
+
+shared_configs = {}  # Absolute path -> SharedConfig
+shared_configs_lock = threading.Lock()
+
+
+def shared_config(path, loader):
+    # The SharedConfig for a config file, loaded with `loader` on first use and
+    # refreshed if the file changed before the watcher noticed
+    path = os.path.abspath(path)
+    with shared_configs_lock:
+        config = shared_configs.get(path)
+        if config is None:
+            return shared_configs.setdefault(path, SharedConfig(path, loader))
+    config.refresh()
+    return config
+
+
+class LazyLogger:
+    # Stands in for a logger that is expensive to create (config files, log
+    # directories, writer threads): `factory` runs on first attribute access,
+    # so importing a module that defines one has no side effects
+    def __init__(self, factory):
+        self._factory = factory
+        self._logger = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if self._logger is None:
+            with self._lock:
+                if self._logger is None:
+                    self._logger = self._factory()
+        value = getattr(self._logger, name)
+        if callable(value):
+            setattr(self, name, value)  # Later calls skip __getattr__ entirely
+        return value
+
+
+class RateLimiter:
+    # Flood control between BasicLogger.log()'s level check and the handlers. Each
+    # stage is configured per level:
+    #   fold_duplicates - a record identical to the previous one (level, template and
+    #                     arguments) is only counted; the run ends with "last message
+    #                     repeated N times" when a different record arrives, every
+    #                     fold_interval seconds while it lasts, and on flush
+    #   sample          - records are kept with the given probability
+    #   rate_limit      - a token bucket per message template (per code object for
+    #                     callables): `rate` records per second, bursts up to `burst`
+    # Rate-limited records are summarized per level at most every limit_report_interval
+    # seconds, naming the templates that were suppressed most.
+    keep = (True, ())
+    drop = (False, ())
+    max_keys = 4096  # Buckets kept before starting over (e.g. f-string templates)
 
-    def debug(self, msg):
-        self.log(logging.DEBUG, msg)
+    def __init__(self, config):
+        self.lock = threading.Lock()
+        self.buckets = {}  # (level, template) -> [tokens, last refill]
+        self.last = None  # (level, msg, args) of the last record written
+        self.repeats = 0
+        self.run_started = 0.0
+        self.window = collections.Counter()  # (level, template) -> suppressed since the last report
+        self.window_started = None
+        self.folded = collections.Counter()
+        self.sampled_out = collections.Counter()
+        self.suppressed = collections.Counter()
+        self.suppressed_keys = collections.Counter()
+        self.configure(config)
 
-    def info(self, msg):
-        self.log(logging.INFO, msg)
+    @staticmethod
+    def level_number(level):
+        number = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+        if not isinstance(number, int):
+            raise ValueError(f"Unknown log level: {level}")
+        return number
 
-    def warn(self, msg):
-        self.log(logging.WARNING, msg)
+    def configure(self, config):
+        # Validates everything before changing anything, so a bad reload keeps the old limits
+        rates = {}
+        for level, limit in (config.get('rate_limit') or {}).items():
+            if not isinstance(limit, dict):
+                raise ValueError(f"rate_limit for {level} must be a mapping with rate and burst")
+            rate = float(limit.get('rate', 0))
+            burst = float(limit.get('burst', max(rate, 1)))
+            if rate < 0 or burst < 1:
+                raise ValueError(f"Invalid rate_limit for {level}: {limit}")
+            rates[self.level_number(level)] = (rate, burst)
+        samples = {}
+        for level, fraction in (config.get('sample') or {}).items():
+            fraction = float(fraction)
+            if not 0 <= fraction <= 1:
+                raise ValueError(f"sample for {level} must be between 0 and 1, not {fraction}")
+            if fraction < 1:
+                samples[self.level_number(level)] = fraction
+        fold_interval = float(config.get('fold_interval', 10.0))
+        report_interval = float(config.get('limit_report_interval', 10.0))
+        if samples:
+            from random import random  # Only loaded when sampling is on
+            self.random = random
+        with self.lock:
+            if rates != getattr(self, 'rates', None):
+                self.buckets.clear()
+            self.rates = rates
+            self.samples = samples
+            self.fold = bool(config.get('fold_duplicates', False))
+            self.fold_interval = fold_interval
+            self.report_interval = report_interval
+            if not self.fold:
+                self.last = None
+        self.active = bool(rates or samples or self.fold)  # Inactive: BasicLogger.log() skips the limiter and its lock
 
-    def error(self, msg):
-        self.log(logging.ERROR, msg)
+    def check(self, level, msg, args):
+        # (write, notes): whether to write the record, and summary (level, text) pairs
+        # to write before it
+        now = time.monotonic()
+        notes = None
+        with self.lock:
+            if self.window_started is not None and now - self.window_started >= self.report_interval:
+                notes = self.suppression_notes(now)
+            last = self.last
+            if last is not None:
+                if last[1] == msg and last[0] == level and self.same_args(last, msg, args):
+                    self.repeats += 1
+                    self.folded[level] += 1
+                    if now - self.run_started >= self.fold_interval:
+                        notes = (notes or []) + [self.repeat_note(now)]
+                    return (False, notes) if notes else self.drop
+                if self.repeats:
+                    notes = (notes or []) + [self.repeat_note(now)]
+                self.last = None
+            if self.samples:
+                fraction = self.samples.get(level)
+                if fraction is not None and self.random() >= fraction:
+                    self.sampled_out[level] += 1
+                    return (False, notes) if notes else self.drop
+            limit = self.rates.get(level)
+            if limit is not None:
+                key = (level, msg if type(msg) is str else self.template(msg))
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    self.add_bucket(key, limit, now)
+                else:
+                    tokens = bucket[0] + (now - bucket[1]) * limit[0]
+                    if tokens > limit[1]:
+                        tokens = limit[1]
+                    bucket[1] = now
+                    if tokens < 1:
+                        bucket[0] = tokens
+                        self.suppress(key, now)
+                        return (False, notes) if notes else self.drop
+                    bucket[0] = tokens - 1
+            if self.fold:
+                self.last = (level, msg, args)
+                self.run_started = now
+        return (True, notes) if notes else self.keep
 
-    def critical(self, msg):
-        self.log(logging.CRITICAL, msg)
+    @staticmethod
+    def same_args(last, msg, args):
+        if callable(msg):
+            return False  # A callable may build a different message each time
+        try:
+            return bool(last[2] == args)
+        except Exception:  # Arguments without a usable ==
+            return False
+
+    @staticmethod
+    def template(msg):
+        # Bucket key for a message that is not a plain string
+        if callable(msg):
+            return getattr(msg, '__code__', msg)
+        return msg if msg.__hash__ else repr(msg)
+
+    def add_bucket(self, key, limit, now):
+        if len(self.buckets) >= self.max_keys:
+            self.buckets.clear()
+            self.suppressed_keys.clear()
+        self.buckets[key] = [limit[1] - 1, now]
+
+    def suppress(self, key, now):
+        self.suppressed[key[0]] += 1
+        self.suppressed_keys[key] += 1
+        self.window[key] += 1
+        if self.window_started is None:
+            self.window_started = now
+
+    def repeat_note(self, now):
+        level = self.last[0]
+        note = (level, f"last message repeated {self.repeats} time{'s' if self.repeats != 1 else ''}")
+        self.repeats = 0
+        self.run_started = now
+        return note
+
+    def suppression_notes(self, now):
+        elapsed = now - self.window_started
+        by_level = collections.defaultdict(list)
+        for (level, key), count in self.window.most_common():
+            by_level[level].append((count, key))
+        notes = []
+        for level, counts in sorted(by_level.items()):
+            total = sum(count for count, _ in counts)
+            top = ", ".join(f"{count} x {self.describe(key)}" for count, key in counts[:3])
+            notes.append((level, f"rate limit: suppressed {total} {logging.getLevelName(level)} records "
+                                 f"in {elapsed:.1f} s ({top})"))
+        self.window.clear()
+        self.window_started = None
+        return notes
+
+    @staticmethod
+    def describe(key):
+        if hasattr(key, 'co_filename'):
+            return f"<{key.co_name} at {os.path.basename(key.co_filename)}:{key.co_firstlineno}>"
+        text = repr(key)
+        return text if len(text) <= 60 else text[:57] + "...'"
+
+    def pending(self):
+        # Summaries still owed: an open run of duplicates and the current report window
+        now = time.monotonic()
+        with self.lock:
+            notes = self.suppression_notes(now) if self.window_started is not None else []
+            if self.repeats:
+                notes.append(self.repeat_note(now))
+        return notes
+
+    def stats(self):
+        with self.lock:
+            by_level = lambda counter: {logging.getLevelName(level): count for level, count in counter.items()}
+            return {
+                "folded": sum(self.folded.values()),
+                "sampled_out": sum(self.sampled_out.values()),
+                "suppressed": sum(self.suppressed.values()),
+                "folded_by_level": by_level(self.folded),
+                "sampled_out_by_level": by_level(self.sampled_out),
+                "suppressed_by_level": by_level(self.suppressed),
+                "top_suppressed": [(self.describe(key), count) for (_, key), count in self.suppressed_keys.most_common(5)],
+                "repeating": self.repeats,
+                "buckets": len(self.buckets)
+            }
+
+
+DEFAULT_LAYOUT = '\n\n\n\n[%(asctime)s] %(message)s'  # 4 line breaks and a timestamp before each entry
+DEFAULT_DATEFMT = '%Y-%m-%d %H:%M:%S'
+LAYOUT_FIELD = re.compile(r'%\((\w+)\)([#0+ -]*\d*(?:\.\d+)?[diouxXeEfFgGcrsa])|%%')
 
 
 class CustomFormatter(logging.Formatter):
+    # Formats records with a %-style layout compiled once into a plain % template and a
+    # render function that fetches just the fields the layout uses. The formatted
+    # timestamp is cached per second, and the last record rendered is remembered, so
+    # handlers sharing this formatter (see formatter_for()) render each record once.
+    # The record itself is never modified: not even the exc_text cache that
+    # logging.Formatter fills in.
+    def __init__(self, layout=DEFAULT_LAYOUT, datefmt=DEFAULT_DATEFMT):
+        super().__init__(layout, datefmt or DEFAULT_DATEFMT)  # datefmt: null in the YAML means the default
+        self.layout = layout
+        self.time_cache = (None, '')  # (second, formatted timestamp)
+        self.last = (None, '')  # (record, text) rendered last
+        self.render = self.compile(layout)
+
+    def compile(self, layout):
+        template, getters = [], []
+        position = 0
+        for match in LAYOUT_FIELD.finditer(layout):
+            template.append(layout[position:match.start()].replace('%', '%%'))
+            position = match.end()
+            if match.group(1) is None:
+                template.append('%%')
+                continue
+            name = match.group(1)
+            template.append('%' + match.group(2))
+            if name == 'message':
+                getters.append(logging.LogRecord.getMessage)
+            elif name == 'asctime':
+                getters.append(self.timestamp)
+            else:
+                getters.append(operator.attrgetter(name))
+        template.append(layout[position:].replace('%', '%%'))
+        template = ''.join(template)
+
+        # Unrolled for the usual layouts of one to three fields
+        if not getters:
+            return lambda record: template % ()
+        if len(getters) == 1:
+            first, = getters
+            return lambda record: template % (first(record),)
+        if len(getters) == 2:
+            first, second = getters
+            return lambda record: template % (first(record), second(record))
+        if len(getters) == 3:
+            first, second, third = getters
+            return lambda record: template % (first(record), second(record), third(record))
+        getters = tuple(getters)
+        return lambda record: template % tuple([get(record) for get in getters])
+
+    def timestamp(self, record):
+        second = int(record.created)
+        cached_second, text = self.time_cache
+        if second != cached_second:
+            text = time.strftime(self.datefmt, self.converter(second))
+            self.time_cache = (second, text)
+        return text
+
     def format(self, record):
-        # Add 4 line breaks and timestamp at the beginning of each log entry
-        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        record.msg = f"\n\n\n\n[{timestamp}] {record.msg}"
-        return super().format(record)
+        last_record, text = self.last
+        if last_record is record:
+            return text
+        text = self.render(record)
+        if record.exc_info or record.exc_text or record.stack_info:
+            details = record.exc_text
+            if record.exc_info and not details:
+                details = self.formatException(record.exc_info)
+            if details:
+                text = f"{text}\n{details}" if not text.endswith('\n') else text + details
+            if record.stack_info:
+                text = f"{text}\n{self.formatStack(record.stack_info)}"
+        self.last = (record, text)  # Holding the record keeps its id from being reused
+        return text
+
+
+formatters = {}  # (layout, datefmt) -> CustomFormatter
+formatters_lock = threading.Lock()
+
+
+def formatter_for(layout=DEFAULT_LAYOUT, datefmt=DEFAULT_DATEFMT):
+    # Shared CustomFormatter for a layout, compiled on first use
+    with formatters_lock:
+        formatter = formatters.get((layout, datefmt))
+        if formatter is None:
+            formatter = formatters[(layout, datefmt)] = CustomFormatter(layout, datefmt)
+        return formatter
+
+
+class AsyncLogHandler(logging.Handler):
+    # Bounded buffer drained by a background writer thread.  Overflow policies:
+    #   block       - the caller waits for room (nothing is lost)
+    #   drop_oldest - the oldest queued record is discarded
+    #   drop_debug  - DEBUG records are discarded first; blocks if none are queued
+    overflow_policies = ('block', 'drop_oldest', 'drop_debug')
+
+    def __init__(self, handlers, queue_size=10000, overflow_policy='block'):
+        super().__init__()
+        if overflow_policy not in self.overflow_policies:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.handlers = list(handlers)
+        self.queue_size = max(1, int(queue_size))
+        self.overflow_policy = overflow_policy
+        self.buffer = collections.deque()
+        self.mutex = threading.Lock()
+        self.not_empty = threading.Condition(self.mutex)
+        self.not_full = threading.Condition(self.mutex)
+        self.drained = threading.Condition(self.mutex)
+        self.in_flight = 0
+        self.closing = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = collections.Counter()
+        self.write_lock = threading.Lock()  # Held while a batch goes through self.handlers
+        self.writer = threading.Thread(target=self._drain, name='dtrhLogger-writer', daemon=True)
+        self.writer.start()
+
+    def handle(self, record):
+        # Like logging.handlers.QueueHandler, without the handler lock: emit() has its own,
+        # and producers must not queue up behind one that is waiting for room
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv  # Python 3.12+ filters may return a replacement record
+        if rv:
+            self.emit(record)
+        return rv
+
+    def prepare(self, record):
+        # Merge the arguments into the message on the calling thread, as QueueHandler does:
+        # the writer thread must log the values they had when the record was made, and
+        # must not touch objects the caller goes on changing
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def emit(self, record):
+        record = self.prepare(record)
+        with self.mutex:
+            if self.closing:
+                self._write([record])
+                return
+            while len(self.buffer) >= self.queue_size:
+                if self.overflow_policy == 'drop_oldest':
+                    self._drop(self.buffer.popleft())
+                    self.enqueued -= 1  # Counts records that stay queued until written
+                elif self.overflow_policy == 'drop_debug' and record.levelno <= logging.DEBUG:
+                    self._drop(record)
+                    return
+                elif self.overflow_policy == 'drop_debug' and self._evict_debug():
+                    pass
+                else:
+                    self.not_full.wait()
+                    if self.closing:
+                        self._write([record])
+                        return
+            self.buffer.append(record)
+            self.enqueued += 1
+            self.not_empty.notify()
+
+    def _evict_debug(self):
+        for queued in self.buffer:
+            if queued.levelno <= logging.DEBUG:
+                self.buffer.remove(queued)
+                self._drop(queued)
+                self.enqueued -= 1
+                return True
+        return False
+
+    def _drop(self, record):
+        self.dropped[record.levelname] += 1
+
+    def _drain(self):
+        while True:
+            with self.mutex:
+                while not self.buffer and not self.closing:
+                    self.not_empty.wait()
+                if not self.buffer and self.closing:
+                    self.drained.notify_all()
+                    return
+                batch = list(self.buffer)
+                self.buffer.clear()
+                self.in_flight = len(batch)
+                self.not_full.notify_all()
+            self._write(batch)
+            with self.mutex:
+                self.written += len(batch)
+                self.in_flight = 0
+                if not self.buffer:
+                    self.drained.notify_all()
+
+    def _write(self, records):
+        # Stream handlers flush per record themselves; buffering handlers keep their own
+        # batching, so nothing is flushed per queue batch
+        with self.write_lock:
+            handlers = self.handlers
+            for record in records:
+                for handler in handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+
+    def replace_handlers(self, replace):
+        # Swap the target handlers between two batches: replace() retires the old ones
+        # and returns the new list while the writer thread waits
+        with self.write_lock:
+            self.handlers = list(replace())
+
+    def flush(self):
+        # Block until everything queued so far has reached the target handlers
+        with self.mutex:
+            while (self.buffer or self.in_flight) and self.writer.is_alive():
+                self.drained.wait(0.1)
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self):
+        with self.mutex:
+            if self.closing:
+                return
+            self.closing = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+        self.writer.join()
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+    def stats(self):
+        with self.mutex:
+            return {
+                "queued": len(self.buffer),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": sum(self.dropped.values()),
+                "dropped_by_level": dict(self.dropped)
+            }
+
+
+class MmapFileHandler(logging.Handler):
+    # Appends records into a memory-mapped window of the log file instead of issuing a
+    # write() per record. The file is extended one preallocated segment at a time and
+    # the window is remapped when it fills; close() truncates the unused tail, and a
+    # file left padded by a crash is resumed after its last record. One writer per file.
+    # An optional dtrhIndex.LogIndexWriter gets the byte range of every record.
+    # Durability:
+    #   none     - records reach the page cache immediately and disk whenever the OS
+    #              writes them back (survives a process crash, not a power loss)
+    #   interval - a timer thread msyncs new records every sync_interval seconds
+    #   record   - msync after every record
+    durability_modes = ('none', 'interval', 'record')
+    default_segment_size = 16 * 1024 * 1024
+    terminator = '\n'
+
+    def __init__(self, filename, segment_size=default_segment_size, durability='none', sync_interval=1.0, encoding='utf-8', index=None):
+        super().__init__()
+        if durability not in self.durability_modes:
+            raise ValueError(f"Unknown durability: {durability}")
+        granularity = mmap.ALLOCATIONGRANULARITY
+        self.baseFilename = os.path.abspath(filename)
+        self.segment_size = max(granularity, -(-int(segment_size) // granularity) * granularity)
+        self.durability = durability
+        self.sync_interval = sync_interval
+        self.encoding = encoding
+        self.index = index
+        self.fd = os.open(self.baseFilename, os.O_RDWR | os.O_CREAT, 0o644)
+        self.file_size = os.fstat(self.fd).st_size
+        self.offset = self.data_end()  # File offset of the next record
+        self.synced = self.offset  # Everything before this offset has been msynced
+        self.map = None
+        self.map_window(0)
+        self.stop_event = None
+        self.syncer = None
+        if durability == 'interval':
+            self.stop_event = threading.Event()
+            self.syncer = threading.Thread(target=self.sync_periodically, name='dtrhLogger-msync', daemon=True)
+            self.syncer.start()
+
+    def data_end(self):
+        # Preallocated space is zero-filled: the data ends after the last non-NUL byte
+        end = self.file_size
+        while end > 0:
+            start = max(0, end - 65536)
+            chunk = os.pread(self.fd, end - start, start).rstrip(b'\0')
+            if chunk:
+                return start + len(chunk)
+            end = start
+        return 0
+
+    def map_window(self, needed):
+        granularity = mmap.ALLOCATIONGRANULARITY
+        if self.map is not None:
+            if self.durability != 'none':
+                self.sync()
+            self.map.close()  # Dirty pages stay in the page cache
+        start = self.offset - self.offset % granularity
+        length = max(self.segment_size, -(-(self.offset - start + needed) // granularity) * granularity)
+        if self.file_size < start + length:
+            os.ftruncate(self.fd, start + length)  # Preallocate the next segment
+            self.file_size = start + length
+        self.map = mmap.mmap(self.fd, length, offset=start)
+        self.map_start = start
+        self.map_end = start + length
+
+    def emit(self, record):
+        try:
+            data = (self.format(record) + self.terminator).encode(self.encoding)
+            end = self.offset + len(data)
+            if end > self.map_end:
+                self.map_window(len(data))
+            position = self.offset - self.map_start
+            self.map[position:position + len(data)] = data
+            if self.index is not None:
+                self.index.add(self.offset, len(data), record)
+            self.offset = end
+            if self.durability == 'record':
+                self.sync()
+        except Exception:
+            self.handleError(record)
+
+    def sync(self):
+        # msync the records written since the last sync (called with the handler lock held)
+        if self.map is None or self.offset <= self.synced:
+            return
+        start = max(self.synced, self.map_start)
+        start -= (start - self.map_start) % mmap.PAGESIZE  # msync needs a page-aligned start
+        self.map.flush(start - self.map_start, self.offset - start)
+        self.synced = self.offset
+
+    def sync_periodically(self):
+        while not self.stop_event.wait(self.sync_interval):
+            with self.lock:
+                self.sync()
+
+    def flush(self):
+        # Nothing is buffered in the process: records are in the page cache once emit()
+        # returns. Syncing to disk is governed by `durability`, not by flush(). Only the
+        # index's open block is written out.
+        if self.index is not None:
+            with self.lock:
+                self.index.flush()
+
+    def close(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+            self.syncer.join()
+        with self.lock:
+            if self.map is not None:
+                if self.durability != 'none':
+                    self.sync()
+                self.map.close()
+                self.map = None
+                os.ftruncate(self.fd, self.offset)  # Drop the preallocated tail
+                if self.durability != 'none':
+                    os.fsync(self.fd)  # Persist the final size too
+                os.close(self.fd)
+            if self.index is not None:
+                self.index.close()
+        super().close()
+
+
+class BatchFileHandler(logging.Handler):
+    # Buffers formatted records and appends them to the file with one write() per batch.
+    # A batch is written when it reaches batch_bytes, when its oldest record is
+    # batch_interval seconds old (checked by a timer thread), as soon as a record at
+    # flush_level or above arrives, and on flush()/close(), which logging.shutdown()
+    # runs at interpreter exit. fsync policy:
+    #   never - leave write-back to the OS
+    #   error - fsync batches written because of a record at flush_level or above
+    #   batch - fsync every batch
+    # An optional dtrhIndex.LogIndexWriter gets the byte range of every record once its
+    # batch is written (other processes may append to the file between batches); its
+    # open block is written out with each batch.
+    fsync_policies = ('never', 'error', 'batch')
+    terminator = '\n'
+
+    def __init__(self, filename, batch_bytes=65536, batch_interval=1.0, flush_level=logging.ERROR, fsync='never', encoding='utf-8', index=None):
+        super().__init__()
+        if fsync not in self.fsync_policies:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        flush_level = RateLimiter.level_number(flush_level)  # ValueError for an unknown name
+        self.baseFilename = os.path.abspath(filename)
+        self.batch_bytes = batch_bytes
+        self.batch_interval = batch_interval
+        self.flush_level = flush_level
+        self.fsync = fsync
+        self.encoding = encoding
+        self.index = index
+        self.fd = os.open(self.baseFilename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self.buffer = []
+        self.indexed = []  # (length, record) of the buffered records, with an index
+        self.buffered_bytes = 0
+        self.first_buffered = 0.0  # When the oldest buffered record arrived
+        self.batches = collections.Counter()  # Batches written, by trigger
+        self.records = 0
+        self.bytes_written = 0
+        self.largest_batch = 0
+        self.fsyncs = 0
+        self.write_seconds = 0.0
+        self.stop_event = threading.Event()
+        self.timer = threading.Thread(target=self.flush_periodically, name='dtrhLogger-batch', daemon=True)
+        self.timer.start()
+
+    def emit(self, record):
+        try:
+            data = (self.format(record) + self.terminator).encode(self.encoding)
+            if not self.buffer:
+                self.first_buffered = time.monotonic()
+            self.buffer.append(data)
+            self.buffered_bytes += len(data)
+            if self.index is not None:
+                self.indexed.append((len(data), record))
+            if record.levelno >= self.flush_level:
+                self.write_batch('severity')
+            elif self.buffered_bytes >= self.batch_bytes:
+                self.write_batch('size')
+        except Exception:
+            self.handleError(record)
+
+    def write_batch(self, reason):
+        # Called with the handler lock held
+        if not self.buffer or self.fd is None:
+            return
+        count = len(self.buffer)
+        data = b''.join(self.buffer)
+        self.buffer = []
+        self.buffered_bytes = 0
+        start = time.perf_counter()
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self.fd, view):]
+        if self.fsync == 'batch' or (self.fsync == 'error' and reason == 'severity'):
+            os.fsync(self.fd)
+            self.fsyncs += 1
+        if self.index is not None:
+            from dtrhIndex import appended_at
+            offset = appended_at(self.fd, len(data))
+            for length, record in self.indexed:
+                self.index.add(offset, length, record)
+                offset += length
+            self.indexed = []
+            self.index.flush()
+        self.write_seconds += time.perf_counter() - start
+        self.batches[reason] += 1
+        self.records += count
+        self.bytes_written += len(data)
+        self.largest_batch = max(self.largest_batch, count)
+
+    def flush_periodically(self):
+        timeout = self.batch_interval
+        while not self.stop_event.wait(timeout):
+            # close() joins this thread, and logging.shutdown() holds the lock while calling it
+            if not self.lock.acquire(timeout=0.1):
+                timeout = 0.0
+                continue
+            try:
+                age = time.monotonic() - self.first_buffered
+                if self.buffer and age >= self.batch_interval:
+                    try:
+                        self.write_batch('time')
+                    except OSError as e:
+                        sys.stderr.write(f"dtrhLogger: could not write {self.baseFilename}: {e}\n")
+                    age = 0.0
+                # Wake up when the oldest buffered record becomes due
+                timeout = self.batch_interval - age if self.buffer else self.batch_interval
+            finally:
+                self.lock.release()
+
+    def flush(self):
+        with self.lock:
+            self.write_batch('flush')
+
+    def close(self):
+        self.stop_event.set()
+        self.timer.join()
+        with self.lock:
+            if self.fd is not None:
+                self.write_batch('close')
+                if self.fsync != 'never':
+                    os.fsync(self.fd)
+                os.close(self.fd)
+                self.fd = None
+            if self.index is not None:
+                self.index.close()
+        super().close()
+
+    def stats(self):
+        with self.lock:
+            batches = sum(self.batches.values())
+            return {
+                "batches": batches,
+                "records": self.records,
+                "bytes": self.bytes_written,
+                "records_per_batch": self.records / batches if batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "fsyncs": self.fsyncs,
+                "write_ms": self.write_seconds * 1e3,
+                "buffered": len(self.buffer),
+                "batches_by_reason": dict(self.batches)
+            }
 
 
 @BasicLogger.register_handler('xml')
 class XMLLogger(BasicLogger):
-    def log(self, level, msg):
-        if not self.config.get('enable_logger', True):
-            return
+    def write(self, level, msg, args=()):
+        import xml.etree.ElementTree as ET
         log_entry = ET.Element("Log")
         ET.SubElement(log_entry, "Level").text = logging.getLevelName(level)
-        ET.SubElement(log_entry, "Message").text = msg
+        ET.SubElement(log_entry, "Message").text = self.render(msg, args)
         xml_string = ET.tostring(log_entry, encoding='unicode')
-        super().log(level, xml_string)
+        super().write(level, xml_string)
 
 @BasicLogger.register_handler('json')
 class JSONLogger(BasicLogger):
-    def log(self, level, msg):
-        if not self.config.get('enable_logger', True):
-            return
-        log_entry = json.dumps({"level": logging.getLevelName(level), "message": msg})
-        super().log(level, log_entry)
+    def write(self, level, msg, args=()):
+        log_entry = json.dumps({"level": logging.getLevelName(level), "message": self.render(msg, args)})
+        super().write(level, log_entry)
 
 # Usage Example
 if __name__ == "__main__":
@@ -16,13 +16,22 @@
 
 
 import sys           # System-specific parameters and functions
+import logging
 import threading     # Multi-threading
+import time
 import json          # JSON parsing and manipulation
 import curses
 from queue import Queue             # Thread-safe queue implementation
 from dtrhStyle import ThemeManager  # Custom theme management for the menu
-from dtrhLogger import BasicLogger  # Custom logging for the application
+from dtrhRender import RowRenderer, Viewport  # Incremental row-level screen updates and scrolling
+from dtrhStream import LineItems  # Compact, growable storage for line-oriented STDIN
+from dtrhFilter import ItemIndex, FilteredItems  # Indexed incremental filtering
+from dtrhActions import ActionRegistry, ActionRunner, THREAD, run_shell  # Action dispatch and background jobs
+from dtrhEvents import EventLoop    # Keyboard, timers and producer wake-ups in one loop
+from dtrhLive import LiveItems, LiveSource  # Menus refreshed from a command or generator
+from dtrhLogger import BasicLogger, LazyLogger  # Custom logging for the application
 from dtrhParser import pJSON        # Custom JSON parsing
+from dtrhCache import cache_path     # Compiled config cache
 from schemap import *  # JSON schemas for STDIN
 import os
 import datetime
@@ -34,15 +43,24 @@ def setup_logger():
     log_directory = datetime.datetime.now().strftime('%Y-%m-%d')
     os.makedirs(log_directory, exist_ok=True)
     log_filepath = os.path.join(log_directory, log_filename)
-    logger = BasicLogger('MainLogger', output_file=log_filepath, rich_output=False)
+    # Async mode keeps file writes off the curses loop; edits to dtrhLogger.yaml apply while the menu runs
+    logger = BasicLogger('MainLogger', output_file=log_filepath, rich_output=False, async_mode=True, watch=True)
     return logger
 
-logger = setup_logger()
+logger = LazyLogger(setup_logger)  # Created on first use, so importing dtrhMenu has no side effects
+
+STREAM_CHUNK_SIZE = 1 << 16  # Bytes read from STDIN per call
+MAX_FPS = 60  # Frame rate cap; events arriving faster are coalesced into one frame
+SPINNER = "|/-\\"  # Progress row animation for jobs that don't report progress
+SPINNER_INTERVAL = 0.1  # Seconds between spinner frames
+
+builtin_actions = ActionRegistry()  # Menu methods register themselves below; config plugins layer on top
+builtin_actions.register('shell', run_shell, run=THREAD)
 
 class Menu:
     def __init__(self, config):
         self.logger = logger
-        self.logger.debug(f"Entering __init__ - Arguments passed: config={config}")
+        self.logger.debug("Entering __init__ - Arguments passed: config=%s", config)
         self.config = config  # Configuration data for the menu
         self.current_menu = 'main'
         self.menus = {'main': config}
@@ -51,30 +69,70 @@ class Menu:
         self.selected_index = 0  # Index of the currently selected menu item
         self.history = []  # History of menu navigation for back functionality
         self.data_changed = True  # Flag to indicate if data has changed and needs refreshing
+        self.renderer = RowRenderer()  # Remembers the last frame so only changed rows are redrawn
+        self.viewports = {}  # Per-menu scroll offset and remembered selection
+        self.page_size = 1  # Items visible at once, updated on every draw
+        self.item_state = None  # (count, complete) of the items last drawn, to notice streamed growth
+        self.indexes = {}  # Per-menu label index used by the '/' filter
+        self.filter_query = None  # Text typed after '/', None when not filtering
+        self.filter = None  # FilteredItems view for a non-empty filter query
+        self.actions = ActionRegistry(parent=builtin_actions)  # Action name -> handler, including config plugins
+        self.actions.load_plugins(config.get('actions', {}))
+        self.runner = None  # ActionRunner for background actions, created on first use
+        self.job_message = None  # Outcome of the last finished job, shown until the next key
+        self.loop = None  # EventLoop while run() is active
+        self.sources = {}  # Menu id -> LiveSource for menus with a "source"
+        self.spinner_scheduled = False
 
         # Setup submenus if provided in configuration
         if 'submenus' in config:
             for submenu_key, submenu_config in config['submenus'].items():
                 self.menus[submenu_key] = submenu_config
 
+        # Live menus: items come from a source and are diffed in place on every refresh
+        for menu_id, menu in list(self.menus.items()):
+            if 'source' in menu:
+                items = LiveItems(menu.get('menu_items', []))
+                self.menus[menu_id] = dict(menu, menu_items=items)
+                self.sources[menu_id] = LiveSource(menu['source'], items)
+
+        self.item_index(self.current_menu)  # Start indexing the main menu right away
         self.logger.debug("Exiting __init__")
 
     def get_menu_title(self):
-        self.logger.debug("Entering get_menu_title")
+        debug = self.logger.is_enabled_for(logging.DEBUG)  # Hot path: skip logging entirely when DEBUG is off
+        if debug:
+            self.logger.debug("Entering get_menu_title")
         menu = self.menus[self.current_menu]  # Access current menu data
         title = self.config.get('menu_title', 'Menu')  # Default to 'Menu' if no title provided
-        self.logger.debug(f"Exiting get_menu_title - Return: {title}")
+        if debug:
+            self.logger.debug("Exiting get_menu_title - Return: %s", title)
         return title
 
     def get_menu_items(self):
-        self.logger.debug("Entering get_menu_items")
+        debug = self.logger.is_enabled_for(logging.DEBUG)  # Hot path: skip logging entirely when DEBUG is off
+        if debug:
+            self.logger.debug("Entering get_menu_items")
         menu = self.menus[self.current_menu]  # Access current menu data
-        items = menu['menu_items']  # Retrieve menu items
-        self.logger.debug(f"Exiting get_menu_items - Return: {items}")
+        items = self.filter if self.filter is not None else menu['menu_items']  # Retrieve (filtered) menu items
+        if debug:
+            self.logger.debug("Exiting get_menu_items - Return: %s", items)
         return items
 
+    def item_index(self, menu_id):
+        index = self.indexes.get(menu_id)
+        if index is None:
+            index = self.indexes[menu_id] = ItemIndex(self.menus[menu_id]['menu_items'])
+            index.build_in_background()
+        return index
+
+    def viewport(self):
+        return self.viewports.setdefault(self.current_menu, Viewport())
+
     def display(self, stdscr):
-        self.logger.debug("Entering display")
+        debug = self.logger.is_enabled_for(logging.DEBUG)
+        if debug:
+            self.logger.debug("Entering display")
         if not self.theme:
             # Initialize theme if not already set
             default_theme = {
@@ -82,78 +140,319 @@ class Menu:
                 "normal_color": "white"
             }
             self.theme = ThemeManager(self.config.get('theme', default_theme))
-        curses.curs_set(0)  # Hide the cursor in the terminal
+            try:
+                curses.curs_set(0)  # Hide the cursor in the terminal
+            except curses.error:
+                pass  # Terminal can't hide it (e.g. vt100)
 
         if self.data_changed:
-            stdscr.clear()  # Clear the screen for fresh rendering
             h, w = stdscr.getmaxyx()  # Get terminal dimensions
             title = self.get_menu_title()  # Get the menu title
-            x = w // 2 - len(title) // 2  # Calculate center position for title
-            y = h // 2 - len(self.get_menu_items()) // 2 - 1  # Calculate start position for items
-            stdscr.addstr(y, x, title, curses.A_BOLD)  # Display title
+            items = self.get_menu_items()
+            total = len(items)
+            complete = getattr(items, 'complete', True)
+            self.item_state = (total, complete)
+            status = []  # Shown next to the title
+            footer = []  # Bottom rows: job progress, then the filter prompt
+            job_status = self.job_status()
+            if job_status:
+                footer.append(job_status)
+            if self.filter_query is not None:
+                found = f"{total}{'' if complete else '+'} matches" if self.filter is not None else "type to filter"
+                footer.append(f"/{self.filter_query}  ({found})")
+            rows = h - 2 - len(footer)
+            if total <= rows:
+                # Everything fits: centre the menu as before, but keep it clear of the footer
+                top = max(1, min(h // 2 - total // 2, h - len(footer) - 1 - total))  # Title row is top - 1
+                visible = range(total)
+                self.page_size = max(1, total)
+            else:
+                # Too long for the screen: title on the first row and a scrolling window below it
+                top = 1
+                self.page_size = max(1, rows)
+                visible = self.viewport().follow(self.selected_index, total, rows)
+                status.append(f"{self.selected_index + 1}/{total}")
+            if not complete and self.filter is None:
+                status.append("loading")
+            source = self.sources.get(self.current_menu)
+            if source is not None and source.error is not None:
+                status.append("refresh failed")
+            if status:
+                title = f"{title} ({', '.join(status)})"
+            frame = {top - 1: (w // 2 - len(title) // 2, title, curses.A_BOLD)}  # Title row
+            highlight = self.theme.get_color('highlight_color')
 
-            # Iterate through menu items and display them
-            for idx, item in enumerate(self.get_menu_items()):
+            # Build the desired frame from the visible slice only; the renderer repaints rows that changed
+            for idx in visible:
+                item = items[idx]
                 label = item['label']  # Menu item label
-                x = w // 2 - len(label) // 2  # Center align label
-                y = h // 2 - len(self.get_menu_items()) // 2 + idx + 1  # Position items vertically
                 if idx == self.selected_index:
-                    # Highlight the selected item
-                    stdscr.attron(self.theme.get_color('highlight_color'))
-                    stdscr.addstr(y, x, label)
-                    stdscr.attroff(self.theme.get_color('highlight_color'))
+                    attr = highlight  # Highlight the selected item
                 else:
-                    stdscr.addstr(y, x, label)
+                    style = item.get('style')
+                    attr = self.theme.item_style(style) if style else curses.A_NORMAL
+                frame[top + idx - visible.start + 1] = (w // 2 - len(label) // 2, label, attr)
+
+            for i, text in enumerate(footer):
+                frame[h - len(footer) + i] = (0, text, curses.A_NORMAL)
 
-            stdscr.refresh()  # Refresh the screen to display changes
+            self.renderer.draw(stdscr, frame)
             self.data_changed = False  # Reset change flag
-        self.logger.debug("Exiting display")
+        if debug:
+            self.logger.debug("Exiting display")
 
     def run(self, stdscr):
         self.logger.debug("Entering run")
-        while True:
-            self.display(stdscr)  # Display the menu
-            key = stdscr.getch()  # Wait for user input
+        if hasattr(curses, 'set_escdelay'):
+            curses.set_escdelay(25)  # Esc leaves filter mode without the default one second delay
+        self.loop = EventLoop(stdscr, max_fps=self.config.get('max_fps', MAX_FPS))
+        # Producers wake the loop instead of the loop polling them
+        main_items = self.menus['main']['menu_items']
+        if hasattr(main_items, 'notify'):
+            main_items.notify = self.loop.wake
+        self.action_runner().notify = self.loop.wake
+        for source in self.sources.values():
+            source.notify = self.loop.wake
+        if self.current_menu in self.sources:
+            self.sources[self.current_menu].activate()
+        try:
+            self.loop.run(self)  # Handle keys, timers and wake-ups until an action exits
+        finally:
+            self.logger.debug("Event loop stats: %s", self.loop.stats)
+            self.logger.debug("Exiting run")
 
-            # Handle navigation and interactions
-            if key == curses.KEY_UP and self.selected_index > 0:
-                self.selected_index -= 1  # Move selection up
-                self.data_changed = True  # Mark data as changed
-            elif key == curses.KEY_DOWN and self.selected_index < len(self.get_menu_items()) - 1:
-                self.selected_index += 1  # Move selection down
-                self.data_changed = True  # Mark data as changed
-            elif key == curses.KEY_ENTER or key in [10, 13]:
-                self.execute_action(self.get_menu_items()[self.selected_index]['action'], stdscr)  # Execute action
-        self.logger.debug("Exiting run")
+    def handle_events(self):
+        # The event loop was woken by a producer: collect job results, live snapshots and streamed items
+        self.poll_actions()
+        self.apply_sources()
+        self.check_items()
 
-    def execute_action(self, action, stdscr):
-        self.logger.debug(f"Entering execute_action - Arguments passed: action={action}")
-        item = self.get_menu_items()[self.selected_index]  # Get the selected item
-        if action == "start_game":
-            self.logger.info("Starting game...")
-        elif action == "exit":
-            self.logger.info("Exiting...")
-            sys.exit(0)
-        elif action == "submenu":
-            submenu_id = item['submenu']  # Navigate to submenu
-            self.history.append(self.current_menu)  # Save current menu to history
-            self.current_menu = submenu_id  # Update current menu
+    def apply_sources(self):
+        for menu_id, source in self.sources.items():
+            change = source.take()  # Already diffed on the fetch thread
+            if source.error is not None and menu_id == self.current_menu:
+                self.data_changed = True  # Title shows that refreshing failed
+            if change is None:
+                continue
+            items = self.menus[menu_id]['menu_items']
+            current = menu_id == self.current_menu
+            selected_id = None
+            if current and self.filter is None and len(items):
+                selected_id = items[self.selected_index].get('id', items[self.selected_index].get('label'))
+            inserted, removed, changed, moved = items.commit(change)
+            if not (inserted or removed or changed or moved):
+                continue
+            self.logger.debug("Source for %s: %d inserted, %d removed, %d changed", menu_id, inserted, removed, changed)
+            self.indexes.pop(menu_id, None)  # The filter index is rebuilt on next use
+            if not current:
+                continue
+            if self.filter is not None:
+                # Re-run the query from scratch (the previous matches refer to the old items), staying on the same row
+                selected = self.selected_index
+                self.filter = None
+                self.set_filter(self.filter_query)
+                self.selected_index = min(selected, max(0, len(self.filter) - 1))
+            elif selected_id is not None:
+                # Keep the same item selected wherever it moved; if it's gone, stay at the same row
+                self.selected_index = items.positions.get(selected_id, min(self.selected_index, max(0, len(items) - 1)))
+            self.data_changed = True  # The renderer only rewrites the rows that differ
+
+    def idle(self):
+        # Background work between events; returns True while there is more to do
+        items = self.get_menu_items()
+        if hasattr(items, 'advance') and not items.complete:
+            more = items.advance()  # Keep verifying filter matches in bounded batches
+            self.check_items()
+            return more  # False while waiting for streamed items: their wake-up calls idle() again
+        return False
+
+    def check_items(self):
+        # Redraw only if items arrived or finished loading since the last frame
+        items = self.get_menu_items()
+        if (len(items), getattr(items, 'complete', True)) != self.item_state:
+            self.data_changed = True
+
+    def spin(self):
+        self.spinner_scheduled = False
+        self.poll_actions()
+
+    def handle_key(self, key, stdscr):
+        if self.job_message is not None:
+            self.job_message = None  # A finished job's outcome stays up until the next key
+            self.data_changed = True
+        if self.filter_query is not None and self.handle_filter_key(key):
+            return
+        if key == ord('c') and self.runner is not None and self.runner.running():
+            self.cancel_job()
+        elif key == ord('r') and self.current_menu in self.sources:
+            self.sources[self.current_menu].refresh()  # Refresh a live menu now
+        elif key == ord('/'):
+            self.filter_query = ''  # Enter filter mode
+            self.data_changed = True
+        elif key == curses.KEY_UP and self.selected_index > 0:
+            self.selected_index -= 1  # Move selection up
             self.data_changed = True  # Mark data as changed
-        elif action == "back":
-            self.current_menu = self.history.pop()  # Go back to previous menu
+        elif key == curses.KEY_DOWN and self.selected_index < len(self.get_menu_items()) - 1:
+            self.selected_index += 1  # Move selection down
             self.data_changed = True  # Mark data as changed
-        elif action == "input":
-            self.handle_input(item, stdscr)  # Handle user input
-        elif action == "multiple_select":
-            self.handle_multiple_select(item, stdscr)  # Handle multiple selections
-        elif action == "checkbox":
-            self.handle_checkbox(item, stdscr)  # Handle checkboxes
-        elif action == "radio":
-            self.handle_radio(item, stdscr)  # Handle radio buttons
+        elif (key == curses.KEY_ENTER or key in [10, 13]) and len(self.get_menu_items()):
+            self.execute_action(self.get_menu_items()[self.selected_index]['action'], stdscr)  # Execute action
+        elif key == curses.KEY_NPAGE:
+            self.select(self.selected_index + self.page_size)
+        elif key == curses.KEY_PPAGE:
+            self.select(self.selected_index - self.page_size)
+        elif key == curses.KEY_HOME:
+            self.select(0)
+        elif key == curses.KEY_END:
+            self.select(len(self.get_menu_items()) - 1)
+        elif key == curses.KEY_RESIZE:
+            self.data_changed = True  # Renderer repaints everything when the size changes
+
+    def handle_filter_key(self, key):
+        # Returns True if the key edited the filter; anything else falls through to navigation
+        if key == 27:  # Esc: leave filter mode, keeping the selected item selected
+            if self.filter is not None and len(self.filter):
+                self.selected_index = self.filter.matches[self.selected_index]
+            else:
+                self.selected_index = 0
+            self.filter_query = None
+            self.filter = None
+        elif key in (curses.KEY_BACKSPACE, 127, 8):
+            self.set_filter(self.filter_query[:-1])
+        elif 32 <= key < 127:
+            self.set_filter(self.filter_query + chr(key))
+        else:
+            return False
+        self.data_changed = True
+        return True
+
+    def set_filter(self, query):
+        self.filter_query = query
+        self.selected_index = 0
+        if not query:
+            self.filter = None
+            return
+        items = self.menus[self.current_menu]['menu_items']
+        self.filter = FilteredItems(items, self.item_index(self.current_menu), query, previous=self.filter)
+        self.filter.advance(wanted=self.page_size)  # Just enough for the first screen; the rest while idle
+
+    def select(self, index):
+        index = max(0, min(index, len(self.get_menu_items()) - 1))
+        if index != self.selected_index:
+            self.selected_index = index
+            self.data_changed = True
+
+    def switch_menu(self, menu_id):
+        # Remember where we were in this menu and restore the target menu's position
+        if self.filter is not None and len(self.filter):
+            self.selected_index = self.filter.matches[self.selected_index]
+        self.filter_query = None
+        self.filter = None
+        self.viewport().selected = self.selected_index
+        if self.current_menu in self.sources:
+            self.sources[self.current_menu].deactivate()  # Only the visible live menu refreshes
+        self.current_menu = menu_id
+        if menu_id in self.sources and self.loop is not None:
+            self.sources[menu_id].activate()
+        # Live menus may have shrunk since this position was remembered
+        self.selected_index = max(0, min(self.viewport().selected, len(self.menus[menu_id]['menu_items']) - 1))
+        self.data_changed = True  # Mark data as changed
+
+    def execute_action(self, action, stdscr):
+        self.logger.debug("Entering execute_action - Arguments passed: action=%s", action)
+        items = self.get_menu_items()
+        if not len(items):
+            return  # Nothing to act on: the filter matches nothing, or the source is empty
+        item = items[self.selected_index]  # Get the selected item
+        registered = self.actions.get(action)
+        if registered is None:
+            self.logger.debug("No handler registered for action %s", action)
+        elif registered.background:
+            job = self.action_runner().submit(registered, item)  # Returns at once; the result arrives via poll_actions
+            self.logger.info("Started action %s as job %d (%s)", action, job.id, registered.run)
+            self.poll_actions()  # Shows the progress row and starts the spinner
+        else:
+            registered.handler(self, item, stdscr)
+            self.renderer.invalidate()  # Inline handlers may have drawn over the menu
+            self.data_changed = True
         self.logger.debug("Exiting execute_action")
 
+    def action_runner(self):
+        if self.runner is None:
+            self.runner = ActionRunner(workers=self.config.get('action_workers', 4))
+        return self.runner
+
+    def poll_actions(self):
+        if self.runner is None:
+            return
+        for job in self.runner.poll():
+            if job.state == 'done':
+                self.logger.info("Job %d (%s) finished: %s", job.id, job.action.name, job.result)
+                self.job_message = f"{job.label}: done" + (f" ({job.result})" if job.result not in (None, '') else '')
+            elif job.state == 'failed':
+                self.logger.error("Job %d (%s) failed: %s", job.id, job.action.name, job.error)
+                self.job_message = f"{job.label}: failed ({job.error})"
+            else:
+                self.logger.info("Job %d (%s) cancelled", job.id, job.action.name)
+                self.job_message = f"{job.label}: cancelled"
+            self.data_changed = True
+        if self.runner.running():
+            self.data_changed = True  # Keep the progress row moving
+            if self.loop is not None and not self.spinner_scheduled:
+                self.spinner_scheduled = True
+                self.loop.call_later(SPINNER_INTERVAL, self.spin)
+
+    def job_status(self):
+        # Text of the progress row: the newest running job, or the outcome of the last one
+        jobs = self.runner.jobs if self.runner is not None else []
+        if not jobs:
+            return self.job_message
+        job = jobs[-1]
+        if job.progress is not None:
+            text = f"{job.progress:4.0%} {job.label}"
+        else:
+            text = f"{SPINNER[int(time.monotonic() * 10) % len(SPINNER)]} {job.label}"
+        if job.cancelled:
+            text += " (cancelling)"
+        elif job.message:
+            text += f": {job.message}"
+        if len(jobs) > 1:
+            text += f"  (+{len(jobs) - 1} running)"
+        return f"{text}  [c: cancel]"
+
+    def cancel_job(self):
+        # Cancel the newest job that isn't already being cancelled
+        for job in reversed(self.runner.jobs):
+            if not job.cancelled:
+                self.logger.info("Cancelling job %d (%s)", job.id, job.action.name)
+                job.cancel()
+                self.data_changed = True
+                return
+
+    @builtin_actions.register('start_game')
+    def start_game(self, item, stdscr):
+        self.logger.info("Starting game...")
+
+    @builtin_actions.register('exit')
+    def exit_menu(self, item, stdscr):
+        self.logger.info("Exiting...")
+        if self.runner is not None:
+            self.runner.shutdown()
+        sys.exit(0)
+
+    @builtin_actions.register('submenu')
+    def enter_submenu(self, item, stdscr):
+        submenu_id = item['submenu']  # Navigate to submenu
+        self.history.append(self.current_menu)  # Save current menu to history
+        self.switch_menu(submenu_id)  # Update current menu
+
+    @builtin_actions.register('back')
+    def go_back(self, item, stdscr):
+        self.switch_menu(self.history.pop())  # Go back to previous menu
+
+    @builtin_actions.register('input')
     def handle_input(self, item, stdscr):
-        self.logger.debug(f"Entering handle_input - Arguments passed: item={item}")
+        self.logger.debug("Entering handle_input - Arguments passed: item=%s", item)
         curses.echo()  # Enable echoing of typed characters
         stdscr.clear()  # Clear the screen
         h, w = stdscr.getmaxyx()  # Get terminal dimensions
@@ -162,28 +461,28 @@ class Menu:
         stdscr.refresh()  # Refresh screen
         input_value = stdscr.getstr(h // 2, w // 2 + len(prompt) // 2).decode('utf-8')  # Capture input
         curses.noecho()  # Disable echoing
-        self.logger.debug(f"Input received: {input_value}")
+        self.logger.debug("Input received: %s", input_value)
         self.logger.debug("Exiting handle_input")
 
+    def draw_options(self, stdscr, renderer, texts, idx):
+        h, w = stdscr.getmaxyx()  # Get terminal dimensions
+        highlight = self.theme.get_color('highlight_color')
+        frame = {}
+        for i, text in enumerate(texts):
+            y = h // 2 - len(texts) // 2 + i  # Position option
+            attr = highlight if i == idx else curses.A_NORMAL  # Highlight current option
+            frame[y] = (w // 2 - len(text) // 2, text, attr)  # Center align option
+        renderer.draw(stdscr, frame)
+
+    @builtin_actions.register('multiple_select')
     def handle_multiple_select(self, item, stdscr):
-        self.logger.debug(f"Entering handle_multiple_select - Arguments passed: item={item}")
+        self.logger.debug("Entering handle_multiple_select - Arguments passed: item=%s", item)
         options = item['options']  # Get available options
         selected_options = []  # Store selected options
         idx = 0  # Index of the current selection
+        renderer = RowRenderer()  # Only the rows whose highlight changes are redrawn
         while True:
-            stdscr.clear()  # Clear screen
-            h, w = stdscr.getmaxyx()  # Get terminal dimensions
-            for i, option in enumerate(options):
-                x = w // 2 - len(option) // 2  # Center align option
-                y = h // 2 - len(options) // 2 + i  # Position option
-                if i == idx:
-                    # Highlight current option
-                    stdscr.attron(self.theme.get_color('highlight_color'))
-                    stdscr.addstr(y, x, option)
-                    stdscr.attroff(self.theme.get_color('highlight_color'))
-                else:
-                    stdscr.addstr(y, x, option)
-            stdscr.refresh()  # Refresh screen
+            self.draw_options(stdscr, renderer, options, idx)
             key = stdscr.getch()  # Wait for user input
             if key == curses.KEY_UP and idx > 0:
                 idx -= 1  # Move selection up
@@ -192,30 +491,20 @@ class Menu:
             elif key == curses.KEY_ENTER or key in [10, 13]:
                 selected_options.append(options[idx])  # Add selected option
                 break
-        self.logger.debug(f"Selected options: {selected_options}")
+        self.logger.debug("Selected options: %s", selected_options)
         self.logger.debug("Exiting handle_multiple_select")
 
+    @builtin_actions.register('checkbox')
     def handle_checkbox(self, item, stdscr):
-        self.logger.debug(f"Entering handle_checkbox - Arguments passed: item={item}")
+        self.logger.debug("Entering handle_checkbox - Arguments passed: item=%s", item)
         options = item['options']  # Get checkbox options
         selected_options = [False] * len(options)  # Initialize selection states
         idx = 0  # Index of the current selection
+        renderer = RowRenderer()  # Only toggled or re-highlighted rows are redrawn
         while True:
-            stdscr.clear()  # Clear screen
-            h, w = stdscr.getmaxyx()  # Get terminal dimensions
-            for i, option in enumerate(options):
-                x = w // 2 - len(option) // 2  # Center align option
-                y = h // 2 - len(options) // 2 + i  # Position option
-                checkbox = '[X]' if selected_options[i] else '[ ]'  # Checkbox state
-                display_text = f"{checkbox} {option}"  # Display text with checkbox
-                if i == idx:
-                    # Highlight current option
-                    stdscr.attron(self.theme.get_color('highlight_color'))
-                    stdscr.addstr(y, x, display_text)
-                    stdscr.attroff(self.theme.get_color('highlight_color'))
-                else:
-                    stdscr.addstr(y, x, display_text)
-            stdscr.refresh()  # Refresh screen
+            # Display text with checkbox state
+            texts = [f"{'[X]' if selected_options[i] else '[ ]'} {option}" for i, option in enumerate(options)]
+            self.draw_options(stdscr, renderer, texts, idx)
             key = stdscr.getch()  # Wait for user input
             if key == curses.KEY_UP and idx > 0:
                 idx -= 1  # Move selection up
@@ -223,30 +512,20 @@ class Menu:
                 idx += 1  # Move selection down
             elif key == curses.KEY_ENTER or key in [10, 13]:
                 selected_options[idx] = not selected_options[idx]  # Toggle selection state
-        self.logger.debug(f"Checkbox selections: {selected_options}")
+        self.logger.debug("Checkbox selections: %s", selected_options)
         self.logger.debug("Exiting handle_checkbox")
 
+    @builtin_actions.register('radio')
     def handle_radio(self, item, stdscr):
-        self.logger.debug(f"Entering handle_radio - Arguments passed: item={item}")
+        self.logger.debug("Entering handle_radio - Arguments passed: item=%s", item)
         options = item['options']  # Get radio button options
         selected_option = 0  # Index of the selected option
         idx = 0  # Index of the current selection
+        renderer = RowRenderer()  # Only rows whose selection or highlight changed are redrawn
         while True:
-            stdscr.clear()  # Clear screen
-            h, w = stdscr.getmaxyx()  # Get terminal dimensions
-            for i, option in enumerate(options):
-                x = w // 2 - len(option) // 2  # Center align option
-                y = h // 2 - len(options) // 2 + i  # Position option
-                radio = '(O)' if i == selected_option else '( )'  # Radio button state
-                display_text = f"{radio} {option}"  # Display text with radio button
-                if i == idx:
-                    # Highlight current option
-                    stdscr.attron(self.theme.get_color('highlight_color'))
-                    stdscr.addstr(y, x, display_text)
-                    stdscr.attroff(self.theme.get_color('highlight_color'))
-                else:
-                    stdscr.addstr(y, x, display_text)
-            stdscr.refresh()  # Refresh screen
+            # Display text with radio button state
+            texts = [f"{'(O)' if i == selected_option else '( )'} {option}" for i, option in enumerate(options)]
+            self.draw_options(stdscr, renderer, texts, idx)
             key = stdscr.getch()  # Wait for user input
             if key == curses.KEY_UP and idx > 0:
                 idx -= 1  # Move selection up
@@ -254,44 +533,97 @@ class Menu:
                 idx += 1  # Move selection down
             elif key == curses.KEY_ENTER or key in [10, 13]:
                 selected_option = idx  # Select the current option
-        self.logger.debug(f"Radio selection: {selected_option}")
+        self.logger.debug("Radio selection: %s", selected_option)
         self.logger.debug("Exiting handle_radio")
 
-def read_and_convert_input(queue):
+def read_and_convert_input(queue, stream=None, screenful=None):
+    # Runs on the reader thread: a failure goes on the queue for main() to report,
+    # instead of leaving it waiting for a parser that never comes
+    try:
+        convert_input(queue, stream, screenful)
+    except Exception as e:
+        logger.error("Reading the menu from STDIN failed: %s", e)
+        queue.put(e)
+
+def convert_input(queue, stream=None, screenful=None):
+    logger.debug("Entering read_and_convert_input")
     parser = pJSON()  # JSON parser instance
-    parser.logger.debug("Entering read_and_convert_input")
-    input_data = sys.stdin.read()  # Read input from STDIN
-    sys.stdin.close()  # Close STDIN to signal end of input
+    stream = stream or sys.stdin.buffer
+    if screenful is None:
+        import shutil
+        screenful = shutil.get_terminal_size().lines
+    chunk = stream.read1(STREAM_CHUNK_SIZE)
+
+    if chunk.lstrip()[:1] == b'{':
+        # JSON has to be parsed whole
+        input_data = chunk + stream.read()
+        try:
+            parser.data = json.loads(input_data)  # Attempt to parse input as JSON
+        except json.JSONDecodeError:
+            # Convert non-JSON input to a line menu
+            items = LineItems()
+            items.feed(input_data)
+            items.finish()
+            parser.data = {"menu_title": "Dynamic Menu", "menu_items": items}
+        stream.close()
+        queue.put(parser)  # Enqueue the parser instance
+        logger.debug("Exiting read_and_convert_input")
+        return
+
+    # Line-oriented input is streamed: the menu is handed over after the first
+    # screenful of lines and keeps growing while the rest arrives
+    items = LineItems()
+    parser.data = {"menu_title": "Dynamic Menu", "menu_items": items}
+    published = False
+    try:
+        while chunk:
+            items.feed(chunk)
+            if not published and len(items) >= screenful:
+                queue.put(parser)
+                published = True
+            chunk = stream.read1(STREAM_CHUNK_SIZE)
+    finally:
+        items.finish()  # A menu already on screen keeps the lines read before a failure
+    stream.close()  # Close STDIN to signal end of input
+    if not published:
+        queue.put(parser)
+    logger.debug("Exiting read_and_convert_input")
+
+def attach_terminal():
+    # Hand the piped STDIN to the reader and point fd 0 at the terminal so curses can read keys
+    stream = os.fdopen(os.dup(0), 'rb')
     try:
-        data = json.loads(input_data)  # Attempt to parse input as JSON
-    except json.JSONDecodeError:
-        # Convert non-JSON input to JSON format
-        lines = input_data.strip().split("\n")
-        data = {
-            "menu_title": "Dynamic Menu",
-            "menu_items": [{"label": line, "action": "none"} for line in lines]
-        }
-
-    parser.data = data  # Store parsed data
-    queue.put(parser)  # Enqueue the parser instance
-    parser.logger.debug("Exiting read_and_convert_input")
+        tty = os.open('/dev/tty', os.O_RDONLY)
+    except OSError:
+        return stream  # No controlling terminal; curses keeps the pipe as before
+    os.dup2(tty, 0)
+    os.close(tty)
+    return stream
 
 def main():
     global logger  # Ensure we use the global logger
     logger.debug("Entering main")
     input_queue = Queue()  # Queue for threading communication
+    if len(sys.argv) > 2 and sys.argv[1] == '--rebuild-cache':
+        # Recompile the cached form of each configuration file and exit
+        for config_file in sys.argv[2:]:
+            pJSON().read_compiled(config_file, menu_schema, rebuild=True)
+            print(f"{config_file}: {'rebuilt' if os.path.exists(cache_path(config_file)) else 'not cached (see log)'}")
+        return
     if len(sys.argv) > 1:
-        # If configuration file is provided as an argument
+        # If configuration file is provided as an argument, read it parsed and validated (cached)
         parser = pJSON()
-        config = parser.read_from_file(sys.argv[1])  # Read configuration file
-        parser.validate_json(menu_schema)  # Validate against schema
+        parser.read_compiled(sys.argv[1], menu_schema)
     else:
-        # Otherwise, read from STDIN
-        input_thread = threading.Thread(target=read_and_convert_input, args=(input_queue,))
+        # Otherwise, read from STDIN on a background thread
+        stream = attach_terminal() if not sys.stdin.isatty() else sys.stdin.buffer
+        input_thread = threading.Thread(target=read_and_convert_input, args=(input_queue, stream), daemon=True)
         input_thread.start()
-        input_thread.join()
-        parser = input_queue.get()  # Get parsed data from queue
-        parser.validate_json(stdin_schema)  # Validate against schema
+        parser = input_queue.get()  # Wait for the first screenful (or the whole JSON document)
+        if isinstance(parser, Exception):
+            sys.exit(f"dtrhMenu: could not read the menu from STDIN: {parser}")
+        if not isinstance(parser.data.get('menu_items'), LineItems):
+            parser.validate_json(stdin_schema)  # Validate against schema
 
     if parser.data:
         menu = Menu(parser.data)  # Initialize menu with parsed data
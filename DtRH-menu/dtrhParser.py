@@ -1,7 +1,8 @@
 import json
 import sys
 import logging
-from jsonschema import validate, ValidationError
+from dtrhValidate import validator_for, MenuValidationError, VALIDATOR_VERSION
+from dtrhCache import ConfigCache, schema_key
 
 # Assuming dtrhMenu.py sets up the logger and we can import it here
 logger = logging.getLogger('MainLogger')
@@ -24,6 +25,33 @@ class pJSON:
         except Exception as e:
             logger.error(f"An error occurred: {e}")
 
+    def read_compiled(self, file_path, schema, rebuild=False):
+        """Read and validate JSON from a file through the compiled config cache.
+
+        An unchanged file is loaded from its .dtrhc cache without JSON parsing or
+        schema validation. Files that fail validation are logged, returned as
+        before, and never cached.
+        """
+        def compile(source):
+            self.data = json.loads(source)
+            validator_for(schema).validate(self.data)
+            return self.data
+
+        cache = ConfigCache(file_path, compile, key=schema_key(schema) + VALIDATOR_VERSION)
+        try:
+            self.data = cache.rebuild() if rebuild else cache.load()
+            logger.info(f"Successfully read JSON from file: {file_path} (cache {cache.status})")
+            return self.data
+        except FileNotFoundError:
+            logger.error("File not found.")
+        except json.JSONDecodeError as e:
+            logger.error(f"Error decoding JSON: {e}")
+        except MenuValidationError as e:
+            self.log_validation_errors(e.errors)
+            return self.data
+        except Exception as e:
+            logger.error(f"An error occurred: {e}")
+
     def read_from_stdin(self):
         """Read JSON data from standard input."""
         try:
@@ -64,14 +92,21 @@ class pJSON:
             logger.warning("No data to print.")
 
     def validate_json(self, schema):
-        """Validate JSON data against a provided schema."""
+        """Validate JSON data against a provided schema, including submenus and their references."""
         if self.data is not None:
             try:
-                validate(instance=self.data, schema=schema)
-                logger.info("JSON is valid.")
-            except ValidationError as e:
-                logger.error(f"JSON validation error: {e}")
+                errors = validator_for(schema).errors(self.data)
+                if not errors:
+                    logger.info("JSON is valid.")
+                    return True
+                self.log_validation_errors(errors)
             except Exception as e:
                 logger.error(f"An error occurred: {e}")
         else:
             logger.warning("No data to validate.")
+        return False
+
+    def log_validation_errors(self, errors):
+        logger.error(f"JSON validation failed with {len(errors)} error(s):")
+        for path, message in errors:
+            logger.error(f"  {path}: {message}")
@@ -0,0 +1,78 @@
+import curses
+
+class RowRenderer:
+    """Row-level diff renderer for curses windows.
+
+    A frame is a dict mapping a screen row to an (x, text, attr) tuple. draw()
+    compares it with the previously drawn frame and only rewrites rows whose
+    content or attribute changed, then batches the output with
+    noutrefresh()/doupdate().
+    """
+
+    def __init__(self):
+        self.rows = {}  # Last frame that was drawn
+        self.size = None  # Terminal size the last frame was drawn at
+        self.doupdate = curses.doupdate
+
+    def invalidate(self):
+        """Force a full repaint on the next draw (e.g. after something else drew on the window)."""
+        self.rows = {}
+        self.size = None
+
+    def draw(self, stdscr, frame):
+        h, w = stdscr.getmaxyx()
+        if (h, w) != self.size:
+            # Resized or invalidated: nothing on screen can be trusted
+            stdscr.erase()
+            self.rows = {}
+            self.size = (h, w)
+
+        for y in self.rows.keys() - frame.keys():
+            self.clear_row(stdscr, y, h)
+        for y, row in frame.items():
+            if self.rows.get(y) != row:
+                self.clear_row(stdscr, y, h)
+                self.draw_row(stdscr, y, row, h, w)
+
+        self.rows = frame
+        stdscr.noutrefresh()
+        self.doupdate()
+
+    def clear_row(self, stdscr, y, h):
+        if 0 <= y < h:
+            stdscr.move(y, 0)
+            stdscr.clrtoeol()
+
+    def draw_row(self, stdscr, y, row, h, w):
+        x, text, attr = row
+        if not 0 <= y < h:
+            return
+        x = max(0, x)
+        text = text[:max(0, w - x)]
+        try:
+            stdscr.addstr(y, x, text, attr)
+        except curses.error:
+            pass  # Writing the bottom-right cell moves the cursor off-screen; the text is still drawn
+
+
+class Viewport:
+    """Scroll state for one menu: the selected index and the first visible row.
+
+    follow() only does constant work, so scrolling costs the same for ten
+    items as for a million.
+    """
+
+    def __init__(self):
+        self.offset = 0  # Index of the first visible item
+        self.selected = 0  # Selection remembered while another menu is shown
+
+    def follow(self, selected, total, page):
+        """Scroll just enough to keep `selected` visible and return the visible index range."""
+        if page <= 0:
+            return range(0)
+        if selected < self.offset:
+            self.offset = selected
+        elif selected >= self.offset + page:
+            self.offset = selected - page + 1
+        self.offset = max(0, min(self.offset, total - page))
+        return range(self.offset, min(total, self.offset + page))
@@ -0,0 +1,63 @@
+from array import array
+
+class LineItems:
+    """Menu items for line-oriented input, stored compactly.
+
+    All lines live in one shared byte buffer and each item is just the offset
+    of its terminating newline, so memory stays flat (text + 8 bytes per line)
+    instead of one dict per line. Item dicts are built on access. A reader
+    thread may feed() while the menu reads: the buffer is extended before the
+    offsets are published, so readers only ever see complete lines.
+    """
+
+    def __init__(self, action='none'):
+        self.buffer = bytearray()
+        self.ends = array('Q')  # Offset of the newline ending each line
+        self.scanned = 0  # Buffer position up to which newlines have been indexed
+        self.action = action
+        self.complete = False  # Set once the producer has finished
+        self.notify = None  # Called (from the producer thread) after new lines are published
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __repr__(self):
+        return f"<LineItems {len(self.ends)} lines{'' if self.complete else ', loading'}>"
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        count = len(self.ends)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("menu item index out of range")
+        start = self.ends[index - 1] + 1 if index else 0
+        label = self.buffer[start:self.ends[index]].decode('utf-8', 'replace').rstrip('\r')
+        return {"label": label, "action": self.action}
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        find = self.buffer.find
+        position = find(b'\n', self.scanned)
+        while position != -1:
+            self.ends.append(position)
+            position = find(b'\n', position + 1)
+        self.scanned = len(self.buffer)
+        if self.notify is not None:
+            self.notify()
+
+    def finish(self):
+        # Keep a final line without a trailing newline, drop trailing blank lines
+        if len(self.buffer) > (self.ends[-1] + 1 if self.ends else 0):
+            self.buffer += b'\n'
+            self.ends.append(len(self.buffer) - 1)
+        while self.ends and not self.buffer[(self.ends[-2] + 1 if len(self.ends) > 1 else 0):self.ends[-1]].strip():
+            self.ends.pop()
+        self.complete = True
+        if self.notify is not None:
+            self.notify()
@@ -1,36 +1,222 @@
 import curses
+from collections import OrderedDict
+from functools import lru_cache
+
+BASIC_COLORS = {
+    "black": 0, "red": 1, "green": 2, "yellow": 3,
+    "blue": 4, "magenta": 5, "cyan": 6, "white": 7,
+}
+# xterm's RGB values for colors 0-15; 16-255 are the 6x6x6 cube and a grey ramp
+SYSTEM_RGB = (
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0), (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0), (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+)
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+ATTRIBUTES = {
+    "bold": curses.A_BOLD,
+    "dim": curses.A_DIM,
+    "underline": curses.A_UNDERLINE,
+    "reverse": curses.A_REVERSE,
+    "standout": curses.A_STANDOUT,
+    "blink": curses.A_BLINK,
+    "italic": getattr(curses, 'A_ITALIC', 0),  # Missing from older curses builds
+}
+# Theme entries every theme has: name -> (fg, bg, attrs), as the original three fixed pairs
+DEFAULT_STYLES = {
+    "highlight_color": ("cyan", "black", ()),
+    "text_color": ("white", "black", ()),
+    "background_color": ("black", "black", ()),
+}
+
+def attribute_bits(attrs):
+    bits = 0
+    for name in attrs:
+        bits |= ATTRIBUTES.get(name, 0)
+    return bits
+
+def palette_rgb(index):
+    """RGB value of xterm color `index` (0-255)."""
+    if index < 16:
+        return SYSTEM_RGB[index]
+    if index < 232:
+        index -= 16
+        return CUBE_LEVELS[index // 36], CUBE_LEVELS[index // 6 % 6], CUBE_LEVELS[index % 6]
+    level = 8 + 10 * (index - 232)
+    return level, level, level
+
+@lru_cache(maxsize=4096)
+def nearest_color(rgb, colors):
+    """Closest palette index to `rgb` on a terminal with `colors` colors (8, 16, 256...)."""
+    r, g, b = rgb
+    best, best_distance = 0, None
+    for index in range(min(colors, 256)):
+        pr, pg, pb = palette_rgb(index)
+        # Weighted RGB distance: cheap, and close enough to perceived difference for picking a palette entry
+        distance = 2 * (r - pr) ** 2 + 4 * (g - pg) ** 2 + 3 * (b - pb) ** 2
+        if best_distance is None or distance < best_distance:
+            best, best_distance = index, distance
+    return best
+
+def parse_color(spec, colors, fallback):
+    """Map a color name, "#rrggbb"/"#rgb", "default" or a 0-255 index to a color this terminal has."""
+    if isinstance(spec, str):
+        name = spec.lower()
+        if name in BASIC_COLORS:
+            return BASIC_COLORS[name]
+        if name == "default":
+            return -1  # The terminal's own foreground/background (needs use_default_colors)
+        if name.startswith("bright_") and name[7:] in BASIC_COLORS:
+            index = BASIC_COLORS[name[7:]]
+            return index + 8 if colors >= 16 else index
+        if name.startswith("#") and len(name) in (4, 7):
+            digits = name[1:] if len(name) == 7 else "".join(c * 2 for c in name[1:])
+            try:
+                rgb = (int(digits[0:2], 16), int(digits[2:4], 16), int(digits[4:6], 16))
+            except ValueError:
+                return fallback
+            return nearest_color(rgb, colors)
+    elif isinstance(spec, int) and not isinstance(spec, bool) and 0 <= spec < 256:
+        return spec if spec < colors else nearest_color(palette_rgb(spec), colors)
+    return fallback
+
+class ColorPairAllocator:
+    """Hands out curses color pairs on demand.
+
+    Terminals only have COLOR_PAIRS pairs (and color_pair() can only encode
+    256 of them), so once they are used up the least recently used pair is
+    redefined. Pinned pairs (the theme's own styles) are never evicted. A
+    cell still on screen with an evicted pair changes color, which is why
+    the menu asks for every visible row's style on every frame: anything on
+    screen is always more recently used than what gets evicted.
+    """
+
+    def __init__(self, max_pairs=None):
+        if max_pairs is None:
+            max_pairs = min(curses.COLOR_PAIRS, 256)
+        self.max_pairs = max_pairs
+        self.pairs = OrderedDict()  # (fg, bg) -> pair number, least recently used first
+        self.pinned = {}  # (fg, bg) -> pair number
+        self.next_pair = 1  # Pair 0 is the terminal default and can't be changed
+        self.evictions = 0
+
+    def pair(self, fg, bg, pin=False):
+        key = (fg, bg)
+        number = self.pinned.get(key)
+        if number is not None:
+            return number
+        number = self.pairs.get(key)
+        if number is not None:
+            if pin:
+                del self.pairs[key]
+                self.pinned[key] = number
+            else:
+                self.pairs.move_to_end(key)
+            return number
+
+        if self.next_pair < self.max_pairs:
+            number = self.next_pair
+            self.next_pair += 1
+        elif self.pairs:
+            _, number = self.pairs.popitem(last=False)
+            self.evictions += 1
+        else:
+            return 0  # Every pair is pinned: use the terminal's default colors
+        curses.init_pair(number, fg, bg)
+        if pin:
+            self.pinned[key] = number
+        else:
+            self.pairs[key] = number
+        return number
 
 class ThemeManager:
+    """Curses attributes for a theme.
+
+    Each theme entry is a color ("cyan", "#3a7bd5", 208) used as the
+    foreground on black, or an object {"fg": ..., "bg": ..., "attrs": [...]}.
+    All entries are resolved into `color_pairs` (name -> attribute) once, so
+    get_color() is a single lookup. style() covers ad hoc combinations such
+    as per-item styles, caching each one and allocating pairs as needed.
+    """
+
     def __init__(self, theme_config):
         self.theme_config = theme_config
-        self.color_pairs = {}
+        self.color_pairs = {}  # Theme entry name -> attribute
+        self.styles = {}  # (fg, bg, attrs) -> (pair key or None, attribute bits)
         self.init_colors()
 
     def init_colors(self):
-        curses.start_color()
-        # Assign color pair numbers starting from 1 (0 is reserved)
-        self.color_pairs = {
-            "highlight_color": self.init_color_pair(self.theme_config.get('highlight_color', 'cyan'), 'black', 1),
-            "text_color": self.init_color_pair(self.theme_config.get('text_color', 'white'), 'black', 2),
-            "background_color": self.init_color_pair(self.theme_config.get('background_color', 'black'), 'black', 3)
-        }
-
-    def init_color_pair(self, fg, bg, pair_number):
-        color_map = {
-            "black": curses.COLOR_BLACK,
-            "red": curses.COLOR_RED,
-            "green": curses.COLOR_GREEN,
-            "yellow": curses.COLOR_YELLOW,
-            "blue": curses.COLOR_BLUE,
-            "magenta": curses.COLOR_MAGENTA,
-            "cyan": curses.COLOR_CYAN,
-            "white": curses.COLOR_WHITE
-        }
-        fg_color = color_map.get(fg, curses.COLOR_WHITE)
-        bg_color = color_map.get(bg, curses.COLOR_BLACK)
-        curses.init_pair(pair_number, fg_color, bg_color)
-        return curses.color_pair(pair_number)
+        self.colors = 0
+        self.allocator = None
+        self.default_colors = False
+        if curses.has_colors():
+            curses.start_color()
+            self.colors = curses.COLORS
+            if "default" in self.theme_colors():
+                # Only when asked for: it also turns pair 0 (unstyled text) into the terminal's colors
+                try:
+                    curses.use_default_colors()
+                    self.default_colors = True
+                except curses.error:
+                    pass
+            self.allocator = ColorPairAllocator()
+            self.pair_attrs = [curses.color_pair(number) for number in range(self.allocator.max_pairs)]
+
+        names = dict.fromkeys(DEFAULT_STYLES)
+        names.update(dict.fromkeys(self.theme_config))
+        for name in names:
+            fg, bg, attrs = DEFAULT_STYLES.get(name, ("white", "black", ()))
+            spec = self.theme_config.get(name)
+            if isinstance(spec, dict):
+                fg, bg, attrs = spec.get('fg', fg), spec.get('bg', bg), tuple(spec.get('attrs', attrs))
+            elif spec is not None:
+                fg = spec
+            attr = self.resolve(fg, bg, attrs, pin=True)
+            if not self.colors and name == "highlight_color":
+                attr |= curses.A_REVERSE  # Monochrome terminal: the selection still has to show
+            self.color_pairs[name] = attr
+        self.default = curses.color_pair(0)
+
+    def theme_colors(self):
+        for spec in self.theme_config.values():
+            if isinstance(spec, dict):
+                yield spec.get('fg')
+                yield spec.get('bg')
+            else:
+                yield spec
+
+    def color(self, spec, fallback):
+        index = parse_color(spec, self.colors, fallback)
+        return fallback if index == -1 and not self.default_colors else index
+
+    def resolve(self, fg, bg, attrs, pin=False):
+        bits = attribute_bits(attrs)
+        if not self.colors:
+            return bits
+        fg = self.color(fg, curses.COLOR_WHITE)
+        bg = self.color(bg, curses.COLOR_BLACK)
+        return self.pair_attrs[self.allocator.pair(fg, bg, pin)] | bits
 
     def get_color(self, color_name):
-        return self.color_pairs.get(color_name, curses.color_pair(0))  # Default to pair 0 if not found
+        return self.color_pairs.get(color_name, self.default)  # Default to pair 0 if not found
+
+    def style(self, fg="white", bg="black", attrs=()):
+        """Attribute for an arbitrary (fg, bg, attrs) combination; `attrs` is a tuple of names."""
+        key = (fg, bg, attrs)
+        entry = self.styles.get(key)
+        if entry is None:
+            bits = attribute_bits(attrs)
+            pair_key = None
+            if self.colors:
+                pair_key = (self.color(fg, curses.COLOR_WHITE), self.color(bg, curses.COLOR_BLACK))
+            entry = self.styles[key] = (pair_key, bits)
+        pair_key, bits = entry
+        if pair_key is None:
+            return bits
+        # Always go through the allocator: it keeps recency up to date and may have recycled the pair
+        return self.pair_attrs[self.allocator.pair(*pair_key)] | bits
 
+    def item_style(self, spec):
+        """Attribute for a menu item's "style": a theme entry name or a {"fg", "bg", "attrs"} object."""
+        if isinstance(spec, str):
+            return self.get_color(spec)
+        return self.style(spec.get('fg', 'white'), spec.get('bg', 'black'), tuple(spec.get('attrs', ())))
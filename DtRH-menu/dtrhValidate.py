@@ -0,0 +1,171 @@
+#
+#   dtrhValidate.py - Compiled validators for DtRH-Menu configs
+#
+#   compile_schema() turns a JSON schema into a tree of small checking
+#   closures once, instead of interpreting the schema on every call like
+#   jsonschema.validate(). It handles the keywords schemap.py uses (type,
+#   properties, required, items, additionalProperties) directly and hands
+#   any other keyword to jsonschema. MenuValidator adds the checks a schema
+#   can't express: that every `submenu` reference points at a defined menu,
+#   that option controls have options and that live menus have a usable
+#   source.
+# ======================================================================================================
+
+JSON_TYPES = {
+    "string": str,
+    "object": dict,
+    "array": list,
+    "boolean": bool,
+    "integer": int,
+    "number": (int, float),
+    "null": type(None),
+}
+FAST_KEYWORDS = {"type", "properties", "required", "items", "additionalProperties"}
+OPTION_ACTIONS = ("multiple_select", "checkbox", "radio")  # Controls that index item['options']
+VALIDATOR_VERSION = b"menu-validator-2"  # Part of the config cache key; bump when checks change
+
+def json_path(path):
+    """Render a path tuple as a JSON path, e.g. $.submenus.help.menu_items[2].label."""
+    parts = ["$"]
+    for part in path:
+        parts.append(f"[{part}]" if isinstance(part, int) else f".{part}")
+    return "".join(parts)
+
+def type_test(expected):
+    """Return (types, exclude_bool, label) for isinstance() checks against a JSON type."""
+    names = [expected] if isinstance(expected, str) else list(expected)
+    types = tuple(JSON_TYPES[name] for name in names)
+    exclude_bool = bool not in types  # bool is an int subclass, but not a JSON integer/number
+    return types, exclude_bool, names[0] if len(names) == 1 else names
+
+def type_checker(expected):
+    types, exclude_bool, label = type_test(expected)
+    def check(value, path, errors):
+        if not isinstance(value, types) or (exclude_bool and isinstance(value, bool)):
+            errors.append((path, f"{value!r} is not of type {label!r}"))
+            return False
+        return True
+    return check
+
+def fallback_checker(schema):
+    from jsonschema.validators import validator_for
+    validator = validator_for(schema)(schema)  # Built once, reused for every value
+    def check(value, path, errors):
+        for error in validator.iter_errors(value):
+            errors.append((path + tuple(error.absolute_path), error.message))
+    return check
+
+def compile_schema(schema):
+    """Compile `schema` into check(value, path, errors), which appends (path, message) pairs."""
+    if schema is True or schema == {}:
+        return lambda value, path, errors: None
+    if schema is False:
+        return lambda value, path, errors: errors.append((path, "no value is allowed here"))
+    if not schema.keys() <= FAST_KEYWORDS:
+        return fallback_checker(schema)
+
+    check_type = type_checker(schema["type"]) if "type" in schema else None
+    required = tuple(schema.get("required", ()))
+    required_keys = frozenset(required)
+    # Properties that only constrain the type are checked inline; nested schemas get their own checker
+    typed, nested = [], []
+    for key, sub in schema.get("properties", {}).items():
+        if isinstance(sub, dict) and sub.keys() == {"type"}:
+            typed.append((key, *type_test(sub["type"])))
+        else:
+            nested.append((key, compile_schema(sub)))
+    known = set(schema.get("properties", {}))
+    additional = schema.get("additionalProperties", True)
+    check_additional = None if additional is True else compile_schema(additional)
+    check_item = compile_schema(schema["items"]) if isinstance(schema.get("items"), dict) else None
+
+    def check(value, path, errors):
+        if check_type is not None and not check_type(value, path, errors):
+            return  # Nothing below applies to a value of the wrong type
+        if isinstance(value, dict):
+            if not required_keys <= value.keys():
+                for key in required:
+                    if key not in value:
+                        errors.append((path, f"{key!r} is a required property"))
+            for key, types, exclude_bool, label in typed:
+                if key in value:
+                    item = value[key]
+                    if not isinstance(item, types) or (exclude_bool and isinstance(item, bool)):
+                        errors.append((path + (key,), f"{item!r} is not of type {label!r}"))
+            for key, check_property in nested:
+                if key in value:
+                    check_property(value[key], path + (key,), errors)
+            if check_additional is not None:
+                for key in value.keys() - known:
+                    check_additional(value[key], path + (key,), errors)
+        elif check_item is not None and isinstance(value, list):
+            for index, item in enumerate(value):
+                check_item(item, path + (index,), errors)
+    return check
+
+class MenuValidationError(ValueError):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("\n".join(f"{path}: {message}" for path, message in errors))
+
+class MenuValidator:
+    """Validate a menu config against a schema plus its submenu references.
+
+    Build one per schema and reuse it (see validator_for()); errors() reports
+    every problem as a (json_path, message) pair instead of stopping at the
+    first one.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.check = compile_schema(schema)
+
+    def errors(self, data):
+        errors = []
+        self.check(data, (), errors)
+        if isinstance(data, dict):
+            self.check_menus(data, errors)
+        return [(json_path(path), message) for path, message in errors]
+
+    def validate(self, data):
+        errors = self.errors(data)
+        if errors:
+            raise MenuValidationError(errors)
+
+    def check_menus(self, data, errors):
+        submenus = data.get("submenus")
+        submenus = submenus if isinstance(submenus, dict) else {}
+        menus = [((), data)]
+        menus.extend((("submenus", name), menu) for name, menu in submenus.items())
+        for path, menu in menus:
+            if not isinstance(menu, dict):
+                continue
+            source = menu.get("source")
+            if isinstance(source, dict) and ("command" in source) == ("generator" in source):
+                errors.append((path + ("source",), "a source needs exactly one of 'command' or 'generator'"))
+            if "menu_items" not in menu and "source" not in menu:
+                errors.append((path, "a menu needs 'menu_items' or a 'source'"))
+            items = menu.get("menu_items")
+            if not isinstance(items, list):
+                continue
+            for index, item in enumerate(items):
+                if not isinstance(item, dict):
+                    continue
+                action = item.get("action")
+                if action == "submenu":
+                    target = item.get("submenu")
+                    if target is None:
+                        errors.append((path + ("menu_items", index), "'submenu' is required for action 'submenu'"))
+                    elif isinstance(target, str) and target != "main" and target not in submenus:
+                        errors.append((path + ("menu_items", index, "submenu"), f"submenu {target!r} is not defined"))
+                elif action in OPTION_ACTIONS and "options" not in item:
+                    errors.append((path + ("menu_items", index), f"'options' is required for action {action!r}"))
+
+validators = {}  # id(schema) -> (schema, MenuValidator)
+
+def validator_for(schema):
+    """Return the compiled validator for `schema`, compiling it on first use."""
+    entry = validators.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        entry = validators[id(schema)] = (schema, MenuValidator(schema))
+    return entry[1]
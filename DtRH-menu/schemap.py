@@ -1,27 +1,58 @@
 # schemap.py
 # The schema mapper..
 
+menu_item_schema = {
+    "type": "object",
+    "properties": {
+        "label": {"type": "string"},
+        "action": {"type": "string"},
+        "submenu": {"type": "string"},
+        "command": {"type": "string"},
+        "options": {"type": "array", "items": {"type": "string"}},
+        "style": {"type": ["string", "object"]}
+    },
+    "required": ["label", "action"]
+}
+
+# Live menus: items are refreshed from a command or a Python callable ("module:function")
+source_schema = {
+    "type": "object",
+    "properties": {
+        "command": {"type": "string"},
+        "generator": {"type": "string"},
+        "interval": {"type": "number"},
+        "format": {"type": "string"},
+        "id_column": {"type": "integer"},
+        "action": {"type": "string"},
+        "timeout": {"type": "number"}
+    }
+}
+
+# A menu needs menu_items, a source, or both (checked by dtrhValidate)
+submenu_schema = {
+    "type": "object",
+    "properties": {
+        "menu_title": {"type": "string"},
+        "menu_items": {"type": "array", "items": menu_item_schema},
+        "source": source_schema
+    }
+}
+
 menu_schema = {
     "type": "object",
     "properties": {
         "menu_title": {"type": "string"},
         "language": {"type": "string"},
         "theme": {"type": "object"},
-        "menu_items": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "label": {"type": "string"},
-                    "action": {"type": "string"}
-                },
-                "required": ["label", "action"]
-            }
-        },
-        "submenus": {"type": "object"},
-        "languages": {"type": "object"}
+        "menu_items": {"type": "array", "items": menu_item_schema},
+        "source": source_schema,
+        "submenus": {"type": "object", "additionalProperties": submenu_schema},
+        "languages": {"type": "object"},
+        "actions": {"type": "object", "additionalProperties": {"type": ["string", "object"]}},
+        "action_workers": {"type": "integer"},
+        "max_fps": {"type": "number"}
     },
-    "required": ["menu_title", "language", "menu_items"]
+    "required": ["menu_title", "language"]
 }
 
 stdin_schema = {
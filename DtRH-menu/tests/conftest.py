@@ -0,0 +1,35 @@
+import curses
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Theme:
+    def get_color(self, color_name):
+        return curses.A_REVERSE
+
+    def item_style(self, style):
+        return curses.A_NORMAL
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # The menu's logger creates dtrhLogger.yaml and its log directory in the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def make_menu():
+    from dtrhMenu import Menu
+
+    def make(items, **config):
+        if not hasattr(items, 'complete'):
+            items = [{"label": item, "action": "none"} if isinstance(item, str) else item for item in items]
+        menu = Menu(dict(config, menu_title="Test", menu_items=items))
+        menu.theme = Theme()
+        menu.renderer.doupdate = lambda: None
+        return menu
+    return make
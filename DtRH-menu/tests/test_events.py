@@ -0,0 +1,63 @@
+import curses
+import os
+
+import pytest
+
+from dtrhEvents import EventLoop
+
+
+class KeyScreen:
+    # Window whose getch() returns queued keys, then -1 (no input) in nodelay mode
+    def __init__(self, keys):
+        self.keys = list(keys)
+
+    def nodelay(self, flag):
+        pass
+
+    def getch(self):
+        return self.keys.pop(0) if self.keys else -1
+
+
+class PromptUI:
+    # Enter opens an inline prompt that reads keys itself until the next Enter
+    def __init__(self):
+        self.menu_keys = []
+        self.prompt_keys = []
+
+    def handle_key(self, key, stdscr):
+        self.menu_keys.append(key)
+        if key == 10:
+            while (key := stdscr.getch()) not in (10, -1):
+                self.prompt_keys.append(key)
+
+
+@pytest.fixture
+def make_loop():
+    loops = []
+
+    def make(screen):
+        loop = EventLoop(screen)
+        loops.append(loop)
+        return loop
+    yield make
+    for loop in loops:
+        loop.selector.close()
+        os.close(loop.wake_read)
+        os.close(loop.wake_write)
+
+
+def test_keys_after_enter_go_to_the_inline_handler(make_loop):
+    screen = KeyScreen(map(ord, "ab\nxyz\ncd"))
+    ui = PromptUI()
+    make_loop(screen).read_keys(ui)
+    assert ''.join(map(chr, ui.menu_keys)) == "ab\ncd"
+    assert ''.join(map(chr, ui.prompt_keys)) == "xyz"
+
+
+def test_resizes_are_coalesced(make_loop):
+    screen = KeyScreen([curses.KEY_RESIZE, ord('a'), curses.KEY_RESIZE])
+    ui = PromptUI()
+    loop = make_loop(screen)
+    loop.read_keys(ui)
+    assert ui.menu_keys == [ord('a')]
+    assert loop.resize_pending and loop.stats['keys'] == 1
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from dtrhFilter import FilteredItems, ItemIndex, iter_bits
+from dtrhStream import LineItems
+
+WORDS = ['alpha', 'beta', 'gamma', 'delta', 'epsilon']
+
+
+def lines(count, seed):
+    rng = random.Random(seed)
+    return ''.join(' '.join(rng.choice(WORDS) for _ in range(3)) + '\n' for _ in range(count)).encode()
+
+
+def expected(items, query):
+    # Reference matcher: the query is a case-insensitive subsequence of the label
+    def matches(label):
+        chars = iter(label.lower())
+        return all(char in chars for char in query.lower())
+    return [index for index in range(len(items)) if matches(items[index]['label'])]
+
+
+def finish(view):
+    while view.advance():
+        pass
+    return list(view.matches)
+
+
+def test_iter_bits():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b1010_0000_0001 | 1 << 70)) == [0, 9, 11, 70]
+
+
+@pytest.mark.parametrize('query', ['ga', 'gmm', 'zz', 'a b'])
+def test_matches_are_subsequences(query):
+    items = [{"label": label} for label in ["Gamma ray", "game", "ALPHA BETA", "beta", "gm"]]
+    index = ItemIndex(items)
+    index.catch_up()
+    assert finish(FilteredItems(items, index, query)) == expected(items, query)
+
+
+def test_refining_a_query_reuses_the_previous_matches():
+    items = LineItems()
+    items.feed(lines(2000, 1))
+    items.finish()
+    index = ItemIndex(items)
+    index.catch_up()
+    first = FilteredItems(items, index, 'ga')
+    finish(first)
+    refined = FilteredItems(items, index, 'gam', previous=first)
+    assert refined.mask is None  # Candidates come from first.matches
+    assert finish(refined) == expected(items, 'gam')
+
+
+def test_filter_follows_streamed_items():
+    items = LineItems()
+    items.feed(lines(1000, 1))
+    index = ItemIndex(items)
+    index.catch_up()
+    view = FilteredItems(items, index, 'ga')
+    finish(view)
+    assert not view.complete
+    items.feed(lines(2000, 2))  # Arrives after the query was typed; not indexed yet
+    finish(view)
+    assert not view.complete
+    refined = FilteredItems(items, index, 'gam', previous=view)  # Incomplete: refined from the index mask
+    items.feed(lines(500, 3) + b'\n\n')
+    finish(refined)
+    items.finish()  # Drops the trailing blank lines
+    assert refined.advance() is False and refined.complete
+    assert list(refined.matches) == expected(items, 'gam')
+    assert finish(FilteredItems(items, index, 'gamm', previous=refined)) == expected(items, 'gamm')
@@ -0,0 +1,50 @@
+from dtrhLive import LiveItems, lines_to_items
+
+
+def snapshot(*pairs):
+    return [{"id": item_id, "label": label} for item_id, label in pairs]
+
+
+def test_diff_counts_and_keeps_unchanged_items():
+    items = LiveItems(snapshot((1, "a"), (2, "b"), (3, "c")))
+    unchanged = items[0]
+    assert items.apply(snapshot((1, "a"), (3, "C"), (4, "d"))) == (1, 1, 1, False)
+    assert items[0] is unchanged
+    assert [item['label'] for item in items] == ["a", "C", "d"]
+    assert items.positions == {1: 0, 3: 1, 4: 2}
+
+
+def test_reordering_is_reported_as_a_move():
+    items = LiveItems(snapshot((1, "a"), (2, "b")))
+    assert items.apply(snapshot((2, "b"), (1, "a"))) == (0, 0, 0, True)
+    assert items.apply(snapshot((2, "b"), (1, "a"))) == (0, 0, 0, False)
+
+
+def test_duplicate_ids_keep_the_first():
+    items = LiveItems(snapshot((1, "a"), (1, "b")))
+    assert [item['label'] for item in items] == ["a"]
+
+
+def test_stale_diff_is_recomputed_on_commit():
+    items = LiveItems(snapshot((1, "a")))
+    stale = items.diff(snapshot((1, "a"), (2, "b")))
+    items.apply(snapshot((1, "a"), (3, "c")))  # Lands between the fetch thread's diff and the commit
+    assert items.commit(stale) == (1, 1, 0, False)
+    assert [item['id'] for item in items] == [1, 2]
+
+
+def test_lines_to_items_uses_the_id_column():
+    items = lines_to_items("  10 init\n\n  20 bash\n", id_column=0)
+    assert [(item['id'], item['label']) for item in items] == [("10", "  10 init"), ("20", "  20 bash")]
+
+
+def test_selection_follows_a_moved_item(make_menu):
+    from dtrhLive import LiveSource
+    menu = make_menu(snapshot(("a", "alpha"), ("b", "beta"), ("c", "gamma")), source={"command": "true"})
+    source = menu.sources['main']
+    assert isinstance(source, LiveSource)
+    menu.selected_index = 2
+    items = menu.menus['main']['menu_items']
+    source.snapshot = items.diff(snapshot(("c", "gamma"), ("a", "alpha"), ("b", "beta")))
+    menu.apply_sources()
+    assert menu.selected_index == 0
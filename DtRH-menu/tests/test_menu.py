@@ -0,0 +1,87 @@
+import curses
+
+import pytest
+
+from dtrhStream import LineItems
+
+ENTER = 10
+
+
+class Screen:
+    # Stand-in for a curses window of a given size; the menu's RowRenderer keeps the
+    # frame it drew, so tests read rows from menu.renderer.rows
+    def __init__(self, height=24, width=80):
+        self.height = height
+        self.width = width
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def erase(self):
+        pass
+
+    def move(self, y, x):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+    def addstr(self, *args):
+        pass
+
+    def noutrefresh(self):
+        pass
+
+
+def type_keys(menu, screen, text):
+    for char in text:
+        menu.handle_key(ord(char), screen)
+
+
+def rows(menu):
+    return {y: text for y, (x, text, attr) in menu.renderer.rows.items()}
+
+
+def test_enter_with_no_filter_matches_does_nothing(make_menu):
+    menu = make_menu(["alpha", "beta"])
+    screen = Screen()
+    type_keys(menu, screen, "/zzz")
+    assert menu.filter.advance() is False and len(menu.filter) == 0
+    menu.handle_key(ENTER, screen)
+    menu.handle_key(curses.KEY_ENTER, screen)
+    menu.display(screen)
+    assert "/zzz  (0 matches)" in rows(menu).values()
+
+
+def test_enter_on_an_empty_stream_does_nothing(make_menu):
+    items = LineItems()
+    items.finish()
+    menu = make_menu(items)
+    screen = Screen()
+    menu.handle_key(ENTER, screen)
+    menu.execute_action('none', screen)
+    menu.display(screen)
+
+
+@pytest.mark.parametrize('height', range(5, 16))
+@pytest.mark.parametrize('count', [1, 3, 7, 12])
+@pytest.mark.parametrize('footer', ['filter', 'job', 'both'])
+def test_items_stay_clear_of_the_footer(make_menu, height, count, footer):
+    labels = [f"item{i}" for i in range(count)]
+    menu = make_menu(labels)
+    screen = Screen(height=height)
+    if footer in ('filter', 'both'):
+        menu.handle_key(ord('/'), screen)
+    if footer in ('job', 'both'):
+        menu.job_message = "done: job 1"
+    menu.display(screen)
+    drawn = rows(menu)
+    footer_rows = 2 if footer == 'both' else 1
+    item_rows = sorted(y for y, text in drawn.items() if text in labels)
+    assert item_rows, drawn
+    assert max(item_rows) < height - footer_rows
+    assert min(item_rows) >= 1  # Below the title
+    visible = len(item_rows)
+    if count <= height - 2 - footer_rows:
+        assert visible == count  # Everything fits, so everything is shown
+    assert all(0 <= y < height for y in drawn)